@@ -0,0 +1,416 @@
+"""قياس أداء المسارات الحرجة في وحدة التحليلات واكتشاف الأجهزة
+
+الاستخدام:
+    python benchmarks.py --sizes 1000 10000 --output results.json
+    python benchmarks.py --baseline baseline.json --threshold 0.25
+    python benchmarks.py --save-baseline baseline.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+
+import numpy as np
+
+# الرسم البياني يُقاس دون شاشة
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYTICS_MODULE = os.path.join(ROOT_DIR, "home", "peter", "tempo-api", "projects",
+                                "915e5519-c647-44f3-80ba-255399fcbf8e", "analytics-module.py")
+DEVICES_MODULE = os.path.join(ROOT_DIR, "devices-module.py")
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_SEED = 1234
+DEFAULT_THRESHOLD = 0.2  # نسبة الزيادة في الوسيط التي تُعد تراجعًا في الأداء
+DEFAULT_MIN_DELTA_MS = 0.05  # فروق أصغر من هذا تُعد ضوضاء في القياسات القصيرة جدًا
+HISTORY_SPAN_DAYS = 3 * 365  # أطول مدة يغطيها التاريخ الاصطناعي
+CHUNK_SIZE = 50000  # حجم دفعات توليد السجلات حتى لا يُحمَّل التاريخ كله في الذاكرة
+CAPTURE_SECONDS = 10  # مدة تسجيل الحركة الاصطناعي في قياس الالتقاط
+CAPTURE_RATE = 8000  # معدل التقارير فيه (Hz)
+POLLING_SECONDS = 180  # مدة الالتقاط في قياس تحليل معدل التحديث
+TRAJECTORY_SECONDS = 3600  # مدة مسار الحركة في قياس صيغة MTRJ
+
+
+def load_module(path, name):
+    """تحميل وحدة من مسار ملف (أسماء ملفات الوحدات تحتوي على شرطات)"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class BenchmarkSettings:
+    """مدير إعدادات ثابت بدلًا من مدير إعدادات التطبيق"""
+    def get_active_settings(self):
+        return {"dpi": 800, "sensitivity": 1.0, "polling_rate": 1000, "acceleration": False}
+
+
+def synthetic_results(count, seed=DEFAULT_SEED, chunk_size=CHUNK_SIZE, end_time=None):
+    """مولّد نتائج معايرة اصطناعية قابلة للتكرار، على دفعات من chunk_size نتيجة
+
+    النتائج موزعة على نحو 20 معايرة يوميًا (وعلى ثلاث سنوات كحد أقصى للأحجام الكبيرة)
+    وتنتهي عند end_time، مع اتجاه بطيء وضوضاء.
+    """
+    rng = np.random.default_rng(seed)
+    end_time = time.time() if end_time is None else end_time
+    spacing = min(86400 / 20, HISTORY_SPAN_DAYS * 86400 / max(count, 1))
+    start_time = end_time - count * spacing
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        index = np.arange(start, start + size)
+        timestamps = start_time + index * spacing + rng.uniform(0, spacing, size)
+        drift = 1.5 * np.sin(index / 5000.0)
+        scores = {
+            field: np.clip(6 + drift + rng.normal(0, 1.5, size), 0, 10)
+            for field in ("accuracy_score", "speed_score", "tracking_score")
+        }
+        overall = (scores["accuracy_score"] + scores["speed_score"] + scores["tracking_score"]) / 3
+        response_times = rng.normal(220, 30, size)
+        yield [
+            {
+                "timestamp": float(timestamps[i]),
+                "accuracy_score": float(scores["accuracy_score"][i]),
+                "speed_score": float(scores["speed_score"][i]),
+                "tracking_score": float(scores["tracking_score"][i]),
+                "overall_score": float(overall[i]),
+                "response_time": float(response_times[i]),
+                "recommended_settings": {"dpi": 800}
+            }
+            for i in range(size)
+        ]
+
+
+def canned_xinput_output(count=8):
+    """مخرجات ثابتة لأمر xinput list تحتوي على أجهزة ماوس معروفة وغير معروفة"""
+    names = ["Logitech G Pro Gaming Mouse", "Razer DeathAdder V2 Mouse", "Generic USB Optical Mouse",
+             "Logitech Wireless Mouse", "SteelSeries Rival 3 Gaming Mouse", "Glorious Model O Mouse",
+             "Zowie EC2 Mouse", "Logitech G502 HERO Gaming Mouse"]
+    lines = ["⎡ Virtual core pointer                    \tid=2\t[master pointer  (3)]",
+             "⎜   ↳ Virtual core XTEST pointer              \tid=4\t[slave  pointer  (2)]"]
+    for i in range(count):
+        lines.append(f"⎜   ↳ {names[i % len(names)]} {i}                \tid={10 + i}\t[slave  pointer  (2)]")
+    lines.append("⎣ Virtual core keyboard                   \tid=3\t[master keyboard (2)]")
+    lines.append("    ↳ AT Translated Set 2 keyboard            \tid=9\t[slave  keyboard (3)]")
+    return "\n".join(lines) + "\n"
+
+
+def measure(function, repeat=5, number=1, setup=None):
+    """تشغيل function عدة مرات وإعادة إحصائيات الزمن بالمللي ثانية لكل استدعاء"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) * 1000 / number)
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "mean_ms": statistics.fmean(timings),
+        "repeat": repeat,
+        "number": number
+    }
+
+
+class AnalyticsBenchmark:
+    """قياسات PerformanceData والرسم البياني لتاريخ بحجم معين"""
+    def __init__(self, analytics, size, seed, storage, repeat, data_dir):
+        self.analytics = analytics
+        self.size = size
+        self.seed = seed
+        self.storage = storage
+        self.repeat = repeat
+        # مجلد بيانات مؤقت بدلًا من ~/.mousetuner
+        self.data_dir = data_dir
+
+    def performance_data(self, **kwargs):
+        return self.analytics.PerformanceData(BenchmarkSettings(), storage=self.storage,
+                                              data_dir=self.data_dir, **kwargs)
+
+    def populate(self):
+        """إنشاء تاريخ بالحجم المطلوب وحفظه"""
+        performance_data = self.performance_data()
+        for chunk in synthetic_results(self.size, self.seed):
+            performance_data.add_calibration_results(chunk)
+        performance_data.close()
+
+    def run(self):
+        analytics = self.analytics
+        results = {}
+
+        start = time.perf_counter()
+        self.populate()
+        results["populate"] = {"median_ms": (time.perf_counter() - start) * 1000, "repeat": 1, "number": 1}
+
+        # بدء التشغيل: مع الأعمدة المحفوظة على القرص، ودون ذاكرة مرتبطة (إعادة بناء الأعمدة)
+        results["startup"] = measure(lambda: self.performance_data().close(), repeat=self.repeat)
+        results["startup_no_mmap"] = measure(lambda: self.performance_data(memory_mapped=False).close(),
+                                             repeat=self.repeat)
+
+        performance_data = self.performance_data()
+        results["load_performance_data"] = measure(performance_data.load_performance_data, repeat=self.repeat)
+
+        def save():
+            performance_data.save_performance_data()
+            performance_data.writer.flush()
+        results["save_performance_data"] = measure(save, repeat=self.repeat)
+
+        extra = iter(next(synthetic_results(self.repeat * 10, self.seed + 1)))
+
+        def add():
+            performance_data.add_calibration_result(next(extra))
+        results["add_calibration_result"] = measure(add, repeat=self.repeat, number=10)
+        performance_data.writer.flush()
+
+        results["analyze_patterns"] = measure(performance_data.analyze_patterns, repeat=self.repeat, number=10)
+
+        for resolution in ("all", "day", "week"):
+            # أول طلب بدقة تجميع يبني التجميعات، والطلبات التالية تستخدمها
+            results[f"get_performance_chart_data_{resolution}"] = measure(
+                lambda: performance_data.get_performance_chart_data(resolution), repeat=self.repeat, number=5)
+
+        if analytics.QT_AVAILABLE:
+            results.update(self.run_chart(performance_data))
+
+        performance_data.close()
+        return results
+
+    def run_chart(self, performance_data):
+        """قياس الرسم الكامل والرسم الجزئي (blitting) للرسم البياني دون شاشة"""
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        chart = self.analytics.PerformanceChart(width=8, height=4)
+        chart.resize(800, 400)
+        data = performance_data.get_performance_chart_data("all")
+        chart.update_chart(data)
+        app.processEvents()
+
+        def force_full_redraw():
+            chart._x_limit = None
+
+        results = {
+            "update_chart_full": measure(lambda: chart.update_chart(data), repeat=self.repeat,
+                                         setup=force_full_redraw),
+            "update_chart_blit": measure(lambda: chart.update_chart(data), repeat=self.repeat, number=5)
+        }
+        chart.deleteLater()
+        app.processEvents()
+        return results
+
+
+def canned_proc_devices(count=8):
+    """محتوى ثابت لملف /proc/bus/input/devices يحتوي على أجهزة ماوس ولوحة مفاتيح"""
+    names = canned_xinput_output(count).splitlines()
+    blocks = ['I: Bus=0011 Vendor=0001 Product=0001 Version=ab41\n'
+              'N: Name="AT Translated Set 2 keyboard"\n'
+              'H: Handlers=sysrq kbd event3 leds \n'
+              'B: EV=120013\n'
+              'B: KEY=402000000 3803078f800d001 feffffdfffefffff fffffffffffffffe\n']
+    for i in range(count):
+        name = names[2 + i].split("↳ ", 1)[1].split("\t", 1)[0].strip()
+        blocks.append(f'I: Bus={"0005" if i % 4 == 3 else "0003"} Vendor=046d Product=c0{i:02x} Version=0111\n'
+                      f'N: Name="{name}"\n'
+                      f'P: Phys=usb-0000:00:14.0-{i}/input0\n'
+                      f'S: Sysfs=/devices/pci0000:00/usb1/1-{i}/input/input{10 + i}\n'
+                      f'H: Handlers=mouse{i} event{10 + i} \n'
+                      'B: PROP=0\nB: EV=17\nB: KEY=ffff0000 0 0 0 0\nB: REL=1943\nB: MSC=10\n')
+    return "\n".join(blocks) + "\n"
+
+
+def synthetic_capture(event_dtype, seconds, rate):
+    """أحداث evdev لحركة دائرية: REL_X وREL_Y وSYN_REPORT لكل تقرير"""
+    count = seconds * rate
+    timestamps = np.arange(count, dtype=np.int64) * (1000000 // rate)
+    angle = np.arange(count) * (2 * np.pi / rate)
+    events = np.zeros((count, 3), dtype=event_dtype)
+    events["sec"] = (timestamps // 1000000)[:, None]
+    events["usec"] = (timestamps % 1000000)[:, None]
+    events["type"][:, :2] = 2  # EV_REL
+    events["code"][:, 1] = 1  # REL_Y
+    events["value"][:, 0] = np.rint(np.cos(angle) * 5)
+    events["value"][:, 1] = np.rint(np.sin(angle) * 5)
+    return events.reshape(-1)
+
+
+def run_device_benchmarks(repeat):
+    """قياس refresh_devices بالقراءة من procfs، وبمخرجات xinput ثابتة بدلًا من تشغيل الأمر"""
+    devices = load_module(DEVICES_MODULE, "devices_module")
+    output = canned_xinput_output()
+    original_run = devices.subprocess.run
+
+    def canned_run(args, *unused_args, **unused_kwargs):
+        return subprocess.CompletedProcess(args, 0, stdout=output, stderr="")
+
+    # شجرة ملفات فيها /proc/bus/input/devices ثابت، وأخرى فارغة للرجوع إلى xinput
+    proc_root = tempfile.mkdtemp(prefix="mousetuner-input-")
+    os.makedirs(os.path.join(proc_root, "proc", "bus", "input"))
+    with open(os.path.join(proc_root, "proc", "bus", "input", "devices"), 'w', encoding='utf-8') as f:
+        f.write(canned_proc_devices())
+    empty_root = tempfile.mkdtemp(prefix="mousetuner-input-")
+
+    from PyQt5.QtWidgets import QApplication
+    QApplication.instance() or QApplication(sys.argv[:1])
+    devices.subprocess.run = canned_run
+    try:
+        results = {}
+        for name, root in (("refresh_devices_procfs", proc_root), ("refresh_devices_xinput", empty_root)):
+            detector = devices.DeviceDetector(input_root=root)
+            detector.os_type = "Linux"
+            detector.refresh_devices()
+            if len(detector.devices) != len(output.splitlines()) - 4:
+                print(f"تحذير: عدد الأجهزة المكتشفة غير متوقع في {name} ({len(detector.devices)})")
+            results[name] = measure(detector.refresh_devices, repeat=repeat, number=20)
+        
+        # تحويل معلومات الجهاز ومقارنتها (في المسار الحرج لكل تحديث)
+        mouse_info = next(iter(detector.devices.values()))
+        data = mouse_info.to_dict()
+        changed = devices.MouseInfo.from_dict(dict(data, current_polling_rate=4000))
+        results["mouse_info_to_dict"] = measure(mouse_info.to_dict, repeat=repeat, number=10000)
+        results["mouse_info_from_dict"] = measure(lambda: devices.MouseInfo.from_dict(data), repeat=repeat,
+                                                  number=10000)
+        results["mouse_info_diff"] = measure(lambda: mouse_info.diff(changed), repeat=repeat, number=10000)
+        
+        # تشغيل تسجيل حركة مدته CAPTURE_SECONDS عند 8000 Hz عبر محرك الالتقاط
+        recording = os.path.join(empty_root, "capture.events")
+        synthetic_capture(devices.INPUT_EVENT, CAPTURE_SECONDS, CAPTURE_RATE).tofile(recording)
+        engine = devices.InputCaptureEngine(devices.ReplaySource(recording))
+        results[f"capture_replay_{CAPTURE_SECONDS}s_{CAPTURE_RATE}hz"] = measure(engine.replay, repeat=repeat)
+        
+        # تحليل معدل التحديث لالتقاط مدته ثلاث دقائق مع تذبذب عشوائي
+        rng = np.random.default_rng(DEFAULT_SEED)
+        intervals = rng.normal(1e6 / CAPTURE_RATE, 5, POLLING_SECONDS * CAPTURE_RATE)
+        timestamps = np.cumsum(np.rint(intervals)).astype(np.int64)
+        analyzer = devices.PollingRateAnalyzer()
+        results[f"polling_analysis_{POLLING_SECONDS}s_{CAPTURE_RATE}hz"] = measure(
+            lambda: analyzer.analyze(timestamps), repeat=repeat)
+        return results
+    finally:
+        devices.subprocess.run = original_run
+        shutil.rmtree(proc_root, ignore_errors=True)
+        shutil.rmtree(empty_root, ignore_errors=True)
+
+
+def run_trajectory_benchmarks(analytics, seed, repeat):
+    """كتابة مسار حركة مدته TRAJECTORY_SECONDS عند 1000 Hz وقراءته كاملًا ومقطعًا منه"""
+    count = TRAJECTORY_SECONDS * 1000
+    rng = np.random.default_rng(seed)
+    records = np.empty(count, dtype=analytics.TRAJECTORY_DTYPE)
+    records["timestamp"] = np.cumsum(rng.integers(990, 1011, count))
+    records["dx"] = rng.integers(-20, 21, count)
+    records["dy"] = rng.integers(-20, 21, count)
+    records["buttons"] = (np.arange(count) // 5000) % 2
+    directory = tempfile.mkdtemp(prefix="mousetuner-trajectory-")
+    path = os.path.join(directory, "session.mtrj")
+
+    def write():
+        with analytics.TrajectoryWriter(path) as writer:
+            writer.append(records)
+
+    write()
+    reader = analytics.TrajectoryReader(path)
+    middle = int(records["timestamp"][count // 2])
+    try:
+        return {
+            f"trajectory_write[{TRAJECTORY_SECONDS}s]": measure(write, repeat=repeat),
+            f"trajectory_read_all[{TRAJECTORY_SECONDS}s]": measure(reader.read, repeat=repeat),
+            f"trajectory_read_second[{TRAJECTORY_SECONDS}s]": measure(
+                lambda: reader.read_time(middle, middle + 1000000), repeat=repeat, number=20)
+        }
+    finally:
+        reader.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def compare(results, baseline, threshold, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """مقارنة الوسيط في كل قياس مع خط الأساس، ويعيد قائمة القياسات التي تراجعت"""
+    regressions = []
+    for name, entry in sorted(results["benchmarks"].items()):
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None:
+            print(f"{name:55s} {entry['median_ms']:10.3f} ms   (جديد)")
+            continue
+        ratio = entry["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        marker = ""
+        if ratio > 1 + threshold and entry["median_ms"] - base["median_ms"] > min_delta_ms:
+            marker = "  <-- تراجع"
+            regressions.append(name)
+        print(f"{name:55s} {entry['median_ms']:10.3f} ms  {base['median_ms']:10.3f} ms  x{ratio:5.2f}{marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس أداء التحليلات واكتشاف الأجهزة")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="أحجام التاريخ الاصطناعي (عدد نتائج المعايرة)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--storage", default="log", help="وحدة التخزين (log أو sqlite)")
+    parser.add_argument("--repeat", type=int, default=5, help="عدد مرات تكرار كل قياس")
+    parser.add_argument("--output", help="ملف JSON لحفظ النتائج")
+    parser.add_argument("--baseline", help="ملف نتائج سابق للمقارنة")
+    parser.add_argument("--save-baseline", help="حفظ النتائج كخط أساس جديد")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="نسبة الزيادة المسموح بها في الوسيط قبل اعتبارها تراجعًا")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="أصغر فرق بالمللي ثانية يُعد تراجعًا")
+    parser.add_argument("--skip-devices", action="store_true", help="تخطي قياسات اكتشاف الأجهزة")
+    args = parser.parse_args(argv)
+
+    analytics = load_module(ANALYTICS_MODULE, "analytics_module")
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "storage": args.storage,
+            "sizes": args.sizes
+        },
+        "benchmarks": {}
+    }
+
+    for size in args.sizes:
+        print(f"تاريخ من {size} نتيجة...", file=sys.stderr)
+        with tempfile.TemporaryDirectory(prefix="mousetuner-bench-") as data_dir:
+            benchmark = AnalyticsBenchmark(analytics, size, args.seed, args.storage, args.repeat, data_dir)
+            for name, entry in benchmark.run().items():
+                results["benchmarks"][f"{name}[{size}]"] = entry
+
+    for name, entry in run_trajectory_benchmarks(analytics, args.seed, args.repeat).items():
+        results["benchmarks"][name] = entry
+
+    if not args.skip_devices:
+        for name, entry in run_device_benchmarks(args.repeat).items():
+            results["benchmarks"][name] = entry
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"تراجع الأداء في {len(regressions)} قياس: {', '.join(regressions)}")
+            return 1
+    elif not args.output and not args.save_baseline:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
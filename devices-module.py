@@ -5,10 +5,63 @@ import subprocess
 import json
 import re
 import time
-from PyQt5.QtCore import QThread, pyqtSignal, QObject, QTimer
+import operator
+import collections
+import struct
+import ctypes
+import ctypes.util
+import threading
+import select
+import numpy as np
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject, QTimer, QSocketNotifier
+from PyQt5.QtWidgets import QWidget
+
+# جذر المشروع (حيث instrumentation.py المشترك مع وحدة التحليلات) في مسار الاستيراد
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# قياس زمن العمليات اختياري، ولا يكلف شيئًا تقريبًا عند تعطيله
+from instrumentation import instrumentation
+
+# مراقبة udev اختيارية (تتطلب pyudev)، وإلا تُستخدم inotify مباشرة
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
 
 class MouseInfo:
-    """فئة لتخزين معلومات جهاز الماوس"""
+    """فئة لتخزين معلومات جهاز الماوس
+
+    الحقول معرَّفة في FIELDS، ومنها __slots__ فلا يحمل كل كائن قاموس __dict__ خاصًا به.
+    دوال الإنشاء والتحويل مكتوبة حقلًا حقلًا لأنها في المسار الحرج لاكتشاف الأجهزة،
+    ويجب أن تبقى مطابقة لـ FIELDS.
+    """
+    # اسم الحقل وقيمته الافتراضية بالترتيب
+    FIELDS = (
+        ("device_id", ""),
+        ("name", "غير معروف"),
+        ("vendor", "غير معروف"),
+        ("dpi_range", []),
+        ("polling_rates", []),
+        ("buttons", 0),
+        ("is_wireless", False),
+        ("battery_level", -1),  # -1 يعني غير متاح
+        ("firmware_version", ""),
+        ("connection_type", "غير معروف"),
+        ("supported_features", []),
+        ("current_dpi", 0),
+        ("current_polling_rate", 0),  # 0 يعني غير مقاس بعد
+        # معرفات الجهاز من النظام (عند توفرها)
+        ("vendor_id", ""),
+        ("product_id", ""),
+        ("bus_type", ""),
+        ("capabilities", []),
+        ("device_path", "")
+    )
+    
+    __slots__ = tuple(field for field, _ in FIELDS)
+    
     def __init__(self):
         self.device_id = ""
         self.name = "غير معروف"
@@ -17,13 +70,18 @@ class MouseInfo:
         self.polling_rates = []
         self.buttons = 0
         self.is_wireless = False
-        self.battery_level = -1  # -1 يعني غير متاح
+        self.battery_level = -1
         self.firmware_version = ""
         self.connection_type = "غير معروف"
         self.supported_features = []
         self.current_dpi = 0
         self.current_polling_rate = 0
-
+        self.vendor_id = ""
+        self.product_id = ""
+        self.bus_type = ""
+        self.capabilities = []
+        self.device_path = ""
+    
     def to_dict(self):
         """تحويل معلومات الماوس إلى قاموس"""
         return {
@@ -39,27 +97,978 @@ class MouseInfo:
             "connection_type": self.connection_type,
             "supported_features": self.supported_features,
             "current_dpi": self.current_dpi,
-            "current_polling_rate": self.current_polling_rate
+            "current_polling_rate": self.current_polling_rate,
+            "vendor_id": self.vendor_id,
+            "product_id": self.product_id,
+            "bus_type": self.bus_type,
+            "capabilities": self.capabilities,
+            "device_path": self.device_path
         }
-
+    
     @classmethod
     def from_dict(cls, data):
-        """إنشاء كائن معلومات الماوس من قاموس"""
-        mouse_info = cls()
+        """إنشاء كائن معلومات الماوس من قاموس (يُوحَّد نصا الشركة ونوع الاتصال في الذاكرة)"""
+        mouse_info = cls.__new__(cls)
         mouse_info.device_id = data.get("device_id", "")
         mouse_info.name = data.get("name", "غير معروف")
-        mouse_info.vendor = data.get("vendor", "غير معروف")
+        mouse_info.vendor = _intern_text(data.get("vendor", "غير معروف"))
         mouse_info.dpi_range = data.get("dpi_range", [])
         mouse_info.polling_rates = data.get("polling_rates", [])
         mouse_info.buttons = data.get("buttons", 0)
         mouse_info.is_wireless = data.get("is_wireless", False)
         mouse_info.battery_level = data.get("battery_level", -1)
         mouse_info.firmware_version = data.get("firmware_version", "")
-        mouse_info.connection_type = data.get("connection_type", "غير معروف")
+        mouse_info.connection_type = _intern_text(data.get("connection_type", "غير معروف"))
         mouse_info.supported_features = data.get("supported_features", [])
         mouse_info.current_dpi = data.get("current_dpi", 0)
         mouse_info.current_polling_rate = data.get("current_polling_rate", 0)
+        mouse_info.vendor_id = data.get("vendor_id", "")
+        mouse_info.product_id = data.get("product_id", "")
+        mouse_info.bus_type = data.get("bus_type", "")
+        mouse_info.capabilities = data.get("capabilities", [])
+        mouse_info.device_path = data.get("device_path", "")
         return mouse_info
+    
+    def diff(self, other):
+        """قائمة أسماء الحقول التي تختلف قيمها عن other (بترتيب FIELDS)"""
+        values, other_values = _field_values(self), _field_values(other)
+        if values == other_values:
+            return []
+        return [field for field, value, other_value in zip(self.__slots__, values, other_values)
+                if value != other_value]
+
+
+# قيم كل الحقول كصف واحد بترتيب FIELDS (تُبنى مرة واحدة)
+_field_values = operator.attrgetter(*MouseInfo.__slots__)
+
+
+def _intern_text(value):
+    """توحيد النصوص المتكررة بين الأجهزة في الذاكرة"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class MouseDatabase:
+    """قاعدة بيانات نماذج الماوس مع فهرس للمطابقة السريعة
+
+    المطابقة بالمعرف USB (VID:PID) أولًا عبر جدول تجزئة، ثم بالاسم عبر آلة Aho-Corasick
+    على الأسماء الموحدة، فلا يعتمد زمن البحث على عدد النماذج. يجب أن يقع اسم النموذج
+    على حدود كلمات، وعند تطابق عدة أسماء يُختار الأطول (الأكثر تحديدًا).
+    """
+    DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mouse_database.json")
+    CACHE_SIZE = 1024  # عدد نتائج البحث المحفوظة لكل اسم جهاز
+    
+    def __init__(self, models=()):
+        self.models = list(models)
+        self.by_usb_id = {}
+        for model in self.models:
+            for usb_id in model.get("usb_ids", []):
+                self.by_usb_id.setdefault(usb_id.lower(), model)
+        self._build_index()
+        self._cache = {}
+    
+    @classmethod
+    def load(cls, path):
+        """تحميل النماذج من ملف JSON ({"models": [...]})، وقاعدة فارغة عند الفشل"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data.get("models", []))
+        except Exception as e:
+            print(f"خطأ في تحميل قاعدة بيانات أجهزة الماوس: {e}")
+            return cls()
+    
+    @staticmethod
+    def normalize(name):
+        """توحيد الاسم: أحرف صغيرة، وكل ما ليس حرفًا أو رقمًا يصبح مسافة واحدة"""
+        return " ".join(re.sub(r'[\W_]+', " ", name.lower()).split())
+    
+    def _build_index(self):
+        """بناء آلة Aho-Corasick: انتقالات كل حالة، ورابط الفشل، والنموذج الأطول المنتهي عندها"""
+        self._goto = [{}]
+        self._output = [None]
+        for model in self.models:
+            pattern = self.normalize(model["name"])
+            if not pattern:
+                continue
+            pattern = f" {pattern} "  # المسافات المحيطة تقصر المطابقة على كلمات كاملة
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._output.append(None)
+                state = next_state
+            if self._output[state] is None:
+                self._output[state] = (len(pattern), model)
+        
+        # روابط الفشل بالعرض أولًا، مع وراثة أطول تطابق من حالة الفشل
+        self._fail = [0] * len(self._goto)
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                inherited = self._output[self._fail[next_state]]
+                if inherited is not None and (self._output[next_state] is None or
+                                              inherited[0] > self._output[next_state][0]):
+                    self._output[next_state] = inherited
+    
+    def match_name(self, name):
+        """أطول نموذج يظهر اسمه داخل name، أو None"""
+        best = None
+        state = 0
+        for char in f" {self.normalize(name)} ":
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            found = self._output[state]
+            if found is not None and (best is None or found[0] > best[0]):
+                best = found
+        return best[1] if best is not None else None
+    
+    def lookup(self, name, vendor_id="", product_id=""):
+        """البحث عن نموذج بالمعرف USB ثم بالاسم (مع حفظ النتيجة لكل جهاز)"""
+        key = (name, vendor_id, product_id)
+        if key in self._cache:
+            return self._cache[key]
+        
+        model = None
+        if vendor_id and product_id:
+            model = self.by_usb_id.get(f"{vendor_id}:{product_id}".lower())
+        if model is None:
+            model = self.match_name(name)
+        
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = model
+        return model
+    
+    def __len__(self):
+        return len(self.models)
+
+
+class LinuxInputProbe:
+    """تعداد أجهزة الإدخال على Linux من /proc/bus/input/devices أو /sys/class/input
+
+    لا يحتاج إلى خادم عرض ولا إلى تشغيل أوامر خارجية. root قابل للتغيير لقراءة
+    شجرة ملفات بديلة (مثل نسخة من نظام آخر).
+    """
+    BUS_TYPES = {0x01: "pci", 0x03: "usb", 0x05: "bluetooth", 0x06: "virtual",
+                 0x11: "ps2", 0x18: "i2c", 0x19: "host"}
+    EV_KEY = 0x01
+    EV_REL = 0x02
+    REL_CODES = {0x00: "REL_X", 0x01: "REL_Y", 0x06: "REL_HWHEEL", 0x08: "REL_WHEEL",
+                 0x0b: "REL_WHEEL_HI_RES", 0x0c: "REL_HWHEEL_HI_RES"}
+    BUTTON_CODES = {0x110: "BTN_LEFT", 0x111: "BTN_RIGHT", 0x112: "BTN_MIDDLE", 0x113: "BTN_SIDE",
+                    0x114: "BTN_EXTRA", 0x115: "BTN_FORWARD", 0x116: "BTN_BACK", 0x117: "BTN_TASK"}
+    BITMAPS = ("ev", "key", "rel")  # خرائط القدرات المطلوبة لتمييز الماوس
+    LONG_BITS = ctypes.sizeof(ctypes.c_long) * 8  # حجم كل كلمة في خرائط البتات
+    
+    def __init__(self, root="/"):
+        self.root = root
+        # آخر محتوى لملف procfs ونتيجته، فلا يُعاد التحليل إذا لم يتغير شيء
+        self._last_content = None
+        self._last_mice = None
+    
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+    
+    def enumerate_mice(self):
+        """قائمة بأجهزة الماوس المتصلة، أو None إذا لم يكن أي من المصدرين متاحًا
+
+        لكل جهاز بصمة (fingerprint) من بياناته الخام تتغير فقط إذا تغير الجهاز.
+        القائمة المعادة مشتركة بين الاستدعاءات ما دامت الأجهزة لم تتغير، فيجب عدم تعديلها.
+        """
+        try:
+            with open(self._path("proc", "bus", "input", "devices"), 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        except OSError:
+            devices = self._read_sysfs()
+            if devices is None:
+                return None
+            return [self._describe(device) for device in devices if self._is_mouse(device)]
+        
+        if content != self._last_content:
+            self._last_mice = [self._describe(device) for device in self._read_proc(content)
+                               if self._is_mouse(device)]
+            self._last_content = content
+        return self._last_mice
+    
+    def _read_proc(self, content):
+        """تحليل كتل /proc/bus/input/devices (كتلة لكل جهاز مفصولة بسطر فارغ)"""
+        devices = []
+        for block in content.split("\n\n"):
+            # الماوس يجب أن يدعم الحركة النسبية، فتُتخطى بقية الأجهزة (لوحات المفاتيح...) دون تحليلها
+            if "B: REL=" not in block:
+                continue
+            device = {"handlers": [], "bitmaps": {}, "fingerprint": block}
+            for line in block.splitlines():
+                kind, _, value = line.partition(": ")
+                if kind == "I":
+                    fields = dict(item.split("=", 1) for item in value.split() if "=" in item)
+                    device["bus"] = int(fields.get("Bus", "0"), 16)
+                    device["vendor_id"] = fields.get("Vendor", "").lower()
+                    device["product_id"] = fields.get("Product", "").lower()
+                elif kind == "N":
+                    device["name"] = value.partition("=")[2].strip('"')
+                elif kind == "P":
+                    device["phys"] = value.partition("=")[2]
+                elif kind == "S":
+                    device["sysfs"] = value.partition("=")[2]
+                elif kind == "H":
+                    device["handlers"] = value.partition("=")[2].split()
+                elif kind == "B":
+                    name, _, bitmap = value.partition("=")
+                    name = name.lower()
+                    if name in self.BITMAPS:
+                        device["bitmaps"][name] = self._parse_bitmap(bitmap)
+            if "name" in device:
+                devices.append(device)
+        return devices
+    
+    def _read_sysfs(self):
+        """قراءة /sys/class/input/input* عند عدم توفر procfs"""
+        class_dir = self._path("sys", "class", "input")
+        try:
+            entries = sorted(os.listdir(class_dir))
+        except OSError:
+            return None
+        
+        devices = []
+        for entry in entries:
+            if not entry.startswith("input"):
+                continue
+            device_dir = os.path.join(class_dir, entry)
+            name = self._read_text(device_dir, "name")
+            if name is None:
+                continue
+            try:
+                handlers = sorted(child for child in os.listdir(device_dir)
+                                  if re.match(r'^(event|mouse|js)\d+$', child))
+            except OSError:
+                handlers = []
+            devices.append({
+                "name": name,
+                "bus": int(self._read_text(device_dir, "id", "bustype") or "0", 16),
+                "vendor_id": (self._read_text(device_dir, "id", "vendor") or "").lower(),
+                "product_id": (self._read_text(device_dir, "id", "product") or "").lower(),
+                "phys": self._read_text(device_dir, "phys") or "",
+                "sysfs": "/class/input/" + entry,
+                "handlers": handlers,
+                "fingerprint": None,
+                "bitmaps": {
+                    kind: self._parse_bitmap(self._read_text(device_dir, "capabilities", kind) or "0")
+                    for kind in self.BITMAPS
+                }
+            })
+            device = devices[-1]
+            device["fingerprint"] = (device["name"], device["bus"], device["vendor_id"], device["product_id"],
+                                     device["phys"], tuple(handlers), tuple(device["bitmaps"].values()))
+        return devices
+    
+    @staticmethod
+    def _read_text(*parts):
+        try:
+            with open(os.path.join(*parts), 'r', encoding='utf-8', errors='replace') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+    
+    @classmethod
+    def _parse_bitmap(cls, text):
+        """تحويل خريطة بتات النواة (كلمات ست عشرية، الأعلى أولًا) إلى عدد صحيح"""
+        value = 0
+        for word in text.split():
+            value = (value << cls.LONG_BITS) | int(word, 16)
+        return value
+    
+    @classmethod
+    def _is_mouse(cls, device):
+        """جهاز بحركة نسبية على المحورين وزر أيسر"""
+        bitmaps = device["bitmaps"]
+        ev, rel, key = bitmaps.get("ev", 0), bitmaps.get("rel", 0), bitmaps.get("key", 0)
+        return bool(ev >> cls.EV_REL & 1 and ev >> cls.EV_KEY & 1 and rel & 0b11 and key >> 0x110 & 1)
+    
+    @classmethod
+    def _describe(cls, device):
+        bitmaps = device["bitmaps"]
+        capabilities = [name for code, name in cls.REL_CODES.items() if bitmaps.get("rel", 0) >> code & 1]
+        buttons = [name for code, name in cls.BUTTON_CODES.items() if bitmaps.get("key", 0) >> code & 1]
+        event_handlers = [handler for handler in device["handlers"] if handler.startswith("event")]
+        # عقدة event هي ما يُقرأ منه الجهاز مباشرة، فتُستخدم كمعرف له
+        device_id = event_handlers[0] if event_handlers else device.get("sysfs", device["name"])
+        return {
+            "device_id": device_id,
+            "name": device["name"],
+            "vendor_id": sys.intern(device.get("vendor_id", "")),
+            "product_id": sys.intern(device.get("product_id", "")),
+            "bus_type": cls.BUS_TYPES.get(device.get("bus", 0), "unknown"),
+            "capabilities": capabilities + buttons,
+            "buttons": len(buttons),
+            "device_path": "/dev/input/" + event_handlers[0] if event_handlers else "",
+            "fingerprint": device["fingerprint"]
+        }
+    
+    def read_battery(self, name):
+        """نسبة شحن بطارية جهاز لاسلكي من /sys/class/power_supply حسب اسم النموذج، أو None"""
+        supply_dir = self._path("sys", "class", "power_supply")
+        try:
+            entries = os.listdir(supply_dir)
+        except OSError:
+            return None
+        name = name.lower()
+        for entry in entries:
+            path = os.path.join(supply_dir, entry)
+            # بطاريات الأجهزة الطرفية نطاقها Device، أما بطارية الحاسوب فنطاقها System أو غير محدد
+            if self._read_text(path, "scope") != "Device":
+                continue
+            model_name = self._read_text(path, "model_name")
+            if model_name and model_name.lower() in name:
+                capacity = self._read_text(path, "capacity")
+                if capacity and capacity.isdigit():
+                    return int(capacity)
+        return None
+
+
+# بنية input_event في نواة Linux: timeval (ثانيتان كـ long) ثم النوع والرمز والقيمة
+_LONG = f"i{ctypes.sizeof(ctypes.c_long)}"
+INPUT_EVENT = np.dtype([("sec", _LONG), ("usec", _LONG), ("type", "u2"), ("code", "u2"), ("value", "i4")])
+
+
+class MotionRingBuffer:
+    """حلقة مسبقة التخصيص لتقارير الحركة (الزمن بالميكروثانية، dx، dy، حالة الأزرار)
+
+    تُكتب التقارير دفعةً واحدة بنسخ شرائح NumPy، ويُحتفظ بآخر capacity تقرير فقط.
+    total يعد كل التقارير المكتوبة منذ البداية، فيمكن للقارئ متابعة الجديد منها عبر since().
+    """
+    DTYPE = np.dtype([("timestamp", "i8"), ("dx", "i4"), ("dy", "i4"), ("buttons", "u2")])
+    MAX_RATE = 8000  # أعلى معدل تحديث مدعوم (Hz)
+    SECONDS = 10  # مدة الحركة المحفوظة عند أعلى معدل
+    
+    def __init__(self, capacity=MAX_RATE * SECONDS):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=self.DTYPE)
+        self.total = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return min(self.total, self.capacity)
+    
+    def append(self, timestamps, dx, dy, buttons):
+        """إضافة دفعة تقارير (مصفوفات متساوية الطول)"""
+        count = len(timestamps)
+        skip = max(0, count - self.capacity)  # دفعة أكبر من الحلقة: يكفي آخرها
+        with self._lock:
+            start = (self.total + skip) % self.capacity
+            first = min(count - skip, self.capacity - start)
+            for field, values in (("timestamp", timestamps), ("dx", dx), ("dy", dy), ("buttons", buttons)):
+                column = self.data[field]
+                column[start:start + first] = values[skip:skip + first]
+                column[:count - skip - first] = values[skip + first:]
+            self.total += count
+    
+    def since(self, position):
+        """نسخة مرتبة زمنيًا من التقارير المكتوبة بعد الموضع position، مع الموضع الجديد"""
+        with self._lock:
+            total = self.total
+            count = min(total - position, self.capacity)
+            return self._tail(total, count), total
+    
+    def latest(self, count=None):
+        """نسخة مرتبة زمنيًا من آخر count تقرير (أو كل المحفوظ)"""
+        with self._lock:
+            count = len(self) if count is None else min(count, len(self))
+            return self._tail(self.total, count)
+    
+    def _tail(self, total, count):
+        end = total % self.capacity
+        if count <= end:
+            return self.data[end - count:end].copy()
+        return np.concatenate((self.data[end - count:], self.data[:end]))
+    
+    def clear(self):
+        with self._lock:
+            self.total = 0
+
+
+class EvdevCaptureSource:
+    """قراءة أحداث خام من جهاز /dev/input/eventN
+
+    يتطلب صلاحية قراءة الجهاز (المستخدم root أو عضو في مجموعة input).
+    """
+    EVIOCSCLOCKID = 0x400445a0  # _IOW('E', 0xa0, int)
+    
+    def __init__(self, device_path):
+        self.device_path = device_path
+        self._fd = None
+        self._poll = None
+    
+    def open(self):
+        try:
+            self._fd = os.open(self.device_path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        except OSError as e:
+            print(f"خطأ في فتح {self.device_path}: {e}")
+            return False
+        try:
+            # أزمنة الأحداث من الساعة الرتيبة حتى لا تتأثر بتعديل ساعة النظام
+            import fcntl
+            fcntl.ioctl(self._fd, self.EVIOCSCLOCKID, struct.pack("i", time.CLOCK_MONOTONIC))
+        except (ImportError, OSError, AttributeError):
+            pass
+        self._poll = select.poll()
+        self._poll.register(self._fd, select.POLLIN)
+        return True
+    
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def read_into(self, view, timeout):
+        """قراءة ما يتوفر إلى view، ويعيد عدد البايتات (0 إذا لم يصل شيء) أو None إذا فُصل الجهاز"""
+        if not self._poll.poll(timeout * 1000):
+            return 0
+        try:
+            return os.readv(self._fd, [view])
+        except BlockingIOError:
+            return 0
+        except OSError:
+            return None  # ENODEV: فُصل الجهاز
+
+
+class ReplaySource:
+    """تشغيل ملف أحداث مسجل (بنية input_event الخام كما في /dev/input/eventN)
+
+    تُنتج هذه الملفات بخيار record_path في InputCaptureEngine، فيمكن اختبار التقاط
+    الحركة وتحليلها دون جهاز حقيقي.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+    
+    def open(self):
+        try:
+            self._file = open(self.path, 'rb', buffering=0)
+        except OSError as e:
+            print(f"خطأ في فتح ملف التسجيل {self.path}: {e}")
+            return False
+        return True
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def read_into(self, view, timeout):
+        return self._file.readinto(view) or None
+
+
+class InputCaptureEngine:
+    """تحويل أحداث evdev الخام إلى تقارير حركة في MotionRingBuffer
+
+    تُقرأ الأحداث دفعات إلى مصفوفة مسبقة التخصيص، ويُجمع كل تقرير (الأحداث حتى
+    SYN_REPORT) بعمليات NumPy على الدفعة كاملة دون إنشاء كائن Python لكل حدث.
+    الأحداث بعد آخر SYN_REPORT تُنقل إلى بداية المصفوفة لتكتمل في الدفعة التالية.
+    """
+    EV_SYN = 0x00
+    EV_KEY = 0x01
+    EV_REL = 0x02
+    SYN_REPORT = 0x00
+    SYN_DROPPED = 0x03
+    REL_X = 0x00
+    REL_Y = 0x01
+    BTN_LEFT = 0x110
+    BTN_TASK = 0x117
+    IGNORED = 0xffff  # نوع يُعلَّم به ما يجب تجاهله من أحداث
+    BATCH_EVENTS = 2048  # نحو ربع ثانية من الحركة عند 8000 Hz
+    READ_TIMEOUT = 0.1  # ثانية، حتى يستجيب خيط الالتقاط لـ stop()
+    
+    def __init__(self, source, buffer=None, record_path=None):
+        self.source = source
+        self.buffer = buffer if buffer is not None else MotionRingBuffer()
+        self.record_path = record_path
+        self.button_state = 0
+        self.dropped_reports = 0
+        self._events = np.zeros(self.BATCH_EVENTS, dtype=INPUT_EVENT)
+        self._bytes = self._events.view(np.uint8)
+        self._view = memoryview(self._bytes)
+        self._pending = 0  # بايتات أحداث لم يكتمل تقريرها بعد في بداية المصفوفة
+        self._discarding = False
+        self._record_file = None
+        self._running = False
+        self._thread = None
+    
+    def open(self):
+        if not self.source.open():
+            return False
+        if self.record_path:
+            try:
+                self._record_file = open(self.record_path, 'wb')
+            except OSError as e:
+                print(f"خطأ في إنشاء ملف التسجيل {self.record_path}: {e}")
+        return True
+    
+    def close(self):
+        self.source.close()
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
+    
+    def start(self):
+        """بدء الالتقاط في خيط منفصل، ويعيد False إذا تعذر فتح المصدر"""
+        if not self.open():
+            return False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="input-capture", daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.close()
+    
+    def replay(self):
+        """قراءة المصدر حتى نهايته في الخيط الحالي (لملفات التسجيل)، ويعيد عدد التقارير"""
+        if not self.open():
+            return 0
+        reports = 0
+        try:
+            while True:
+                added = self.capture_once()
+                if added is None:
+                    break
+                reports += added
+        finally:
+            self.close()
+        return reports
+    
+    def _run(self):
+        while self._running:
+            if self.capture_once() is None:
+                print(f"انتهى التقاط الحركة من {getattr(self.source, 'device_path', 'المصدر')}")
+                break
+        self._running = False
+    
+    def capture_once(self):
+        """قراءة دفعة واحدة ومعالجتها، ويعيد عدد التقارير المضافة أو None عند انتهاء المصدر"""
+        size = INPUT_EVENT.itemsize
+        if self._pending >= len(self._bytes) - size:
+            # تقرير لا ينتهي يملأ المصفوفة كلها: يُهمل
+            self._pending = 0
+            self.dropped_reports += 1
+        
+        read = self.source.read_into(self._view[self._pending:], self.READ_TIMEOUT)
+        if read is None:
+            return None
+        if self._record_file is not None and read:
+            self._record_file.write(self._view[self._pending:self._pending + read])
+        
+        available = self._pending + read
+        complete = available // size
+        total = self.buffer.total
+        consumed = self._process(self._events[:complete]) * size
+        
+        # نقل ما تبقى (أحداث تقرير ناقص وجزء حدث) إلى بداية المصفوفة
+        self._pending = available - consumed
+        if consumed and self._pending:
+            self._bytes[:self._pending] = self._bytes[consumed:available]
+        
+        return self.buffer.total - total
+    
+    def _process(self, events):
+        """تجميع التقارير المكتملة في events وإضافتها إلى الحلقة، ويعيد عدد الأحداث المستهلكة"""
+        types = events["type"]
+        codes = events["code"]
+        if self._discarding or np.any((codes == self.SYN_DROPPED) & (types == self.EV_SYN)):
+            self._discard_dropped(types, codes)
+        # إذا استمر التجاهل إلى نهاية الدفعة فكل ما بعد آخر تقرير مكتمل مُهمل، فلا يبقى معلقًا
+        discarded_tail = len(events) if self._discarding else 0
+        
+        ends = np.flatnonzero((types == self.EV_SYN) & (codes == self.SYN_REPORT))
+        if not ends.size:
+            return discarded_tail
+        consumed = int(ends[-1]) + 1
+        types = types[:consumed]
+        codes = codes[:consumed]
+        values = events["value"][:consumed]
+        
+        # رقم التقرير لكل حدث: عدد نهايات التقارير قبله
+        report_index = np.zeros(consumed, dtype=np.intp)
+        report_index[ends[:-1] + 1] = 1
+        np.cumsum(report_index, out=report_index)
+        
+        count = ends.size
+        relative = types == self.EV_REL
+        dx = np.bincount(report_index[relative & (codes == self.REL_X)],
+                         weights=values[relative & (codes == self.REL_X)], minlength=count)
+        dy = np.bincount(report_index[relative & (codes == self.REL_Y)],
+                         weights=values[relative & (codes == self.REL_Y)], minlength=count)
+        timestamps = events["sec"][ends].astype(np.int64) * 1000000 + events["usec"][ends]
+        
+        self.buffer.append(timestamps, dx, dy, self._button_states(types, codes, values, report_index, count))
+        instrumentation.count("capture.reports", count)
+        return max(consumed, discarded_tail)
+    
+    def _button_states(self, types, codes, values, report_index, count):
+        """حالة الأزرار (قناع بتات BTN_LEFT..BTN_TASK) بعد كل تقرير
+
+        أحداث الأزرار قليلة مقارنة بأحداث الحركة، فتُعالج بحلقة عليها وحدها.
+        """
+        buttons = np.empty(count, dtype=np.uint16)
+        state = self.button_state
+        position = 0
+        key_events = np.flatnonzero((types == self.EV_KEY) & (codes >= self.BTN_LEFT) & (codes <= self.BTN_TASK))
+        for index in key_events.tolist():
+            report = int(report_index[index])
+            buttons[position:report] = state
+            position = report
+            bit = 1 << (int(codes[index]) - self.BTN_LEFT)
+            state = state | bit if values[index] else state & ~bit
+        buttons[position:] = state
+        self.button_state = state
+        return buttons
+    
+    def _discard_dropped(self, types, codes):
+        """تجاهل الأحداث من SYN_DROPPED حتى SYN_REPORT التالي كما توصي وثائق evdev"""
+        position = 0
+        while True:
+            if not self._discarding:
+                found = np.flatnonzero((types[position:] == self.EV_SYN) & (codes[position:] == self.SYN_DROPPED))
+                if not found.size:
+                    return
+                position += int(found[0])
+                self._discarding = True
+                self.dropped_reports += 1
+            end = np.flatnonzero((types[position:] == self.EV_SYN) & (codes[position:] == self.SYN_REPORT))
+            if not end.size:
+                types[position:] = self.IGNORED
+                return
+            types[position:position + int(end[0]) + 1] = self.IGNORED
+            position += int(end[0]) + 1
+            self._discarding = False
+
+
+class PollingRateAnalyzer:
+    """قياس معدل التحديث الفعلي والتذبذب (jitter) من أزمنة تقارير الحركة الملتقطة
+
+    الماوس يرسل التقارير أثناء الحركة فقط، فالفجوات الأطول من IDLE_GAP تُعد توقفًا
+    وتُستبعد. الحسابات كلها على مصفوفات NumPy، فتحليل دقائق من الالتقاط عند 8000 Hz
+    يستغرق أجزاء من الثانية.
+    """
+    STANDARD_RATES = (125, 250, 500, 1000, 2000, 4000, 8000)
+    RATE_TOLERANCE = 0.15  # أقصى انحراف نسبي لاعتبار المعدل المقاس أحد المعدلات القياسية
+    IDLE_GAP = 50000  # ميكروثانية
+    LATE_FACTOR = 1.5  # تقرير متأخر إذا تجاوزت الفترة هذا المضاعف من الفترة الاسمية
+    WINDOW = 1000000  # نافذة قياس ثبات المعدل (ميكروثانية)
+    MIN_REPORTS = 200
+    MIN_WINDOW_REPORTS = 50
+    
+    def analyze(self, timestamps):
+        """تحليل أزمنة التقارير (ميكروثانية، مرتبة) ويعيد قاموس النتائج، أو None إذا كانت غير كافية"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if timestamps.size < self.MIN_REPORTS:
+            return None
+        
+        intervals = np.diff(timestamps)
+        active = (intervals > 0) & (intervals <= self.IDLE_GAP)
+        active_intervals = intervals[active]
+        if active_intervals.size < self.MIN_REPORTS:
+            return None
+        
+        measured_rate = 1e6 / float(np.median(active_intervals))
+        nominal_rate = self.nominal_rate(measured_rate)
+        nominal_interval = 1e6 / nominal_rate
+        
+        deviation = np.abs(active_intervals - nominal_interval)
+        p50, p95, p99 = np.percentile(deviation, (50, 95, 99))
+        
+        # التقارير المتأخرة، وعدد التقارير المفقودة المقدر من طول الفجوة
+        late = active_intervals[active_intervals > nominal_interval * self.LATE_FACTOR]
+        dropped = int(np.sum(np.rint(late / nominal_interval) - 1))
+        
+        # المعدل في كل نافذة زمنية من متوسط الفترات فيها
+        window_index = (timestamps[1:][active] - timestamps[0]) // self.WINDOW
+        window_counts = np.bincount(window_index)
+        window_totals = np.bincount(window_index, weights=active_intervals)
+        filled = window_counts >= self.MIN_WINDOW_REPORTS
+        window_rates = 1e6 * window_counts[filled] / window_totals[filled]
+        stability = 1.0 - float(np.std(window_rates) / np.mean(window_rates)) if window_rates.size else 0.0
+        
+        return {
+            "report_count": int(timestamps.size),
+            "active_time": float(active_intervals.sum()) / 1e6,
+            "measured_rate": measured_rate,
+            "nominal_rate": nominal_rate,
+            "jitter_p50_us": float(p50),
+            "jitter_p95_us": float(p95),
+            "jitter_p99_us": float(p99),
+            "jitter_max_us": float(deviation.max()),
+            "jitter_std_us": float(np.std(active_intervals)),
+            "late_reports": int(late.size),
+            "dropped_reports": dropped,
+            "window_rates": window_rates.tolist(),
+            "rate_stability": stability
+        }
+    
+    def nominal_rate(self, measured_rate):
+        """أقرب معدل قياسي إلى المعدل المقاس، أو المعدل المقاس مقربًا إذا لم يقترب من أي منها"""
+        nearest = min(self.STANDARD_RATES, key=lambda rate: abs(np.log(measured_rate / rate)))
+        if abs(measured_rate - nearest) <= nearest * self.RATE_TOLERANCE:
+            return nearest
+        return int(round(measured_rate))
+
+
+class DpiMeasurement:
+    """قياس DPI الفعلي للحساس من تمريرات بمسافة فيزيائية معروفة
+
+    يحرك المستخدم الماوس المسافة distance_mm عدة مرات مع توقف قصير بين كل تمريرة
+    وأخرى. تُقسم التقارير الملتقطة إلى تمريرات عند التوقفات، ويُحسب لكل تمريرة
+    الإزاحة الصافية بالعدّات، ثم تُستبعد التمريرات الشاذة ويُحسب المتوسط مع فترة ثقة 95%.
+    """
+    PAUSE = 200000  # توقف يفصل بين تمريرتين (ميكروثانية)
+    MIN_PASS_REPORTS = 20
+    MIN_PASSES = 3
+    OUTLIER_LIMIT = 3.0  # أقصى بُعد عن الوسيط بوحدات الانحراف المطلق الوسيط (MAD) المعاير
+    DPI_STEP = 50  # خطوة DPI في أغلب الحساسات
+    # قيم t لفترة ثقة 95% حسب درجات الحرية (تُستخدم أقرب قيمة أصغر للدرجات غير المدرجة)
+    T_95 = ((1, 12.706), (2, 4.303), (3, 3.182), (4, 2.776), (5, 2.571), (6, 2.447), (7, 2.365),
+            (8, 2.306), (9, 2.262), (10, 2.228), (11, 2.201), (12, 2.179), (13, 2.160), (14, 2.145),
+            (15, 2.131), (16, 2.120), (17, 2.110), (18, 2.101), (19, 2.093), (20, 2.086), (21, 2.080),
+            (22, 2.074), (23, 2.069), (24, 2.064), (25, 2.060), (26, 2.056), (27, 2.052), (28, 2.048),
+            (29, 2.045), (30, 2.042), (40, 2.021), (60, 2.000), (120, 1.980))
+    
+    def __init__(self, distance_mm):
+        self.distance_mm = distance_mm
+    
+    def split_passes(self, reports):
+        """الإزاحة الصافية (بالعدّات) لكل تمريرة في تقارير الالتقاط"""
+        if len(reports) == 0:
+            return np.empty(0)
+        timestamps = reports["timestamp"]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(timestamps) > self.PAUSE) + 1))
+        lengths = np.diff(np.append(starts, len(reports)))
+        dx = np.add.reduceat(reports["dx"].astype(np.int64), starts)
+        dy = np.add.reduceat(reports["dy"].astype(np.int64), starts)
+        return np.hypot(dx, dy)[lengths >= self.MIN_PASS_REPORTS]
+    
+    def measure(self, reports):
+        """قياس DPI من تقارير الالتقاط (مصفوفة MotionRingBuffer)، أو None إذا لم تكفِ التمريرات"""
+        pass_dpi = self.split_passes(reports) / (self.distance_mm / 25.4)
+        if pass_dpi.size < self.MIN_PASSES:
+            return None
+        
+        median = np.median(pass_dpi)
+        mad = 1.4826 * np.median(np.abs(pass_dpi - median))
+        if mad > 0:
+            kept = pass_dpi[np.abs(pass_dpi - median) <= self.OUTLIER_LIMIT * mad]
+        else:
+            kept = pass_dpi[pass_dpi == median]
+        if kept.size < self.MIN_PASSES:
+            return None
+        
+        dpi = float(kept.mean())
+        margin = self.t_value(kept.size - 1) * float(kept.std(ddof=1)) / kept.size ** 0.5
+        # أقرب خطوة DPI إذا وقعت ضمن فترة الثقة، وإلا القيمة المقاسة مقربة
+        nearest_step = int(round(dpi / self.DPI_STEP)) * self.DPI_STEP
+        nominal_dpi = nearest_step if abs(nearest_step - dpi) <= max(margin, 0.5) else int(round(dpi))
+        
+        return {
+            "dpi": dpi,
+            "nominal_dpi": nominal_dpi,
+            "ci_low": dpi - margin,
+            "ci_high": dpi + margin,
+            "confidence": 0.95,
+            "passes": int(kept.size),
+            "rejected_passes": int(pass_dpi.size - kept.size),
+            "pass_dpi": pass_dpi.tolist()
+        }
+    
+    @classmethod
+    def t_value(cls, degrees):
+        """قيمة t لأكبر درجات حرية مدرجة لا تزيد على degrees (فترة أوسع قليلًا لا أضيق)"""
+        value = cls.T_95[0][1]
+        for limit, limit_value in cls.T_95:
+            if limit > degrees:
+                break
+            value = limit_value
+        return value
+
+
+class HotplugSource(QObject):
+    """مصدر أحداث توصيل أجهزة الإدخال وإزالتها
+
+    تُجمع الأحداث المتتالية (جهاز واحد ينشئ عدة ملفات في /dev/input) في إشارة واحدة
+    بعد SETTLE_DELAY مللي ثانية من آخر حدث.
+    """
+    devices_changed = pyqtSignal()
+    SETTLE_DELAY = 300
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.timeout.connect(self.devices_changed.emit)
+    
+    def start(self):
+        """بدء المراقبة، ويعيد False إذا لم تكن متاحة على هذا النظام"""
+        raise NotImplementedError
+    
+    def stop(self):
+        """إيقاف المراقبة"""
+        self._settle_timer.stop()
+    
+    def notify(self):
+        """تسجيل حدث توصيل أو إزالة"""
+        self._settle_timer.start(self.SETTLE_DELAY)
+
+
+class InotifyHotplugSource(HotplugSource):
+    """مراقبة إنشاء وحذف ملفات الأجهزة في /dev/input عبر inotify"""
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len ثم الاسم
+    DEVICE_NAME = re.compile(r'^(event|mouse)\d+$')
+    
+    def __init__(self, path="/dev/input", parent=None):
+        super().__init__(parent)
+        self.path = path
+        self._fd = None
+        self._notifier = None
+    
+    def start(self):
+        if not sys.platform.startswith("linux") or not os.path.isdir(self.path):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+            mask = self.IN_CREATE | self.IN_DELETE | self.IN_MOVED_FROM | self.IN_MOVED_TO
+            if libc.inotify_add_watch(fd, os.fsencode(self.path), mask) < 0:
+                error = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(error, os.strerror(error))
+        except (OSError, AttributeError) as e:
+            print(f"خطأ في بدء مراقبة {self.path}: {e}")
+            return False
+        
+        self._fd = fd
+        self._notifier = QSocketNotifier(fd, QSocketNotifier.Read, self)
+        self._notifier.activated.connect(self._read_events)
+        return True
+    
+    def stop(self):
+        super().stop()
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def _read_events(self):
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 4096)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + self.EVENT_HEADER.size <= len(data):
+                _, _, _, name_length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + name_length].split(b"\0", 1)[0].decode(errors="replace")
+                offset += name_length
+                if self.DEVICE_NAME.match(name):
+                    changed = True
+        if changed:
+            self.notify()
+
+
+class UdevHotplugSource(HotplugSource):
+    """مراقبة أحداث النظام الفرعي input عبر udev netlink (تتطلب pyudev)"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._monitor = None
+        self._notifier = None
+    
+    def start(self):
+        if pyudev is None:
+            return False
+        try:
+            monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+            monitor.filter_by("input")
+            monitor.start()
+        except Exception as e:
+            print(f"خطأ في بدء مراقبة udev: {e}")
+            return False
+        
+        self._monitor = monitor
+        self._notifier = QSocketNotifier(monitor.fileno(), QSocketNotifier.Read, self)
+        self._notifier.activated.connect(self._read_events)
+        return True
+    
+    def stop(self):
+        super().stop()
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+        self._monitor = None
+    
+    def _read_events(self):
+        changed = False
+        device = self._monitor.poll(timeout=0)
+        while device is not None:
+            if device.action in ("add", "remove") and device.device_node:
+                changed = True
+            device = self._monitor.poll(timeout=0)
+        if changed:
+            self.notify()
+
+
+def start_hotplug_source(parent=None):
+    """بدء أفضل مصدر أحداث متاح على النظام الحالي، أو None للرجوع إلى التحديث الدوري"""
+    if not sys.platform.startswith("linux"):
+        return None
+    for source_class in (UdevHotplugSource, InotifyHotplugSource):
+        source = source_class(parent=parent)
+        if source.start():
+            return source
+        source.deleteLater()
+    return None
+
+
+class DeviceRefreshWorker(QObject):
+    """عامل يعمل في خيط منفصل وينفذ اكتشاف الأجهزة دون حجب واجهة المستخدم"""
+    refresh_finished = pyqtSignal()  # بعد انتهاء كل تحديث، بنجاح أو بخطأ
+    
+    def __init__(self, detector):
+        super().__init__()
+        self.detector = detector
+    
+    def refresh(self):
+        try:
+            self.detector.refresh_devices()
+        except Exception as e:
+            print(f"خطأ في تحديث الأجهزة: {e}")
+        finally:
+            self.refresh_finished.emit()
 
 
 class DeviceDetector(QObject):
@@ -68,104 +1077,267 @@ class DeviceDetector(QObject):
     device_found = pyqtSignal(MouseInfo)
     device_removed = pyqtSignal(str)  # معرف الجهاز
     device_changed = pyqtSignal(MouseInfo)
+    device_fields_changed = pyqtSignal(MouseInfo, list)  # الجهاز وأسماء الحقول التي تغيرت
+    _refresh_requested = pyqtSignal()  # داخلية: تُنفَّذ في خيط العامل
     
-    def __init__(self):
+    UPDATE_INTERVAL = 5000  # مللي ثانية بين كل تحديث دوري
+    PROBE_TIMEOUT = 3  # ثوانٍ قبل إيقاف أمر اكتشاف معلق
+    CARRIED_FIELDS = ("current_dpi", "current_polling_rate")  # قيم مقاسة أو مطبقة لا تأتي من الاكتشاف
+    REMOVED_DEVICES = 16  # عدد الأجهزة المُزالة التي تُحفظ قيمها لإعادة توصيلها
+    STOP_TIMEOUT = 1000  # مللي ثانية لانتظار التحديث الجاري عند الإيقاف
+    
+    def __init__(self, hotplug_source=None, input_root="/", database_path=None):
         super().__init__()
         self.os_type = platform.system()
-        self.devices = {}  # قاموس لتخزين الأجهزة المكتشفة
-        self.mouse_database = self._load_mouse_database()
+        self.input_probe = LinuxInputProbe(input_root)
+        self.devices = {}  # قاموس لتخزين الأجهزة المكتشفة (يُستبدل كاملًا عند كل تحديث)
+        self.mouse_database = self._load_mouse_database(database_path)
+        self.polling_analyzer = PollingRateAnalyzer()
+        
+        # الاكتشاف الدوري يتم في خيط منفصل، ولا يُبدأ تحديث جديد قبل انتهاء السابق.
+        # القفل يحمي حالة التحديث والأجهزة وذاكراتها، ولا يُحجز أثناء أوامر الاكتشاف نفسها
+        self._lock = threading.Lock()
+        self._refresh_in_progress = False
+        self._refresh_again = False
+        self._worker_thread = None
+        self._worker = None
+        self._stopping_workers = []  # خيوط أُوقفت وما زال تحديثها الأخير جاريًا
+        
+        # ذاكرة الأجهزة المكتشفة: معرف الجهاز -> (بصمة بياناته الخام, MouseInfo)
+        self._device_cache = {}
+        self._removed_devices = {}  # هوية الجهاز -> آخر MouseInfo له قبل إزالته
+        self._volatile_updates = {}  # معرف الجهاز -> الحقول المتغيرة التي تغيرت في آخر اكتشاف
+        
+        # مصدر أحداث التوصيل: مصدر مُمرَّر (مثل مصدر وهمي في الاختبارات) أو أفضل مصدر متاح على Linux
+        self.hotplug_source = hotplug_source
+        self._active_source = None
         
         # إعداد مؤقت للتحديث الدوري
         self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self.refresh_devices)
+        self.update_timer.timeout.connect(self.request_refresh)
     
-    def _load_mouse_database(self):
-        """تحميل قاعدة بيانات أجهزة الماوس المعروفة"""
-        # في الإصدار الحقيقي، يمكن تحميل هذه البيانات من ملف خارجي
-        # هنا نستخدم بيانات مباشرة للتبسيط
-        return {
-            "Logitech G Pro": {
-                "vendor": "Logitech",
-                "dpi_range": [100, 25600],
-                "polling_rates": [125, 250, 500, 1000],
-                "buttons": 8,
-                "supported_features": ["DPI adjustment", "RGB lighting", "Onboard memory"]
-            },
-            "Razer DeathAdder V2": {
-                "vendor": "Razer",
-                "dpi_range": [100, 20000],
-                "polling_rates": [125, 500, 1000],
-                "buttons": 8,
-                "supported_features": ["DPI adjustment", "RGB lighting", "Onboard memory"]
-            },
-            "SteelSeries Rival 3": {
-                "vendor": "SteelSeries",
-                "dpi_range": [100, 8500],
-                "polling_rates": [125, 250, 500, 1000],
-                "buttons": 6,
-                "supported_features": ["DPI adjustment", "RGB lighting"]
-            },
-            "Glorious Model O": {
-                "vendor": "Glorious",
-                "dpi_range": [400, 12000],
-                "polling_rates": [125, 250, 500, 1000],
-                "buttons": 6,
-                "supported_features": ["DPI adjustment", "RGB lighting", "Ultralight"]
-            },
-            "Zowie EC2": {
-                "vendor": "Zowie",
-                "dpi_range": [400, 3200],
-                "polling_rates": [125, 500, 1000],
-                "buttons": 5,
-                "supported_features": ["Plug and Play", "No Software Required"]
-            },
-            "Logitech G502": {
-                "vendor": "Logitech",
-                "dpi_range": [100, 25600],
-                "polling_rates": [125, 250, 500, 1000],
-                "buttons": 11,
-                "supported_features": ["DPI adjustment", "RGB lighting", "Adjustable weights"]
-            },
-        }
+    def _load_mouse_database(self, database_path=None):
+        """تحميل قاعدة بيانات أجهزة الماوس المعروفة من ملف خارجي"""
+        return MouseDatabase.load(database_path or MouseDatabase.DEFAULT_PATH)
+    
+    def _apply_known_info(self, mouse_info):
+        """إكمال معلومات الجهاز من قاعدة البيانات (بالمعرف USB أو بالاسم)"""
+        known_info = self.mouse_database.lookup(mouse_info.name, mouse_info.vendor_id, mouse_info.product_id)
+        if known_info is not None:
+            mouse_info.vendor = sys.intern(known_info["vendor"])
+            # نسخ القوائم حتى لا يغير تعديل جهاز نموذج قاعدة البيانات أو الأجهزة الأخرى من نفس النموذج
+            mouse_info.dpi_range = list(known_info["dpi_range"])
+            mouse_info.polling_rates = list(known_info["polling_rates"])
+            mouse_info.buttons = known_info["buttons"]
+            mouse_info.supported_features = list(known_info["supported_features"])
     
     def start_detection(self):
-        """بدء عملية اكتشاف الأجهزة"""
-        self.refresh_devices()
-        # بدء التحديث الدوري كل 5 ثوانٍ
-        self.update_timer.start(5000)
+        """بدء عملية اكتشاف الأجهزة في خيط منفصل"""
+        if self._worker_thread is None:
+            self._worker_thread = QThread()
+            self._worker_thread.setObjectName("DeviceDetection")
+            self._worker = DeviceRefreshWorker(self)
+            self._worker.moveToThread(self._worker_thread)
+            self._refresh_requested.connect(self._worker.refresh, Qt.QueuedConnection)
+            self._worker.refresh_finished.connect(self._finish_refresh, Qt.DirectConnection)
+            self._worker_thread.start()
+        
+        self.request_refresh()
+        
+        # التحديث عند توصيل جهاز أو إزالته فقط، والرجوع إلى التحديث الدوري كل 5 ثوانٍ إن لم يتوفر ذلك
+        if self._active_source is None:
+            self._active_source = self._start_hotplug_source()
+            if self._active_source is not None:
+                self._active_source.devices_changed.connect(self._on_hotplug)
+        if self._active_source is None:
+            self.update_timer.start(self.UPDATE_INTERVAL)
+    
+    def _start_hotplug_source(self):
+        if self.hotplug_source is not None:
+            return self.hotplug_source if self.hotplug_source.start() else None
+        if self.os_type != "Linux":
+            return None
+        return start_hotplug_source(self)
+    
+    def _on_hotplug(self):
+        instrumentation.count("devices.hotplug_events")
+        self.request_refresh(follow_up=True)
     
     def stop_detection(self):
-        """إيقاف عملية اكتشاف الأجهزة"""
+        """إيقاف عملية اكتشاف الأجهزة
+
+        يُنتظر التحديث الجاري STOP_TIMEOUT على الأكثر. إذا كان عالقًا في أمر اكتشاف
+        يُترك خيطه لينتهي وحده (خلال PROBE_TIMEOUT) دون حجب واجهة المستخدم.
+        """
         self.update_timer.stop()
+        if self._active_source is not None:
+            self._active_source.devices_changed.disconnect(self._on_hotplug)
+            self._active_source.stop()
+            self._active_source = None
+        if self._worker_thread is None:
+            return
+        self._refresh_requested.disconnect(self._worker.refresh)
+        self._worker.refresh_finished.disconnect(self._finish_refresh)
+        self._worker_thread.quit()
+        if not self._worker_thread.wait(self.STOP_TIMEOUT):
+            print("خطأ: لم ينتهِ تحديث الأجهزة الجاري عند الإيقاف")
+            self._stopping_workers.append((self._worker_thread, self._worker))
+            self._worker_thread.finished.connect(self._release_stopped_workers)
+        self._worker_thread = None
+        self._worker = None
+        with self._lock:
+            self._refresh_in_progress = False
+            self._refresh_again = False
     
+    def request_refresh(self, follow_up=False):
+        """طلب تحديث في خيط العامل
+
+        يُتجاهل الطلب إذا كان تحديث سابق لم ينتهِ بعد، إلا إذا كان follow_up صحيحًا
+        (حدث توصيل قد لا يظهر في التحديث الجاري) فيُجدول تحديث واحد بعده.
+        """
+        if self._worker_thread is None:
+            return False
+        with self._lock:
+            if self._refresh_in_progress:
+                if follow_up:
+                    self._refresh_again = True
+                else:
+                    instrumentation.count("devices.refresh_dropped")
+                return False
+            self._refresh_in_progress = True
+        self._refresh_requested.emit()
+        return True
+    
+    def _release_stopped_workers(self):
+        self._stopping_workers = [(thread, worker) for thread, worker in self._stopping_workers
+                                  if not thread.isFinished()]
+    
+    def _finish_refresh(self):
+        """تُستدعى في خيط العامل بعد كل تحديث: تنهي التحديث الجاري أو تبدأ التحديث المؤجل"""
+        with self._lock:
+            if self._refresh_again:
+                self._refresh_again = False
+                again = True
+            else:
+                self._refresh_in_progress = False
+                again = False
+        if again:
+            self._refresh_requested.emit()
+    
+    @instrumentation.timed("devices.refresh_devices")
     def refresh_devices(self):
-        """تحديث قائمة الأجهزة المتصلة"""
-        current_devices = self._detect_connected_devices()
-        current_ids = set(current_devices.keys())
-        existing_ids = set(self.devices.keys())
-        
-        # الأجهزة الجديدة
-        for device_id in current_ids - existing_ids:
-            self.devices[device_id] = current_devices[device_id]
-            self.device_found.emit(current_devices[device_id])
-        
-        # الأجهزة التي تم إزالتها
-        for device_id in existing_ids - current_ids:
-            del self.devices[device_id]
-            self.device_removed.emit(device_id)
+        """تحديث قائمة الأجهزة المتصلة
+
+        يمكن استدعاؤها من أي خيط: المقارنة مع الأجهزة الحالية تتم في الخيط المستدعي،
+        والإشارات المرسلة من خيط العامل تصل إلى واجهة المستخدم عبر حلقة أحداثها.
+        """
+        try:
+            current_devices = self._detect_connected_devices()
+        except subprocess.TimeoutExpired as e:
+            # الإبقاء على الأجهزة الحالية بدلًا من اعتبارها أُزيلت
+            print(f"خطأ: انتهت مهلة أمر اكتشاف الأجهزة: {e}")
+            instrumentation.count("devices.probe_timeouts")
+            return
         
-        # الأجهزة التي تم تحديثها
-        for device_id in current_ids & existing_ids:
-            if self._device_changed(self.devices[device_id], current_devices[device_id]):
-                self.devices[device_id] = current_devices[device_id]
-                self.device_changed.emit(current_devices[device_id])
+        found, removed, changed = [], [], []
+        
+        with self._lock:
+            volatile_updates, self._volatile_updates = self._volatile_updates, {}
+            existing_devices = self.devices
+            
+            for device_id, mouse_info in current_devices.items():
+                old_device = existing_devices.get(device_id)
+                if old_device is None:
+                    # الأجهزة الجديدة
+                    found.append(mouse_info)
+                elif old_device is mouse_info:
+                    # جهاز أُعيد استخدامه من الذاكرة: يتغير فقط إذا تغيرت حقوله المتغيرة
+                    if device_id in volatile_updates:
+                        changed.append((mouse_info, volatile_updates[device_id]))
+                else:
+                    # الأجهزة التي تم تحديثها (تغيرت بياناتها الخام)
+                    fields = old_device.diff(mouse_info)
+                    if fields:
+                        changed.append((mouse_info, fields))
+            
+            # الأجهزة التي تم إزالتها
+            for device_id in existing_devices:
+                if device_id not in current_devices:
+                    removed.append(device_id)
+            
+            self.devices = current_devices
+        
+        for mouse_info in found:
+            instrumentation.count("devices.found")
+            self.device_found.emit(mouse_info)
+        for device_id in removed:
+            instrumentation.count("devices.removed")
+            self.device_removed.emit(device_id)
+        for mouse_info, fields in changed:
+            instrumentation.count("devices.changed")
+            self.device_changed.emit(mouse_info)
+            self.device_fields_changed.emit(mouse_info, fields)
+    
+    def _cached_device(self, device_id, fingerprint):
+        """الجهاز المحفوظ إذا لم تتغير بصمة بياناته الخام، وإلا None"""
+        with self._lock:
+            cached = self._device_cache.get(device_id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        return None
+    
+    @staticmethod
+    def _device_identity(mouse_info):
+        """هوية الجهاز المادي، وهي لا تتغير بتغير المنفذ أو البرنامج الثابت"""
+        return (mouse_info.name, mouse_info.vendor_id, mouse_info.product_id)
+    
+    def _cache_device(self, device_id, fingerprint, mouse_info):
+        """حفظ جهاز أُنشئ من جديد مع نقل قيمه الحالية من نسخته السابقة
+
+        تتغير البصمة مع تحديث البرنامج الثابت أو إعادة التوصيل بمنفذ آخر، فيُنشأ الجهاز بالقيم
+        الافتراضية. تُنقل إليه CARRIED_FIELDS من الجهاز المحفوظ بالهوية نفسها (بالمعرف نفسه
+        أولًا ثم بأي معرف)، أو من آخر جهاز أُزيل بهذه الهوية.
+        """
+        identity = self._device_identity(mouse_info)
+        with self._lock:
+            cached = self._device_cache.get(device_id)
+            if cached is not None and self._device_identity(cached[1]) == identity:
+                previous = cached[1]
+            else:
+                previous = next((cached_info for _, cached_info in self._device_cache.values()
+                                 if self._device_identity(cached_info) == identity), None)
+            removed = self._removed_devices.pop(identity, None)
+            if previous is None:
+                previous = removed
+            if previous is not None:
+                for field in self.CARRIED_FIELDS:
+                    setattr(mouse_info, field, getattr(previous, field))
+            self._device_cache[device_id] = (fingerprint, mouse_info)
+    
+    def _refresh_volatile_fields(self, mouse_info):
+        """إعادة قراءة الحقول المتغيرة للجهاز (مستوى البطارية حاليًا)
+
+        القيم الحالية لـ DPI ومعدل التحديث تبقى كما هي في الجهاز المحفوظ، فلا تضيع
+        الإعدادات المطبقة عليه. يعيد قائمة بأسماء الحقول التي تغيرت.
+        """
+        if self.os_type != "Linux" or not mouse_info.is_wireless:
+            return []
+        battery_level = self.input_probe.read_battery(mouse_info.name)
+        if battery_level is None or battery_level == mouse_info.battery_level:
+            return []
+        mouse_info.battery_level = battery_level
+        return ["battery_level"]
     
-    def _device_changed(self, old_device, new_device):
-        """التحقق مما إذا كانت معلومات الجهاز قد تغيرت"""
-        # هنا يمكن التحقق من التغييرات المهمة فقط، مثل مستوى البطارية أو معدل التحديث الحالي
-        return (old_device.current_dpi != new_device.current_dpi or
-                old_device.current_polling_rate != new_device.current_polling_rate or
-                old_device.battery_level != new_device.battery_level)
+    def _default_devices(self):
+        """جهاز افتراضي عند عدم العثور على أي جهاز"""
+        mouse_info = self._cached_device("default_mouse", "default")
+        if mouse_info is None:
+            mouse_info = MouseInfo()
+            mouse_info.device_id = "default_mouse"
+            mouse_info.name = "ماوس افتراضي"
+            mouse_info.connection_type = "سلكي"
+            self._cache_device("default_mouse", "default", mouse_info)
+        return {"default_mouse": mouse_info}
     
     def _detect_connected_devices(self):
         """اكتشاف أجهزة الماوس المتصلة بناءً على نظام التشغيل"""
@@ -178,8 +1350,22 @@ class DeviceDetector(QObject):
         elif self.os_type == "Darwin":  # macOS
             detected_devices = self._detect_mac_devices()
         
+        # نسيان الأجهزة التي لم تعد متصلة مع حفظ آخر نسخة منها حتى يُعاد توصيلها
+        with self._lock:
+            if self._device_cache.keys() != detected_devices.keys():
+                for device_id, (_, mouse_info) in self._device_cache.items():
+                    if device_id not in detected_devices:
+                        identity = self._device_identity(mouse_info)
+                        self._removed_devices.pop(identity, None)
+                        self._removed_devices[identity] = mouse_info
+                while len(self._removed_devices) > self.REMOVED_DEVICES:
+                    del self._removed_devices[next(iter(self._removed_devices))]
+                self._device_cache = {device_id: self._device_cache[device_id]
+                                      for device_id in detected_devices if device_id in self._device_cache}
+        
         return detected_devices
     
+    @instrumentation.timed("devices.detect_windows_devices")
     def _detect_windows_devices(self):
         """اكتشاف أجهزة الماوس على نظام Windows"""
         detected_devices = {}
@@ -187,7 +1373,8 @@ class DeviceDetector(QObject):
         try:
             # استخدام PowerShell للحصول على قائمة الأجهزة
             cmd = "powershell \"Get-PnpDevice -Class Mouse -PresentOnly | Select-Object InstanceId, FriendlyName | ConvertTo-Json\""
-            result = subprocess.run(cmd, capture_output=True, text=True, shell=True)
+            result = subprocess.run(cmd, capture_output=True, text=True, shell=True,
+                                    timeout=self.PROBE_TIMEOUT)
             
             if result.returncode == 0 and result.stdout.strip():
                 devices_data = json.loads(result.stdout)
@@ -197,126 +1384,137 @@ class DeviceDetector(QObject):
                     devices_data = [devices_data]
                 
                 for device in devices_data:
-                    mouse_info = MouseInfo()
-                    
                     device_id = device.get("InstanceId", "")
                     friendly_name = device.get("FriendlyName", "غير معروف")
                     
-                    mouse_info.device_id = device_id
-                    mouse_info.name = friendly_name
-                    
-                    # محاولة مطابقة الاسم مع قاعدة البيانات
-                    for known_name, known_info in self.mouse_database.items():
-                        if known_name.lower() in friendly_name.lower():
-                            mouse_info.vendor = known_info["vendor"]
-                            mouse_info.dpi_range = known_info["dpi_range"]
-                            mouse_info.polling_rates = known_info["polling_rates"]
-                            mouse_info.buttons = known_info["buttons"]
-                            mouse_info.supported_features = known_info["supported_features"]
-                            break
-                    
-                    # إعداد بعض القيم الافتراضية إذا لم يتم العثور على معلومات
-                    if not mouse_info.dpi_range:
-                        mouse_info.dpi_range = [400, 1600]
-                    if not mouse_info.polling_rates:
-                        mouse_info.polling_rates = [125, 500, 1000]
-                    
-                    # إعداد القيم الحالية
-                    mouse_info.current_dpi = mouse_info.dpi_range[1] // 2  # قيمة افتراضية
-                    mouse_info.current_polling_rate = 1000  # قيمة افتراضية
-                    
-                    # التحقق من نوع الاتصال
-                    if "wireless" in friendly_name.lower() or "bluetooth" in friendly_name.lower():
-                        mouse_info.is_wireless = True
-                        mouse_info.connection_type = "لاسلكي"
-                        mouse_info.battery_level = 75  # قيمة افتراضية للعرض
-                    else:
-                        mouse_info.connection_type = "سلكي"
+                    # إعادة استخدام الجهاز إذا لم تتغير بياناته
+                    mouse_info = self._cached_device(device_id, friendly_name)
+                    if mouse_info is None:
+                        mouse_info = MouseInfo()
+                        mouse_info.device_id = device_id
+                        mouse_info.name = friendly_name
+                        
+                        # محاولة مطابقة الجهاز مع قاعدة البيانات
+                        self._apply_known_info(mouse_info)
+                        
+                        # إعداد بعض القيم الافتراضية إذا لم يتم العثور على معلومات
+                        if not mouse_info.dpi_range:
+                            mouse_info.dpi_range = [400, 1600]
+                        if not mouse_info.polling_rates:
+                            mouse_info.polling_rates = [125, 500, 1000]
+                        
+                        # التحقق من نوع الاتصال
+                        if "wireless" in friendly_name.lower() or "bluetooth" in friendly_name.lower():
+                            mouse_info.is_wireless = True
+                            mouse_info.connection_type = "لاسلكي"
+                            mouse_info.battery_level = 75  # قيمة افتراضية للعرض
+                        else:
+                            mouse_info.connection_type = "سلكي"
+                        
+                        self._cache_device(device_id, friendly_name, mouse_info)
                     
                     detected_devices[device_id] = mouse_info
         
+        except subprocess.TimeoutExpired:
+            raise
         except Exception as e:
             print(f"خطأ في اكتشاف أجهزة Windows: {e}")
         
         # اكتشاف افتراضي إذا لم يتم العثور على أي أجهزة
         if not detected_devices:
-            mouse_info = MouseInfo()
-            mouse_info.device_id = "default_mouse"
-            mouse_info.name = "ماوس افتراضي"
-            mouse_info.connection_type = "سلكي"
-            mouse_info.current_dpi = 800
-            mouse_info.current_polling_rate = 1000
-            detected_devices["default_mouse"] = mouse_info
+            detected_devices = self._default_devices()
         
         return detected_devices
     
+    @instrumentation.timed("devices.detect_linux_devices")
     def _detect_linux_devices(self):
         """اكتشاف أجهزة الماوس على نظام Linux"""
         detected_devices = {}
         
         try:
-            # استخدام xinput للحصول على قائمة الأجهزة
-            result = subprocess.run(["xinput", "list"], capture_output=True, text=True)
+            # القراءة المباشرة من procfs/sysfs، والرجوع إلى xinput فقط إذا لم تكن متاحة
+            input_devices = self.input_probe.enumerate_mice()
+            if input_devices is None:
+                input_devices = self._list_xinput_devices()
             
-            if result.returncode == 0:
-                lines = result.stdout.splitlines()
+            for input_device in input_devices:
+                device_id = input_device["device_id"]
+                name = input_device["name"]
+                fingerprint = input_device.get("fingerprint", name)
+                
+                # إعادة استخدام الجهاز إذا لم تتغير بياناته الخام، مع إعادة قراءة حقوله المتغيرة فقط
+                mouse_info = self._cached_device(device_id, fingerprint)
+                if mouse_info is None:
+                    mouse_info = MouseInfo()
+                    mouse_info.device_id = device_id
+                    mouse_info.name = name
+                    mouse_info.vendor_id = input_device.get("vendor_id", "")
+                    mouse_info.product_id = input_device.get("product_id", "")
+                    mouse_info.bus_type = input_device.get("bus_type", "")
+                    mouse_info.capabilities = input_device.get("capabilities", [])
+                    mouse_info.device_path = input_device.get("device_path", "")
+                    
+                    # محاولة مطابقة الجهاز مع قاعدة البيانات
+                    self._apply_known_info(mouse_info)
+                    
+                    # إعداد بعض القيم الافتراضية
+                    if not mouse_info.dpi_range:
+                        mouse_info.dpi_range = [400, 1600]
+                    if not mouse_info.polling_rates:
+                        mouse_info.polling_rates = [125, 500, 1000]
+                    if not mouse_info.buttons:
+                        mouse_info.buttons = input_device.get("buttons", 0)
+                    
+                    # التحقق من نوع الاتصال
+                    if (mouse_info.bus_type == "bluetooth" or
+                            "wireless" in name.lower() or "bluetooth" in name.lower()):
+                        mouse_info.is_wireless = True
+                        mouse_info.connection_type = "لاسلكي"
+                        mouse_info.battery_level = 80  # قيمة افتراضية
+                    else:
+                        mouse_info.connection_type = "سلكي"
+                    
+                    self._cache_device(device_id, fingerprint, mouse_info)
+                    self._refresh_volatile_fields(mouse_info)
+                else:
+                    fields = self._refresh_volatile_fields(mouse_info)
+                    if fields:
+                        with self._lock:
+                            self._volatile_updates[device_id] = fields
                 
-                for line in lines:
-                    if "pointer" in line and "mouse" in line.lower():
-                        match = re.search(r'id=(\d+)', line)
-                        if match:
-                            device_id = match.group(1)
-                            name_match = re.search(r'↳ (.*?)\s+id=', line)
-                            name = name_match.group(1) if name_match else "ماوس Linux"
-                            
-                            mouse_info = MouseInfo()
-                            mouse_info.device_id = device_id
-                            mouse_info.name = name
-                            
-                            # محاولة مطابقة الاسم مع قاعدة البيانات
-                            for known_name, known_info in self.mouse_database.items():
-                                if known_name.lower() in name.lower():
-                                    mouse_info.vendor = known_info["vendor"]
-                                    mouse_info.dpi_range = known_info["dpi_range"]
-                                    mouse_info.polling_rates = known_info["polling_rates"]
-                                    mouse_info.buttons = known_info["buttons"]
-                                    mouse_info.supported_features = known_info["supported_features"]
-                                    break
-                            
-                            # إعداد بعض القيم الافتراضية
-                            if not mouse_info.dpi_range:
-                                mouse_info.dpi_range = [400, 1600]
-                            if not mouse_info.polling_rates:
-                                mouse_info.polling_rates = [125, 500, 1000]
-                            
-                            mouse_info.current_dpi = mouse_info.dpi_range[1] // 2
-                            mouse_info.current_polling_rate = 1000
-                            
-                            # التحقق من نوع الاتصال
-                            if "wireless" in name.lower() or "bluetooth" in name.lower():
-                                mouse_info.is_wireless = True
-                                mouse_info.connection_type = "لاسلكي"
-                                mouse_info.battery_level = 80  # قيمة افتراضية
-                            else:
-                                mouse_info.connection_type = "سلكي"
-                            
-                            detected_devices[device_id] = mouse_info
+                detected_devices[device_id] = mouse_info
         
+        except subprocess.TimeoutExpired:
+            raise
         except Exception as e:
             print(f"خطأ في اكتشاف أجهزة Linux: {e}")
         
         # اكتشاف افتراضي إذا لم يتم العثور على أي أجهزة
         if not detected_devices:
-            mouse_info = MouseInfo()
-            mouse_info.device_id = "default_mouse"
-            mouse_info.name = "ماوس افتراضي"
-            mouse_info.connection_type = "سلكي"
-            mouse_info.current_dpi = 800
-            mouse_info.current_polling_rate = 1000
-            detected_devices["default_mouse"] = mouse_info
+            detected_devices = self._default_devices()
         
         return detected_devices
     
+    def _list_xinput_devices(self):
+        """قائمة أجهزة الماوس من مخرجات xinput list (تتطلب خادم X)"""
+        input_devices = []
+        result = subprocess.run(["xinput", "list"], capture_output=True, text=True,
+                                timeout=self.PROBE_TIMEOUT)
+        
+        if result.returncode == 0:
+            for line in result.stdout.splitlines():
+                if "pointer" in line and "mouse" in line.lower():
+                    match = re.search(r'id=(\d+)', line)
+                    if match:
+                        name_match = re.search(r'↳ (.*?)\s+id=', line)
+                        input_devices.append({
+                            "device_id": match.group(1),
+                            "name": name_match.group(1) if name_match else "ماوس Linux"
+                        })
+        
+        return input_devices
+    
+    @instrumentation.timed("devices.detect_mac_devices")
     def _detect_mac_devices(self):
         """اكتشاف أجهزة الماوس على نظام macOS"""
         detected_devices = {}
@@ -324,7 +1522,8 @@ class DeviceDetector(QObject):
         try:
             # استخدام ioreg للحصول على قائمة الأجهزة
             cmd = "ioreg -p IOUSB -l | grep -i mouse -A10"
-            result = subprocess.run(cmd, capture_output=True, text=True, shell=True)
+            result = subprocess.run(cmd, capture_output=True, text=True, shell=True,
+                                    timeout=self.PROBE_TIMEOUT)
             
             if result.returncode == 0:
                 output = result.stdout
@@ -333,54 +1532,45 @@ class DeviceDetector(QObject):
                 mouse_sections = re.finditer(r'({.*?"USB Product Name" = "(.*?)".*?})', output, re.DOTALL)
                 
                 for i, section in enumerate(mouse_sections):
-                    mouse_info = MouseInfo()
                     name = section.group(2)
                     device_id = f"mac_mouse_{i}"
                     
-                    mouse_info.device_id = device_id
-                    mouse_info.name = name
-                    
-                    # محاولة مطابقة الاسم مع قاعدة البيانات
-                    for known_name, known_info in self.mouse_database.items():
-                        if known_name.lower() in name.lower():
-                            mouse_info.vendor = known_info["vendor"]
-                            mouse_info.dpi_range = known_info["dpi_range"]
-                            mouse_info.polling_rates = known_info["polling_rates"]
-                            mouse_info.buttons = known_info["buttons"]
-                            mouse_info.supported_features = known_info["supported_features"]
-                            break
-                    
-                    # إعداد بعض القيم الافتراضية
-                    if not mouse_info.dpi_range:
-                        mouse_info.dpi_range = [400, 1600]
-                    if not mouse_info.polling_rates:
-                        mouse_info.polling_rates = [125, 500, 1000]
-                    
-                    mouse_info.current_dpi = mouse_info.dpi_range[1] // 2
-                    mouse_info.current_polling_rate = 1000
-                    
-                    # التحقق من نوع الاتصال
-                    if "wireless" in name.lower() or "bluetooth" in name.lower():
-                        mouse_info.is_wireless = True
-                        mouse_info.connection_type = "لاسلكي"
-                        mouse_info.battery_level = 70  # قيمة افتراضية
-                    else:
-                        mouse_info.connection_type = "سلكي"
+                    # إعادة استخدام الجهاز إذا لم تتغير بياناته
+                    mouse_info = self._cached_device(device_id, section.group(1))
+                    if mouse_info is None:
+                        mouse_info = MouseInfo()
+                        mouse_info.device_id = device_id
+                        mouse_info.name = name
+                        
+                        # محاولة مطابقة الجهاز مع قاعدة البيانات
+                        self._apply_known_info(mouse_info)
+                        
+                        # إعداد بعض القيم الافتراضية
+                        if not mouse_info.dpi_range:
+                            mouse_info.dpi_range = [400, 1600]
+                        if not mouse_info.polling_rates:
+                            mouse_info.polling_rates = [125, 500, 1000]
+                        
+                        # التحقق من نوع الاتصال
+                        if "wireless" in name.lower() or "bluetooth" in name.lower():
+                            mouse_info.is_wireless = True
+                            mouse_info.connection_type = "لاسلكي"
+                            mouse_info.battery_level = 70  # قيمة افتراضية
+                        else:
+                            mouse_info.connection_type = "سلكي"
+                        
+                        self._cache_device(device_id, section.group(1), mouse_info)
                     
                     detected_devices[device_id] = mouse_info
         
+        except subprocess.TimeoutExpired:
+            raise
         except Exception as e:
             print(f"خطأ في اكتشاف أجهزة macOS: {e}")
         
         # اكتشاف افتراضي إذا لم يتم العثور على أي أجهزة
         if not detected_devices:
-            mouse_info = MouseInfo()
-            mouse_info.device_id = "default_mouse"
-            mouse_info.name = "ماوس افتراضي"
-            mouse_info.connection_type = "سلكي"
-            mouse_info.current_dpi = 800
-            mouse_info.current_polling_rate = 1000
-            detected_devices["default_mouse"] = mouse_info
+            detected_devices = self._default_devices()
         
         return detected_devices
     
@@ -401,23 +1591,76 @@ class DeviceDetector(QObject):
         # لكن هنا نقوم فقط بتحديث القيم المخزنة محليًا لأغراض العرض
         
         mouse_info = self.devices[device_id]
+        fields = []
         
         if "dpi" in settings:
             dpi = settings["dpi"]
             # التحقق من أن القيمة ضمن النطاق المدعوم
             if mouse_info.dpi_range and dpi >= mouse_info.dpi_range[0] and dpi <= mouse_info.dpi_range[1]:
+                if mouse_info.current_dpi != dpi:
+                    fields.append("current_dpi")
                 mouse_info.current_dpi = dpi
         
         if "polling_rate" in settings:
             polling_rate = settings["polling_rate"]
             # التحقق من أن القيمة مدعومة
             if polling_rate in mouse_info.polling_rates:
+                if mouse_info.current_polling_rate != polling_rate:
+                    fields.append("current_polling_rate")
                 mouse_info.current_polling_rate = polling_rate
         
         # إرسال إشارة بتغيير الجهاز
         self.device_changed.emit(mouse_info)
+        if fields:
+            self.device_fields_changed.emit(mouse_info, fields)
         
         return True
+    
+    def update_polling_rate(self, device_id, timestamps):
+        """قياس معدل التحديث من أزمنة تقارير ملتقطة وتحديث current_polling_rate للجهاز
+
+        يعيد قاموس نتائج PollingRateAnalyzer، أو None إذا لم تكفِ التقارير للقياس.
+        """
+        analysis = self.polling_analyzer.analyze(timestamps)
+        if analysis is None:
+            return None
+        
+        with self._lock:
+            mouse_info = self.devices.get(device_id)
+            if mouse_info is None or mouse_info.current_polling_rate == analysis["nominal_rate"]:
+                return analysis
+            mouse_info.current_polling_rate = analysis["nominal_rate"]
+        
+        self.device_changed.emit(mouse_info)
+        self.device_fields_changed.emit(mouse_info, ["current_polling_rate"])
+        return analysis
+    
+    def update_dpi(self, device_id, reports, distance_mm):
+        """قياس DPI الفعلي من تمريرات ملتقطة بمسافة distance_mm وتحديث current_dpi للجهاز
+
+        reports تقارير الالتقاط منذ بدء القياس (مثلًا من MotionRingBuffer.since).
+        يعيد قاموس نتائج DpiMeasurement، أو None إذا لم تكفِ التمريرات.
+        """
+        measurement = DpiMeasurement(distance_mm).measure(reports)
+        if measurement is None:
+            return None
+        
+        with self._lock:
+            mouse_info = self.devices.get(device_id)
+            if mouse_info is None or mouse_info.current_dpi == measurement["nominal_dpi"]:
+                return measurement
+            mouse_info.current_dpi = measurement["nominal_dpi"]
+        
+        self.device_changed.emit(mouse_info)
+        self.device_fields_changed.emit(mouse_info, ["current_dpi"])
+        return measurement
+    
+    def create_capture(self, device_id, record_path=None):
+        """محرك التقاط حركة خام لجهاز محدد (على Linux فقط)، أو None إذا لم يكن له ملف evdev"""
+        mouse_info = self.devices.get(device_id)
+        if mouse_info is None or not mouse_info.device_path.startswith("/dev/input/event"):
+            return None
+        return InputCaptureEngine(EvdevCaptureSource(mouse_info.device_path), record_path=record_path)
 
 
 class DeviceMonitorWidget(QWidget):
@@ -1,59 +1,1904 @@
 import os
+import re
+import sys
 import json
 import time
+import mmap
+import atexit
+import shutil
+import struct
+import sqlite3
+import argparse
+import urllib.request
+import threading
+import hashlib
 import datetime
+import heapq
+import functools
+import collections
+import multiprocessing
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                           QComboBox, QPushButton, QTabWidget, QGroupBox)
-from PyQt5.QtCore import Qt, QTimer
+
+# جذر المشروع (حيث instrumentation.py المشترك مع وحدة الأجهزة) في مسار الاستيراد
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), *[os.pardir] * 5))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# قياس زمن العمليات اختياري، ولا يكلف شيئًا تقريبًا عند تعطيله
+from instrumentation import instrumentation
+
+# الواجهة الرسومية اختيارية: التحليل من سطر الأوامر يعمل دون Qt و matplotlib
+try:
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    from matplotlib.figure import Figure
+    from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
+                               QComboBox, QPushButton, QTabWidget, QGroupBox)
+    from PyQt5.QtCore import Qt, QObject, pyqtSignal
+    QT_AVAILABLE = True
+except ImportError:
+    QT_AVAILABLE = False
+    # فئات أساسية بديلة حتى يمكن استيراد الوحدة، أما فئات الواجهة نفسها فلا تعمل دون Qt
+    FigureCanvas = QWidget = QObject = object
+    def pyqtSignal(*types):
+        return None
+
+
+def atomic_write_json(path, data):
+    """كتابة ملف JSON بشكل ذري: ملف مؤقت ثم fsync ثم إعادة تسمية"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+    # مزامنة المجلد حتى تبقى إعادة التسمية بعد انقطاع الكهرباء (غير متاح على Windows)
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class PerformanceStorage:
+    """الواجهة الأساسية لوحدات تخزين بيانات الأداء"""
+    def exists(self):
+        """التحقق من وجود سجلات معايرة محفوظة مسبقًا"""
+        raise NotImplementedError
+
+    def history_imported(self):
+        """التحقق من اكتمال ترحيل ملف JSON القديم إلى وحدة التخزين"""
+        raise NotImplementedError
+
+    def load(self):
+        """تحميل الحالة المجمعة
+
+        تُرجع (الحالة, السجلات المضافة بعد آخر نقطة حفظ ولم تدخل في الإحصائيات اليومية)
+        """
+        raise NotImplementedError
+
+    def columns_dir(self):
+        """مجلد المخزن العمودي المرتبط بالذاكرة الخاص بوحدة التخزين"""
+        raise NotImplementedError
+
+    def count(self):
+        """عدد سجلات المعايرة المحفوظة"""
+        raise NotImplementedError
+
+    def load_metrics(self, history_store, start=0):
+        """تعبئة المخزن العمودي بالقيم الرقمية للسجلات ابتداءً من الموضع start"""
+        raise NotImplementedError
+
+    def get_records(self, limit=10):
+        """آخر limit سجل معايرة كامل بترتيب زمني"""
+        raise NotImplementedError
+
+    def get_records_range(self, start, stop):
+        """سجلات المعايرة الكاملة بين موضعين (بالترتيب الزمني)"""
+        raise NotImplementedError
+
+    def append(self, record, day, daily):
+        """حفظ سجل معايرة جديد مع إحصائيات يومه المحدثة"""
+        self.append_many([(record, day, daily)])
+
+    def append_many(self, entries):
+        """حفظ مجموعة من السجلات دفعة واحدة، كل مدخل (السجل, اليوم, إحصائيات اليوم)"""
+        raise NotImplementedError
+
+    def needs_checkpoint(self):
+        """التحقق مما إذا حان وقت حفظ الحالة المجمعة"""
+        raise NotImplementedError
+
+    def write_checkpoint(self, daily_stats, usage_patterns, recommendations, record_count=None):
+        """حفظ الحالة المجمعة (الإحصائيات اليومية والأنماط والتوصيات)
+
+        record_count: عدد السجلات المشمولة في daily_stats عند أخذ اللقطة
+        """
+        raise NotImplementedError
+
+    def import_history(self, performance_history):
+        """ترحيل بيانات ملف JSON القديم"""
+        raise NotImplementedError
+
+    def close(self):
+        """إغلاق وحدة التخزين"""
+        pass
+
+
+class CalibrationLog(PerformanceStorage):
+    """سجل معايرة مقسم إلى أجزاء يُضاف إليه فقط (سجل JSON واحد في كل سطر)
+
+    عند التحميل يُقرأ الجزء النشط فقط، أما الأجزاء المغلقة فتُعرف أعداد سجلاتها من
+    ملف الفهرس وتُقرأ عند الطلب.
+    """
+    SEGMENT_SIZE = 5000  # الحد الأقصى لعدد السجلات في كل جزء
+    CHECKPOINT_INTERVAL = 20  # عدد الإضافات بين كل نقطة حفظ للحالة المجمعة
+    CACHED_SEGMENTS = 2  # عدد الأجزاء المغلقة المحفوظة في الذاكرة بعد قراءتها
+    SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})\.jsonl$')
+    IMPORT_DIR = "import"  # مجلد تجهيز الترحيل قبل اكتماله
+    READY_IMPORT_DIR = "import.ready"  # ترحيل اكتمل تجهيزه ولم تُنقل ملفاته بعد
+    IMPORT_MARKER = "imported.json"  # علامة اكتمال الترحيل، تُنقل مع ملفاته
+
+    def __init__(self, log_dir, read_only=False):
+        self.log_dir = log_dir
+        self.read_only = read_only
+        self.checkpoint_file = os.path.join(log_dir, "checkpoint.json")
+        self.index_file = os.path.join(log_dir, "index.json")
+
+        if not read_only:
+            if not os.path.exists(self.log_dir):
+                os.makedirs(self.log_dir)
+            self._recover_import()
+
+        # يحمي بنية الأجزاء من القراءة أثناء الكتابة في خيط الخلفية
+        self.lock = threading.RLock()
+        self.record_count = 0
+        self.appends_since_checkpoint = 0
+        self._sealed_segments = []  # [(رقم الجزء, عدد سجلاته)] للأجزاء المغلقة
+        self._sealed_count = 0
+        self._tail_records = []  # سجلات الجزء النشط
+        self._segment_cache = collections.OrderedDict()
+        self._segment_index = 0
+        self._segment_file = None
+
+    def columns_dir(self):
+        return os.path.join(self.log_dir, "columns")
+
+    def _segment_path(self, index):
+        """مسار ملف الجزء ذي الرقم المحدد"""
+        return os.path.join(self.log_dir, f"segment-{index:06d}.jsonl")
+
+    def _segment_indexes(self):
+        """أرقام أجزاء السجل الموجودة مرتبة تصاعديًا"""
+        indexes = []
+        for name in os.listdir(self.log_dir):
+            match = self.SEGMENT_PATTERN.match(name)
+            if match:
+                indexes.append(int(match.group(1)))
+        return sorted(indexes)
+
+    def exists(self):
+        """التحقق من وجود سجل محفوظ مسبقًا"""
+        return bool(self._segment_indexes())
+
+    def history_imported(self):
+        return os.path.exists(os.path.join(self.log_dir, self.IMPORT_MARKER))
+
+    def _read_segment(self, index):
+        """قراءة سجلات جزء واحد مع تجاهل السطر الأخير إذا كان مقطوعًا"""
+        records = []
+        with open(self._segment_path(index), 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # سطر غير مكتمل بسبب انقطاع أثناء الكتابة
+                    print(f"تم تجاهل سجل تالف في {self._segment_path(index)}")
+        return records
+
+    def _sealed_segment_records(self, index):
+        """سجلات جزء مغلق مع الاحتفاظ بآخر الأجزاء المقروءة"""
+        records = self._segment_cache.get(index)
+        if records is None:
+            records = self._read_segment(index)
+            self._segment_cache[index] = records
+            if len(self._segment_cache) > self.CACHED_SEGMENTS:
+                self._segment_cache.popitem(last=False)
+        else:
+            self._segment_cache.move_to_end(index)
+        return records
+
+    def _save_index(self):
+        atomic_write_json(self.index_file, {
+            "segments": {str(index): count for index, count in self._sealed_segments}
+        })
+
+    def load(self):
+        """تحميل نقطة الحفظ والجزء النشط فقط"""
+        state = {}
+        if os.path.exists(self.checkpoint_file):
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+
+        known_counts = {}
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                known_counts = json.load(f).get("segments", {})
+
+        with self.lock:
+            indexes = self._segment_indexes()
+            self._sealed_segments = []
+            index_outdated = False
+            for index in indexes[:-1]:
+                count = known_counts.get(str(index))
+                if count is None:
+                    # جزء غير مفهرس (من إصدار سابق): يُعد مرة واحدة ثم يُحفظ عدده
+                    count = len(self._read_segment(index))
+                    index_outdated = True
+                self._sealed_segments.append((index, count))
+            if index_outdated and not self.read_only:
+                self._save_index()
+
+            self._sealed_count = sum(count for _, count in self._sealed_segments)
+            self._segment_cache.clear()
+            if indexes:
+                self._segment_index = indexes[-1]
+                self._tail_records = self._read_segment(indexes[-1])
+
+            self.record_count = self._sealed_count + len(self._tail_records)
+            checkpointed = min(state.get("record_count", 0), self.record_count)
+            self.appends_since_checkpoint = self.record_count - checkpointed
+
+            return state, self.get_records_range(checkpointed, self.record_count)
+
+    def count(self):
+        return self.record_count
+
+    def get_records_range(self, start, stop):
+        with self.lock:
+            start = max(start, 0)
+            stop = min(stop, self.record_count)
+            records = []
+            offset = 0
+            for index, count in self._sealed_segments:
+                if offset >= stop:
+                    break
+                if offset + count > start:
+                    segment_records = self._sealed_segment_records(index)
+                    records.extend(segment_records[max(start - offset, 0):stop - offset])
+                offset += count
+            if stop > self._sealed_count:
+                records.extend(self._tail_records[max(start - self._sealed_count, 0):stop - self._sealed_count])
+            return records
+
+    def load_metrics(self, history_store, start=0):
+        # القراءة على دفعات بحجم جزء حتى لا تُحمَّل كل السجلات في الذاكرة معًا
+        for chunk_start in range(start, self.record_count, self.SEGMENT_SIZE):
+            history_store.extend(self.get_records_range(chunk_start, chunk_start + self.SEGMENT_SIZE))
+
+    def get_records(self, limit=10):
+        return self.get_records_range(self.record_count - limit, self.record_count)
+
+    def append(self, record, day=None, daily=None):
+        """إضافة سجل واحد إلى نهاية الجزء النشط بتكلفة ثابتة"""
+        self.append_many([(record, day, daily)])
+
+    def append_many(self, entries):
+        """إلحاق مجموعة سجلات ثم مزامنة الجزء النشط مع القرص مرة واحدة"""
+        with self.lock:
+            for record, _, _ in entries:
+                if self._segment_file is None or len(self._tail_records) >= self.SEGMENT_SIZE:
+                    self._sync_segment()
+                    self._open_segment()
+
+                self._segment_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+                self._tail_records.append(record)
+                self.record_count += 1
+                self.appends_since_checkpoint += 1
+
+            self._sync_segment()
+
+    def _sync_segment(self):
+        if self._segment_file is not None:
+            self._segment_file.flush()
+            os.fsync(self._segment_file.fileno())
+
+    def _open_segment(self):
+        """فتح الجزء النشط أو بدء جزء جديد عند امتلائه"""
+        if self._segment_file is not None:
+            self._segment_file.close()
+
+        if len(self._tail_records) >= self.SEGMENT_SIZE or self._segment_index == 0:
+            if self._segment_index:
+                # إغلاق الجزء الممتلئ وتسجيل عدد سجلاته في الفهرس
+                self._sealed_segments.append((self._segment_index, len(self._tail_records)))
+                self._sealed_count += len(self._tail_records)
+                self._tail_records = []
+                self._save_index()
+            self._segment_index += 1
+
+        path = self._segment_path(self._segment_index)
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+
+        self._segment_file = open(path, 'a', encoding='utf-8')
+        if needs_newline:
+            # إنهاء السطر المقطوع حتى لا يندمج مع السجل التالي
+            self._segment_file.write("\n")
+
+    def needs_checkpoint(self):
+        return self.appends_since_checkpoint >= self.CHECKPOINT_INTERVAL
+
+    def write_checkpoint(self, daily_stats, usage_patterns, recommendations, record_count=None):
+        if record_count is None:
+            record_count = self.record_count
+        state = {
+            "version": 1,
+            "record_count": record_count,
+            "daily_stats": daily_stats,
+            "usage_patterns": usage_patterns,
+            "recommendations": recommendations
+        }
+        atomic_write_json(self.checkpoint_file, state)
+        self.appends_since_checkpoint = self.record_count - record_count
+
+    def import_history(self, performance_history):
+        """ترحيل بيانات ملف JSON القديم إلى سجل فارغ دفعة واحدة
+
+        تُكتب الأجزاء ونقطة الحفظ أولاً في مجلد تجهيز، ثم يُعاد تسميته إلى import.ready
+        (لحظة الالتزام) وتُنقل ملفاته إلى السجل. إذا انقطع الترحيل قبل الالتزام لا يظهر
+        منه شيء فيُعاد في التشغيل التالي، وإذا انقطع بعده يُكمل النقل عند فتح السجل.
+        """
+        if self.exists():
+            raise ValueError("لا يمكن الترحيل إلى سجل يحتوي على بيانات")
+
+        staging_dir = os.path.join(self.log_dir, self.IMPORT_DIR)
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+        staging = CalibrationLog(staging_dir)
+        try:
+            staging.append_many([(record, None, None) for record in performance_history.get("calibration_history", [])])
+            staging.write_checkpoint(performance_history.get("daily_stats", {}),
+                                     performance_history.get("usage_patterns", {}),
+                                     performance_history.get("recommendations", []))
+        finally:
+            staging.close()
+        atomic_write_json(os.path.join(staging_dir, self.IMPORT_MARKER), {"record_count": staging.record_count})
+
+        ready_dir = os.path.join(self.log_dir, self.READY_IMPORT_DIR)
+        os.replace(staging_dir, ready_dir)
+        self._publish_import(ready_dir)
+
+    def _publish_import(self, ready_dir):
+        """نقل ملفات ترحيل مكتمل إلى السجل (يمكن تكراره بأمان بعد انقطاع)"""
+        for name in os.listdir(ready_dir):
+            os.replace(os.path.join(ready_dir, name), os.path.join(self.log_dir, name))
+        os.rmdir(ready_dir)
+
+    def _recover_import(self):
+        """إكمال ترحيل التزم قبل انقطاع التطبيق، وحذف ترحيل لم يلتزم"""
+        ready_dir = os.path.join(self.log_dir, self.READY_IMPORT_DIR)
+        if os.path.isdir(ready_dir):
+            self._publish_import(ready_dir)
+        staging_dir = os.path.join(self.log_dir, self.IMPORT_DIR)
+        if os.path.isdir(staging_dir):
+            shutil.rmtree(staging_dir)
+
+    def close(self):
+        """إغلاق الجزء النشط"""
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+
+
+class SQLiteStorage(PerformanceStorage):
+    """تخزين بيانات الأداء في قاعدة SQLite مفهرسة حسب الوقت واليوم"""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER PRIMARY KEY,
+            digest TEXT NOT NULL UNIQUE,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS calibrations (
+            id INTEGER PRIMARY KEY,
+            timestamp REAL NOT NULL,
+            day TEXT NOT NULL,
+            date TEXT NOT NULL,
+            accuracy_score REAL NOT NULL,
+            speed_score REAL NOT NULL,
+            tracking_score REAL NOT NULL,
+            overall_score REAL NOT NULL,
+            response_time REAL NOT NULL,
+            settings_id INTEGER REFERENCES settings(id),
+            recommended_settings_id INTEGER REFERENCES settings(id),
+            trajectory TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_calibrations_timestamp ON calibrations(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_calibrations_day ON calibrations(day);
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT PRIMARY KEY,
+            calibrations INTEGER NOT NULL,
+            stats TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+    METRIC_COLUMNS = ("accuracy_score", "speed_score", "tracking_score", "overall_score", "response_time")
+
+    def __init__(self, db_file, read_only=False):
+        self.db_file = db_file
+        # الاتصال مشترك بين واجهة المستخدم وكاتب الخلفية، ويحميه القفل
+        self.lock = threading.RLock()
+        self._settings_ids = {}  # ذاكرة مؤقتة: بصمة الإعدادات -> المعرف
+        if read_only:
+            # للقراءة فقط دون إنشاء الجداول أو ترقيتها (كقواعد بيانات مجمعة من أجهزة أخرى).
+            # القاعدة المغلقة بلا ملف WAL تُفتح ثابتة حتى لا يُنشئ SQLite ملفي -wal و -shm بجانبها
+            mode = "mode=ro" if os.path.exists(db_file + "-wal") else "immutable=1"
+            uri = "file:" + urllib.request.pathname2url(os.path.abspath(db_file)) + "?" + mode
+            self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return
+        self.connection = sqlite3.connect(db_file, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+        # قواعد من إصدارات سابقة لا تحتوي على عمود مسار الحركة
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(calibrations)")}
+        if "trajectory" not in columns:
+            self.connection.execute("ALTER TABLE calibrations ADD COLUMN trajectory TEXT")
+
+    def exists(self):
+        with self.lock:
+            row = self.connection.execute("SELECT EXISTS(SELECT 1 FROM calibrations)").fetchone()
+        return bool(row[0])
+
+    def history_imported(self):
+        with self.lock:
+            row = self.connection.execute("SELECT EXISTS(SELECT 1 FROM state WHERE key = 'history_imported')").fetchone()
+        return bool(row[0])
+
+    def _settings_id(self, settings):
+        """حفظ الإعدادات مرة واحدة والإشارة إليها بالمعرف"""
+        if settings is None:
+            return None
+        data = json.dumps(settings, ensure_ascii=False, sort_keys=True)
+        digest = hashlib.sha1(data.encode('utf-8')).hexdigest()
+        settings_id = self._settings_ids.get(digest)
+        if settings_id is None:
+            self.connection.execute("INSERT OR IGNORE INTO settings (digest, data) VALUES (?, ?)", (digest, data))
+            settings_id = self.connection.execute(
+                "SELECT id FROM settings WHERE digest = ?", (digest,)).fetchone()[0]
+            self._settings_ids[digest] = settings_id
+        return settings_id
+
+    def load(self):
+        state = {
+            "daily_stats": {},
+        }
+        with self.lock:
+            for key, value in self.connection.execute("SELECT key, value FROM state").fetchall():
+                state[key] = json.loads(value)
+            for day, stats in self.connection.execute("SELECT day, stats FROM daily_stats").fetchall():
+                state["daily_stats"][day] = json.loads(stats)
+        # الإحصائيات اليومية تُحدَّث مع كل سجل، فلا توجد سجلات معلقة
+        return state, []
+
+    def columns_dir(self):
+        return os.path.splitext(self.db_file)[0] + "_columns"
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM calibrations").fetchone()[0]
+
+    def load_metrics(self, history_store, start=0):
+        # قراءة الأعمدة الرقمية فقط دون الإعدادات، بترتيب الإضافة مثل المخزن العمودي
+        # (الإزاحة start هي عدد السجلات المحمّلة فيه مسبقًا)
+        with self.lock:
+            rows = self.connection.execute(
+                f"""SELECT timestamp, {', '.join(self.METRIC_COLUMNS)} FROM calibrations
+                    ORDER BY id LIMIT -1 OFFSET ?""", (start,)).fetchall()
+        if rows:
+            values = np.array(rows, dtype=np.float64)
+            history_store.extend_columns(values[:, 0], dict(zip(self.METRIC_COLUMNS, values[:, 1:].T)))
+
+    def _select_records(self, order, limit, offset=0):
+        with self.lock:
+            return self.connection.execute(
+                f"""SELECT c.timestamp, c.date, {', '.join('c.' + name for name in self.METRIC_COLUMNS)},
+                           s.data, r.data, c.trajectory
+                    FROM calibrations c
+                    LEFT JOIN settings s ON s.id = c.settings_id
+                    LEFT JOIN settings r ON r.id = c.recommended_settings_id
+                    ORDER BY c.id {order} LIMIT ? OFFSET ?""", (limit, offset)).fetchall()
+
+    def get_records(self, limit=10):
+        return self._rows_to_records(reversed(self._select_records("DESC", limit)))
+
+    def get_records_range(self, start, stop):
+        start = max(start, 0)
+        if stop <= start:
+            return []
+        return self._rows_to_records(self._select_records("ASC", stop - start, start))
+
+    def _rows_to_records(self, rows):
+        records = []
+        for row in rows:
+            record = dict(zip(("timestamp", "date") + self.METRIC_COLUMNS, row[:7]))
+            record["settings"] = json.loads(row[7]) if row[7] is not None else None
+            record["recommended_settings"] = json.loads(row[8]) if row[8] is not None else None
+            if row[9] is not None:
+                record["trajectory"] = row[9]
+            records.append(record)
+        return records
+
+    def _insert_record(self, record):
+        day = datetime.datetime.fromtimestamp(record["timestamp"]).strftime('%Y-%m-%d')
+        self.connection.execute(
+            f"""INSERT INTO calibrations (timestamp, day, date, {', '.join(self.METRIC_COLUMNS)},
+                                          settings_id, recommended_settings_id, trajectory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (record["timestamp"], day, record["date"]) +
+            tuple(record[name] for name in self.METRIC_COLUMNS) +
+            (self._settings_id(record.get("settings")), self._settings_id(record.get("recommended_settings")),
+             record.get("trajectory")))
+
+    def _write_daily(self, day, daily):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO daily_stats (day, calibrations, stats) VALUES (?, ?, ?)",
+            (day, daily["calibrations"], json.dumps(daily)))
+
+    def append_many(self, entries):
+        latest_daily = {}
+        with self.lock, self.connection:
+            for record, day, daily in entries:
+                self._insert_record(record)
+                latest_daily[day] = daily
+            # يكفي حفظ آخر حالة لكل يوم في الدفعة
+            for day, daily in latest_daily.items():
+                self._write_daily(day, daily)
+
+    def needs_checkpoint(self):
+        # الأنماط والتوصيات صغيرة الحجم وتُحفظ بعد كل معايرة
+        return True
+
+    def _write_state(self, usage_patterns, recommendations):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            [("usage_patterns", json.dumps(usage_patterns, ensure_ascii=False)),
+             ("recommendations", json.dumps(recommendations, ensure_ascii=False))])
+
+    def write_checkpoint(self, daily_stats, usage_patterns, recommendations, record_count=None):
+        with self.lock, self.connection:
+            self._write_state(usage_patterns, recommendations)
+
+    def import_history(self, performance_history):
+        # معاملة واحدة: إذا فشل الترحيل في منتصفه لا يُحفظ منه شيء فيُعاد في التشغيل التالي
+        with self.lock, self.connection:
+            for record in performance_history.get("calibration_history", []):
+                self._insert_record(record)
+            for day, daily in performance_history.get("daily_stats", {}).items():
+                self._write_daily(day, daily)
+            self._write_state(performance_history.get("usage_patterns", {}),
+                              performance_history.get("recommendations", []))
+            self.connection.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('history_imported', 'true')")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class BackgroundWriter:
+    """كاتب في الخلفية يحفظ بيانات الأداء دون حجب واجهة المستخدم
+
+    تُكتب السجلات بالترتيب الذي أُضيفت به، أما نقاط الحفظ فتُدمج فيُكتب آخرها فقط.
+    """
+    COALESCE_DELAY = 0.2  # ثوانٍ لانتظار عمليات حفظ إضافية قبل الكتابة
+
+    def __init__(self, storage, history_store=None):
+        self.storage = storage
+        self.history_store = history_store
+        self._condition = threading.Condition()
+        self._pending_entries = []
+        self._pending_checkpoint = None
+        self._writing_entries = []
+        self._busy = False
+        self._flush_waiters = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="PerformanceWriter", daemon=True)
+        self._thread.start()
+
+    def append(self, record, day, daily):
+        """جدولة حفظ سجل معايرة (يجب ألا يُعدَّل السجل بعد ذلك)"""
+        with self._condition:
+            self._pending_entries.append((record, day, daily))
+            self._condition.notify()
+
+    def append_many(self, entries):
+        """جدولة حفظ مجموعة من السجلات، كل مدخل (السجل, اليوم, إحصائيات اليوم)"""
+        with self._condition:
+            self._pending_entries.extend(entries)
+            self._condition.notify()
+
+    def checkpoint(self, snapshot):
+        """جدولة نقطة حفظ من لقطة ثابتة للحالة، وتحل محل أي نقطة حفظ لم تُكتب بعد"""
+        with self._condition:
+            self._pending_checkpoint = snapshot
+            self._condition.notify()
+
+    def _has_work(self):
+        return bool(self._pending_entries) or self._pending_checkpoint is not None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._has_work() and not self._closed:
+                    self._condition.wait()
+                if not self._has_work() and self._closed:
+                    return
+                # انتظار قصير لدمج دفعة من عمليات الحفظ المتتالية
+                deadline = time.monotonic() + self.COALESCE_DELAY
+                while not self._closed and not self._flush_waiters:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                entries, self._pending_entries = self._pending_entries, []
+                snapshot, self._pending_checkpoint = self._pending_checkpoint, None
+                self._writing_entries = entries
+                self._busy = True
+
+            try:
+                if entries:
+                    with instrumentation.span("analytics.write_records"):
+                        self.storage.append_many(entries)
+                    instrumentation.count("analytics.records_written", len(entries))
+                if snapshot is not None:
+                    with instrumentation.span("analytics.write_checkpoint"):
+                        self.storage.write_checkpoint(**snapshot)
+                        if self.history_store is not None:
+                            self.history_store.flush(snapshot["record_count"])
+            except Exception as e:
+                print(f"خطأ في حفظ بيانات الأداء: {e}")
+            finally:
+                with self._condition:
+                    self._writing_entries = []
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def unwritten_records(self):
+        """السجلات التي لم تكتمل كتابتها بعد (قيد الكتابة ثم المنتظرة) بترتيب إضافتها"""
+        with self._condition:
+            return [record for record, _, _ in self._writing_entries + self._pending_entries]
+
+    def flush(self):
+        """الانتظار حتى تُكتب جميع العمليات المجدولة"""
+        with self._condition:
+            self._flush_waiters += 1
+            self._condition.notify_all()
+            try:
+                while self._has_work() or self._busy:
+                    self._condition.wait()
+            finally:
+                self._flush_waiters -= 1
+
+    def close(self):
+        """كتابة ما تبقى ثم إيقاف الخيط"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+
+# وحدات التخزين المتاحة حسب الاسم
+LOG_DIR_NAME = "calibration_log"
+SQLITE_FILE_NAME = "performance_data.sqlite3"
+STORAGE_BACKENDS = {
+    "log": lambda data_dir, read_only=False: CalibrationLog(os.path.join(data_dir, LOG_DIR_NAME), read_only),
+    "sqlite": lambda data_dir, read_only=False: SQLiteStorage(os.path.join(data_dir, SQLITE_FILE_NAME), read_only)
+}
+
+
+class CalibrationHistoryStore:
+    """مخزن عمودي للقيم الرقمية في تاريخ المعايرة (مصفوفات NumPy متجاورة)
+
+    السجلات بترتيب إضافتها، فيطابق موضع كل سجل موضعه في وحدة التخزين. أما ما يخص
+    "آخر النتائج" (latest و chronological_positions و dates) فيتبع الطابع الزمني،
+    إذ قد تُستورد نتائج أقدم من الموجودة.
+    """
+    FLOAT_COLUMNS = ("accuracy_score", "speed_score", "tracking_score", "overall_score", "response_time")
+    INT_COLUMNS = ("timestamp", "day")  # الطابع الزمني بالثواني ورقم اليوم المحلي (ordinal)
+    INITIAL_CAPACITY = 256
+    EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+    def __init__(self, mmap_dir=None, capacity=INITIAL_CAPACITY):
+        self.mmap_dir = mmap_dir
+        self.size = 0
+        self.capacity = 0
+        self._columns = {}
+        # هل الطوابع الزمنية غير متناقصة بترتيب الإضافة (الحالة المعتادة)
+        self.ordered = True
+        self._chronological_order = None
+        # يمنع مزامنة الأعمدة مع القرص (من كاتب الخلفية) أثناء إعادة حجزها
+        self._lock = threading.Lock()
+
+        if self.mmap_dir and not os.path.exists(self.mmap_dir):
+            os.makedirs(self.mmap_dir)
+
+        self._allocate(max(capacity, 1))
+
+        # استعادة عدد السجلات المحفوظة في الملفات المرتبطة بالذاكرة
+        if self.mmap_dir and os.path.exists(self._meta_path()):
+            try:
+                with open(self._meta_path(), 'r', encoding='utf-8') as f:
+                    self.size = min(json.load(f).get("size", 0), self.capacity)
+            except Exception as e:
+                print(f"خطأ في تحميل المخزن العمودي: {e}")
+            self.ordered = bool(np.all(np.diff(self._columns["timestamp"][:self.size]) >= 0))
+
+    def _meta_path(self):
+        return os.path.join(self.mmap_dir, "meta.json")
+
+    def _column_dtype(self, name):
+        return np.int64 if name in self.INT_COLUMNS else np.float64
+
+    def _column_path(self, name):
+        return os.path.join(self.mmap_dir, f"{name}.bin")
+
+    def _allocate(self, capacity):
+        """حجز أعمدة بالسعة المطلوبة مع نسخ البيانات الحالية"""
+        with self._lock:
+            self._allocate_columns(capacity)
+
+    def _allocate_columns(self, capacity):
+        if self.mmap_dir:
+            # عدم تقليص ملفات موجودة مسبقًا على القرص
+            for name in self.FLOAT_COLUMNS + self.INT_COLUMNS:
+                path = self._column_path(name)
+                if os.path.exists(path):
+                    capacity = max(capacity, os.path.getsize(path) // np.dtype(self._column_dtype(name)).itemsize)
+
+        for name in self.FLOAT_COLUMNS + self.INT_COLUMNS:
+            dtype = self._column_dtype(name)
+            old = self._columns.get(name)
+
+            if self.mmap_dir:
+                if old is not None:
+                    old.flush()
+                    del old
+                    self._columns.pop(name)
+                path = self._column_path(name)
+                # توسيع الملف ثم إعادة ربطه بالذاكرة
+                with open(path, 'ab') as f:
+                    f.truncate(capacity * np.dtype(dtype).itemsize)
+                column = np.memmap(path, dtype=dtype, mode='r+', shape=(capacity,))
+            else:
+                column = np.empty(capacity, dtype=dtype)
+                if old is not None:
+                    column[:self.size] = old[:self.size]
+
+            self._columns[name] = column
+
+        self.capacity = capacity
+
+    def _reserve(self, count):
+        """ضمان وجود مساحة لعدد إضافي من السجلات (مضاعفة السعة عند الحاجة)"""
+        needed = self.size + count
+        if needed > self.capacity:
+            self._allocate(max(self.capacity * 2, needed))
+
+    def append(self, record):
+        """إضافة سجل معايرة واحد"""
+        self._reserve(1)
+        index = self.size
+        timestamp = int(record["timestamp"])
+        if index and timestamp < self._columns["timestamp"][index - 1]:
+            self.ordered = False
+        for name in self.FLOAT_COLUMNS:
+            self._columns[name][index] = record[name]
+        self._columns["timestamp"][index] = timestamp
+        self._columns["day"][index] = datetime.date.fromtimestamp(record["timestamp"]).toordinal()
+        self.size += 1
+
+    def extend(self, records):
+        """إضافة مجموعة من السجلات دفعة واحدة"""
+        count = len(records)
+        if not count:
+            return
+        timestamps = np.fromiter((r["timestamp"] for r in records), dtype=np.float64, count=count)
+        self.extend_columns(timestamps, {
+            name: np.fromiter((r[name] for r in records), dtype=np.float64, count=count)
+            for name in self.FLOAT_COLUMNS
+        })
+
+    def extend_columns(self, timestamps, columns):
+        """إضافة مجموعة من السجلات من مصفوفات جاهزة لكل عمود"""
+        count = len(timestamps)
+        if not count:
+            return
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        timestamps = np.asarray(timestamps).astype(np.int64)
+        if np.any(np.diff(timestamps) < 0) or (start and timestamps[0] < self._columns["timestamp"][start - 1]):
+            self.ordered = False
+        for name in self.FLOAT_COLUMNS:
+            self._columns[name][start:end] = columns[name]
+        self._columns["timestamp"][start:end] = timestamps
+        self._columns["day"][start:end] = np.fromiter(
+            (datetime.date.fromtimestamp(t).toordinal() for t in timestamps), dtype=np.int64, count=count)
+        self.size = end
+
+    def clear(self):
+        """تفريغ المخزن مع الإبقاء على السعة المحجوزة"""
+        self.size = 0
+        self.ordered = True
+        self._chronological_order = None
+
+    def column(self, name, limit=None):
+        """عرض للقراءة فقط (بدون نسخ) لعمود كامل أو لآخر limit قيمة"""
+        start = 0 if limit is None else max(self.size - limit, 0)
+        view = self._columns[name][start:self.size]
+        view.flags.writeable = False
+        return view
+
+    def chronological_positions(self, limit=None):
+        """مواضع آخر limit سجل حسب الطابع الزمني، مرتبة من الأقدم إلى الأحدث"""
+        start = 0 if limit is None else max(self.size - limit, 0)
+        if self.ordered:
+            return np.arange(start, self.size)
+        if self._chronological_order is None or len(self._chronological_order) != self.size:
+            self._chronological_order = np.argsort(self._columns["timestamp"][:self.size], kind='stable')
+        return self._chronological_order[start:]
+
+    def latest(self, name, limit=None):
+        """قيم آخر limit سجل حسب الطابع الزمني (عرض بدون نسخ ما دام التاريخ مرتبًا زمنيًا)"""
+        if self.ordered:
+            return self.column(name, limit)
+        values = self._columns[name][self.chronological_positions(limit)]
+        values.flags.writeable = False
+        return values
+
+    def dates(self, limit=None):
+        """تواريخ آخر limit سجل حسب الطابع الزمني كمصفوفة datetime64[D]"""
+        return (self.latest("day", limit) - self.EPOCH_ORDINAL).astype('datetime64[D]')
+
+    def flush(self, size=None):
+        """كتابة الأعمدة المرتبطة بالذاكرة إلى القرص ثم تسجيل عدد السجلات المكتملة فيها"""
+        if not self.mmap_dir:
+            return
+        with self._lock:
+            for column in self._columns.values():
+                column.flush()
+        atomic_write_json(self._meta_path(), {"size": self.size if size is None else size})
+
+    def __len__(self):
+        return self.size
+
+
+# تقرير حركة واحد في مسار الماوس: الزمن بالميكروثانية والإزاحة وحالة الأزرار
+TRAJECTORY_DTYPE = np.dtype([("timestamp", "i8"), ("dx", "i4"), ("dy", "i4"), ("buttons", "u2")])
+
+
+def encode_varints(values):
+    """ترميز أعداد صحيحة غير سالبة بصيغة varint (سبعة بتات في كل بايت) دون حلقة على القيم"""
+    values = np.asarray(values).astype(np.uint64)
+    if not values.size:
+        return np.empty(0, dtype=np.uint8)
+    lengths = np.ones(values.size, dtype=np.intp)
+    for bits in range(7, 64, 7):
+        lengths += values >= np.uint64(1 << bits)
+    starts = np.cumsum(lengths) - lengths
+    output = np.empty(int(starts[-1] + lengths[-1]), dtype=np.uint8)
+    # كتابة البايت k من كل القيم التي طولها أكبر من k، مع بت الاستمرار لغير الأخير
+    for k in range(int(lengths.max())):
+        mask = lengths > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7f)
+        byte |= (lengths[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        output[starts[mask] + k] = byte
+    return output
+
+
+def decode_varints(data, count):
+    """فك ترميز count قيمة varint من مصفوفة بايتات إلى uint64"""
+    if not count:
+        return np.empty(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80)[:count]
+    if ends.size < count:
+        raise ValueError("بيانات varint ناقصة")
+    used = int(ends[-1]) + 1
+    if used == count:
+        # كل القيم ببايت واحد (الحالة الشائعة لإزاحات الحركة)
+        return data[:count].astype(np.uint64)
+    starts = np.empty(count, dtype=np.intp)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # موضع كل بايت داخل قيمته يحدد مقدار إزاحته
+    shifts = (np.arange(used) - np.repeat(starts, ends - starts + 1)).astype(np.uint64) * np.uint64(7)
+    return np.add.reduceat((data[:used] & 0x7f).astype(np.uint64) << shifts, starts)
+
+
+def zigzag_encode(values):
+    """تحويل الأعداد السالبة إلى موجبة صغيرة (0, -1, 1, -2 -> 0, 1, 2, 3) قبل ترميز varint"""
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def zigzag_decode(values):
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+class TrajectoryWriter:
+    """كتابة مسار حركة الماوس بصيغة MTRJ المضغوطة
+
+    ترويسة، ثم أجزاء من CHUNK_SIZE تقرير، ثم فهرس الأجزاء وتذييل. كل جزء يبدأ بزمن أول
+    تقرير ثم أربعة تدفقات varint: فروق الأزمنة، وdx وdy (بترميز zigzag)، وحالة الأزرار.
+    إذا انقطعت الكتابة قبل الفهرس يعيد القارئ بناءه من ترويسات الأجزاء.
+    """
+    MAGIC = b"MTRJ"
+    INDEX_MAGIC = b"MTRI"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHI")  # التوقيع، الإصدار، محجوز، حجم الجزء
+    CHUNK_HEADER = struct.Struct("<qIIIII")  # زمن أول تقرير، عدد التقارير، أطوال التدفقات الأربعة
+    FOOTER = struct.Struct("<QQ4s")  # موضع الفهرس، عدد الأجزاء، توقيع الفهرس
+    INDEX_DTYPE = np.dtype([("offset", "<u8"), ("start", "<u8"), ("count", "<u4"),
+                            ("first_timestamp", "<i8"), ("last_timestamp", "<i8")])
+    CHUNK_SIZE = 4096
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0, chunk_size))
+        self._pending = np.empty(chunk_size, dtype=TRAJECTORY_DTYPE)
+        self._pending_count = 0
+        self._last_timestamp = None
+        self._index = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def append(self, records):
+        """إضافة تقارير (مصفوفة بحقول timestamp وdx وdy وbuttons، مثل مخرجات MotionRingBuffer)"""
+        position = 0
+        while position < len(records):
+            take = min(self.chunk_size - self._pending_count, len(records) - position)
+            chunk = self._pending[self._pending_count:self._pending_count + take]
+            for field in TRAJECTORY_DTYPE.names:
+                chunk[field] = records[field][position:position + take]
+            self._pending_count += take
+            position += take
+            if self._pending_count == self.chunk_size:
+                self._write_chunk(self._pending)
+
+    def _write_chunk(self, chunk):
+        timestamps = chunk["timestamp"]
+        deltas = np.diff(timestamps)
+        if (deltas < 0).any() or (self._last_timestamp is not None and timestamps[0] < self._last_timestamp):
+            raise ValueError("أزمنة تقارير المسار يجب أن تكون متزايدة")
+
+        streams = (encode_varints(deltas), encode_varints(zigzag_encode(chunk["dx"])),
+                   encode_varints(zigzag_encode(chunk["dy"])), encode_varints(chunk["buttons"]))
+        offset = self._file.tell()
+        self._file.write(self.CHUNK_HEADER.pack(int(timestamps[0]), len(chunk), *(len(stream) for stream in streams)))
+        for stream in streams:
+            self._file.write(stream)
+
+        self._index.append((offset, self.count, len(chunk), int(timestamps[0]), int(timestamps[-1])))
+        self._last_timestamp = int(timestamps[-1])
+        self.count += len(chunk)
+        self._pending_count = 0
+
+    def close(self):
+        """كتابة الجزء الأخير والفهرس ثم إغلاق الملف"""
+        if self._file is None:
+            return
+        try:
+            if self._pending_count:
+                self._write_chunk(self._pending[:self._pending_count])
+            index_offset = self._file.tell()
+            self._file.write(np.array(self._index, dtype=self.INDEX_DTYPE).tobytes())
+            self._file.write(self.FOOTER.pack(index_offset, len(self._index), self.INDEX_MAGIC))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class TrajectoryReader:
+    """قراءة ملف MTRJ بربطه بالذاكرة وفك ترميز الأجزاء المطلوبة فقط
+
+    يمكن قراءة أي مدى من التقارير (read) أو أي فترة زمنية (read_time) من جلسة طويلة
+    دون تحميل الملف كاملًا.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data = np.frombuffer(self._mmap, dtype=np.uint8)
+        magic, version, _, self.chunk_size = TrajectoryWriter.HEADER.unpack_from(self._mmap, 0)
+        if magic != TrajectoryWriter.MAGIC or version > TrajectoryWriter.VERSION:
+            self.close()
+            raise ValueError(f"ملف مسار غير مدعوم: {path}")
+        self._cached_chunk = (None, None)
+        self.index = self._read_index()
+        if self.index is None:
+            print(f"فهرس المسار مفقود، تتم إعادة بنائه: {path}")
+            self.index = self._rebuild_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __len__(self):
+        if not len(self.index):
+            return 0
+        return int(self.index["start"][-1] + self.index["count"][-1])
+
+    def _read_index(self):
+        """فهرس الأجزاء من نهاية الملف، أو None إذا لم يُكتب (كتابة منقطعة)"""
+        footer = TrajectoryWriter.FOOTER
+        if len(self._mmap) < TrajectoryWriter.HEADER.size + footer.size:
+            return None
+        index_offset, chunk_count, magic = footer.unpack_from(self._mmap, len(self._mmap) - footer.size)
+        index_size = chunk_count * TrajectoryWriter.INDEX_DTYPE.itemsize
+        if magic != TrajectoryWriter.INDEX_MAGIC or index_offset + index_size + footer.size != len(self._mmap):
+            return None
+        return np.frombuffer(self._mmap, dtype=TrajectoryWriter.INDEX_DTYPE,
+                             count=chunk_count, offset=index_offset).copy()
+
+    def _rebuild_index(self):
+        """بناء الفهرس بالمرور على ترويسات الأجزاء المكتملة"""
+        entries = []
+        offset = TrajectoryWriter.HEADER.size
+        start = 0
+        header = TrajectoryWriter.CHUNK_HEADER
+        while offset + header.size <= len(self._mmap):
+            first_timestamp, count, *lengths = header.unpack_from(self._mmap, offset)
+            end = offset + header.size + sum(lengths)
+            if not count or end > len(self._mmap):
+                break
+            entries.append((offset, start, count, first_timestamp, 0))
+            offset = end
+            start += count
+        index = np.array(entries, dtype=TrajectoryWriter.INDEX_DTYPE)
+        for i in range(len(index)):
+            index["last_timestamp"][i] = self.chunk(i, index)["timestamp"][-1]
+        return index
+
+    def chunk(self, number, index=None):
+        """تقارير جزء واحد كمصفوفة TRAJECTORY_DTYPE للقراءة فقط (آخر جزء محفوظ ويُعاد دون نسخ)"""
+        if self._cached_chunk[0] == number and index is None:
+            return self._cached_chunk[1]
+        offset = int((self.index if index is None else index)["offset"][number])
+        first_timestamp, count, *lengths = TrajectoryWriter.CHUNK_HEADER.unpack_from(self._mmap, offset)
+        position = offset + TrajectoryWriter.CHUNK_HEADER.size
+        streams = []
+        for length in lengths:
+            streams.append(self._data[position:position + length])
+            position += length
+
+        records = np.empty(count, dtype=TRAJECTORY_DTYPE)
+        timestamps = records["timestamp"]
+        timestamps[0] = 0
+        np.cumsum(decode_varints(streams[0], count - 1).view(np.int64), out=timestamps[1:])
+        timestamps += first_timestamp
+        records["dx"] = zigzag_decode(decode_varints(streams[1], count))
+        records["dy"] = zigzag_decode(decode_varints(streams[2], count))
+        records["buttons"] = decode_varints(streams[3], count)
+        records.flags.writeable = False
+        if index is None:
+            self._cached_chunk = (number, records)
+        return records
+
+    def _read_chunks(self, first, last):
+        if first >= last:
+            return np.empty(0, dtype=TRAJECTORY_DTYPE)
+        if last - first == 1:
+            return self.chunk(first)
+        return np.concatenate([self.chunk(number) for number in range(first, last)])
+
+    def read(self, start=0, stop=None):
+        """التقارير من start إلى stop (دون stop) بترتيبها في الملف
+
+        النتيجة قد تكون عرضًا على الجزء المحفوظ فهي للقراءة فقط، ويُنسخ منها ما يلزم تعديله.
+        """
+        total = len(self)
+        stop = total if stop is None else min(stop, total)
+        start = max(start, 0)
+        if start >= stop:
+            return np.empty(0, dtype=TRAJECTORY_DTYPE)
+        starts = self.index["start"]
+        first = int(np.searchsorted(starts, start, side='right')) - 1
+        last = int(np.searchsorted(starts, stop, side='left'))
+        offset = int(starts[first])
+        return self._read_chunks(first, last)[start - offset:stop - offset]
+
+    def read_time(self, start_time, end_time):
+        """التقارير التي يقع زمنها (ميكروثانية) في [start_time, end_time)"""
+        first = int(np.searchsorted(self.index["last_timestamp"], start_time, side='left'))
+        last = int(np.searchsorted(self.index["first_timestamp"], end_time, side='left'))
+        records = self._read_chunks(first, last)
+        timestamps = records["timestamp"]
+        return records[np.searchsorted(timestamps, start_time, side='left'):
+                       np.searchsorted(timestamps, end_time, side='left')]
+
+    @property
+    def duration(self):
+        """مدة المسار بالثواني"""
+        if not len(self.index):
+            return 0.0
+        return (int(self.index["last_timestamp"][-1]) - int(self.index["first_timestamp"][0])) / 1e6
+
+    def close(self):
+        # يجب تحرير العروض على الذاكرة المربوطة قبل إغلاقها
+        self._cached_chunk = (None, None)
+        self._data = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class TrajectoryAnalyzer:
+    """حساب نتيجة المعايرة من مسار حركة مسجل وأحداث الأهداف
+
+    targets: لكل هدف زمن ظهوره (ميكروثانية) وموضع مركزه وعرضه، بحقول appear_time وx وy
+    وwidth (مصفوفة TARGET_DTYPE أو قاموس مصفوفات). المحاولة تبدأ بظهور الهدف وتنتهي
+    بأول ضغطة للزر الأيسر قبل ظهور الهدف التالي.
+    tracking_path: مسار هدف متحرك بحقول timestamp وx وy لقياس خطأ التتبع.
+    المواضع بوحدات تراكم dx وdy نفسها بدءًا من origin، وكل الحسابات عمليات NumPy على
+    المصفوفات كاملة دون حلقة على العينات أو المحاولات.
+    """
+    TARGET_DTYPE = np.dtype([("appear_time", "i8"), ("x", "f8"), ("y", "f8"), ("width", "f8")])
+    TRACKING_DTYPE = np.dtype([("timestamp", "i8"), ("x", "f8"), ("y", "f8")])
+    CORRECTION_MIN = 5.0  # أصغر مسافة متصلة في اتجاه واحد على محور الحركة تُحسب حركة مستقلة
+    PATH_RESOLUTION = 8000  # ميكروثانية: يُقاس طول المسار على خطوات بهذه المدة لا على كل تقرير
+    EFFECTIVE_WIDTH_FACTOR = 4.133  # العرض الفعلي في قانون فيتس (ISO 9241-9)
+    REFERENCE_THROUGHPUT = 5.0  # إنتاجية (بت/ثانية) تقابل أعلى نتيجة سرعة
+    TRACKING_TOLERANCE = 50.0  # متوسط خطأ تتبع (بوحدات الموضع) يقابل نتيجة صفر
+    SENSITIVITY_STEP = 0.1  # نسبة تعديل الحساسية في الإعدادات الموصى بها
+
+    def analyze(self, records, targets=None, tracking_path=None, origin=(0.0, 0.0)):
+        """مقاييس المسار: محاولات الأهداف (إن وجدت) وخطأ التتبع (إن وُجد مسار هدف)"""
+        timestamps = records["timestamp"]
+        dx = records["dx"].astype(np.float64)
+        dy = records["dy"].astype(np.float64)
+        # الموضع قبل كل عينة (positions[i]) وبعدها (positions[i + 1])
+        x = np.concatenate(([origin[0]], origin[0] + np.cumsum(dx)))
+        y = np.concatenate(([origin[1]], origin[1] + np.cumsum(dy)))
+
+        metrics = {"samples": int(len(records))}
+        if targets is not None and len(targets["appear_time"]):
+            metrics.update(self._target_metrics(timestamps, dx, dy, x, y, records["buttons"], targets))
+        if tracking_path is not None and len(tracking_path["timestamp"]) > 1:
+            metrics.update(self._tracking_metrics(timestamps, x, y, tracking_path))
+        return metrics
+
+    def _target_metrics(self, timestamps, dx, dy, x, y, buttons, targets):
+        appear = np.asarray(targets["appear_time"], dtype=np.int64)
+        target_x = np.asarray(targets["x"], dtype=np.float64)
+        target_y = np.asarray(targets["y"], dtype=np.float64)
+        width = np.asarray(targets["width"], dtype=np.float64)
+
+        # ضغطات الزر الأيسر (انتقال البت الأول من 0 إلى 1)، وأول ضغطة بعد ظهور كل هدف
+        left = (buttons & 1).astype(bool)
+        presses = np.flatnonzero(left & ~np.concatenate(([False], left[:-1])))
+        press_times = timestamps[presses]
+        first_press = np.searchsorted(press_times, appear, side='left')
+        next_appear = np.append(appear[1:], np.iinfo(np.int64).max)
+        clicked = first_press < len(presses)
+        clicked[clicked] = press_times[first_press[clicked]] < next_appear[clicked]
+        trials = np.flatnonzero(clicked)
+        count = trials.size
+        if not count:
+            return {"targets": int(appear.size), "trials": 0}
+
+        start = np.searchsorted(timestamps, appear[trials], side='left')
+        end = presses[first_press[trials]]  # عينة الضغط (ضمن المحاولة)
+        target_x, target_y, width = target_x[trials], target_y[trials], width[trials]
+        start_x, start_y = x[start], y[start]
+        click_x, click_y = x[end + 1], y[end + 1]
+
+        # محور الحركة: من موضع البداية إلى مركز الهدف
+        distance = np.hypot(target_x - start_x, target_y - start_y)
+        safe_distance = np.where(distance > 0, distance, 1.0)
+        axis_x = np.where(distance > 0, (target_x - start_x) / safe_distance, 1.0)
+        axis_y = np.where(distance > 0, (target_y - start_y) / safe_distance, 0.0)
+
+        hits = np.hypot(click_x - target_x, click_y - target_y) <= width / 2
+        movement_time = (press_times[first_press[trials]] - appear[trials]) / 1e6
+
+        # كفاءة المسار: الخط المستقيم إلى نقطة الضغط مقسومًا على طول المسار الفعلي.
+        # الإزاحات الصغيرة في كل تقرير تُجمع أولًا على خطوات PATH_RESOLUTION، وإلا
+        # ضخّم تكميم العدّات (حركة درجية) طول المسار خاصة عند معدلات التحديث العالية
+        buckets = timestamps // self.PATH_RESOLUTION
+        bucket_starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        bucket_ends = np.append(bucket_starts[1:], len(timestamps)) - 1
+        step_length = np.zeros(len(timestamps))
+        step_length[bucket_ends] = np.hypot(np.add.reduceat(dx, bucket_starts), np.add.reduceat(dy, bucket_starts))
+        path_length = np.concatenate(([0.0], np.cumsum(step_length)))
+        travelled = path_length[end + 1] - path_length[start]
+        straight = np.hypot(click_x - start_x, click_y - start_y)
+        efficiency = np.where(travelled > 0, np.minimum(straight / np.where(travelled > 0, travelled, 1.0), 1.0), 1.0)
+
+        # زمن رد الفعل: من ظهور الهدف إلى أول عينة حركة ضمن المحاولة
+        moving = np.flatnonzero((dx != 0) | (dy != 0))
+        onset = np.searchsorted(moving, start, side='left')
+        onset_valid = onset < moving.size
+        onset_index = moving[np.minimum(onset, max(moving.size - 1, 0))] if moving.size else end
+        onset_valid &= onset_index <= end
+        latency = np.where(onset_valid, (timestamps[onset_index] - appear[trials]) / 1e3, movement_time * 1e3)
+
+        # عينات المحاولات: رقم المحاولة لكل عينة تقع بين بدايتها ونقطة الضغط
+        samples = np.arange(len(timestamps))
+        sample_trial = np.searchsorted(start, samples, side='right') - 1
+        in_trial = sample_trial >= 0
+        in_trial[in_trial] = samples[in_trial] <= end[sample_trial[in_trial]]
+        indexes = np.flatnonzero(in_trial)
+        trial_of = sample_trial[indexes]
+
+        # التجاوز: تقدم المؤشر على محور الحركة يتخطى الحافة البعيدة للهدف
+        progress = ((x[indexes + 1] - start_x[trial_of]) * axis_x[trial_of] +
+                    (y[indexes + 1] - start_y[trial_of]) * axis_y[trial_of])
+        group_starts = np.searchsorted(trial_of, np.arange(count), side='left')
+        overshoot = np.maximum.reduceat(progress, group_starts) > distance + width / 2
+
+        # التصحيحات: انعكاس اتجاه الحركة على المحور داخل المحاولة نفسها. العينات المتتالية
+        # في اتجاه واحد تُجمع في حركات، وتُهمل الحركات الأقصر من CORRECTION_MIN (اهتزاز)
+        along = dx[indexes] * axis_x[trial_of] + dy[indexes] * axis_y[trial_of]
+        moving_along = along != 0
+        direction = along[moving_along] > 0
+        moving_trial = trial_of[moving_along]
+        corrections = np.zeros(count, dtype=np.int64)
+        if direction.size:
+            run_starts = np.flatnonzero(np.concatenate(([True], (direction[1:] != direction[:-1]) |
+                                                        (moving_trial[1:] != moving_trial[:-1]))))
+            kept = np.add.reduceat(np.abs(along[moving_along]), run_starts) >= self.CORRECTION_MIN
+            run_direction = direction[run_starts][kept]
+            run_trial = moving_trial[run_starts][kept]
+            reversal = (run_direction[1:] != run_direction[:-1]) & (run_trial[1:] == run_trial[:-1])
+            corrections = np.bincount(run_trial[1:][reversal], minlength=count)
+
+        # إنتاجية فيتس بالعرض والمسافة الفعليين
+        endpoint_error = (click_x - start_x) * axis_x + (click_y - start_y) * axis_y - distance
+        effective_width = self.EFFECTIVE_WIDTH_FACTOR * float(np.std(endpoint_error)) if count > 1 else 0.0
+        if effective_width <= 0:
+            effective_width = float(np.mean(width))
+        effective_id = np.log2(np.maximum(distance + endpoint_error, 0.0) / effective_width + 1)
+        timed = movement_time > 0
+        throughput = float(np.mean(effective_id[timed] / movement_time[timed])) if timed.any() else 0.0
+
+        return {
+            "targets": int(appear.size),
+            "trials": int(count),
+            "hits": int(hits.sum()),
+            "hit_rate": float(hits.sum()) / appear.size,
+            "path_efficiency": float(np.mean(efficiency)),
+            "overshoots": int(overshoot.sum()),
+            "overshoot_rate": float(np.mean(overshoot)),
+            "corrections": int(corrections.sum()),
+            "corrections_per_trial": float(np.mean(corrections)),
+            "index_of_difficulty": float(np.mean(np.log2(distance / width + 1))),
+            "effective_width": effective_width,
+            "throughput": throughput,
+            "movement_time_ms": float(np.median(movement_time)) * 1e3,
+            "reaction_latency_ms": float(np.median(latency))
+        }
+
+    def _tracking_metrics(self, timestamps, x, y, tracking_path):
+        path_time = np.asarray(tracking_path["timestamp"], dtype=np.int64)
+        inside = (timestamps >= path_time[0]) & (timestamps <= path_time[-1])
+        if not inside.any():
+            return {}
+        times = timestamps[inside]
+        error = np.hypot(x[1:][inside] - np.interp(times, path_time, tracking_path["x"]),
+                         y[1:][inside] - np.interp(times, path_time, tracking_path["y"]))
+        return {
+            "tracking_samples": int(error.size),
+            "tracking_error_mean": float(np.mean(error)),
+            "tracking_error_rms": float(np.sqrt(np.mean(error ** 2))),
+            "tracking_error_p95": float(np.percentile(error, 95))
+        }
+
+    def calibration_result(self, records, targets, tracking_path=None, origin=(0.0, 0.0), settings=None,
+                           previous_tracking=None):
+        """نتيجة معايرة بالشكل الذي يستقبله PerformanceData.add_calibration_result
+
+        النتائج من 0 إلى 10، وresponse_time وسيط زمن رد الفعل بالمللي ثانية (المقاييس
+        التفصيلية من analyze). دون مسار هدف لا يُقاس التتبع: لا يدخل في النتيجة العامة،
+        وتُحمل في tracking_score آخر نتيجة تتبع مقيسة (previous_tracking) أو النتيجة العامة
+        نفسها. يعيد None إذا لم تكتمل أي محاولة.
+        """
+        metrics = self.analyze(records, targets, tracking_path, origin)
+        if not metrics.get("trials"):
+            return None
+
+        accuracy = 10 * (0.7 * metrics["hit_rate"] + 0.3 * metrics["path_efficiency"])
+        speed = 10 * min(metrics["throughput"] / self.REFERENCE_THROUGHPUT, 1.0)
+        if "tracking_error_mean" in metrics:
+            tracking = 10 * max(0.0, 1 - metrics["tracking_error_mean"] / self.TRACKING_TOLERANCE)
+            overall = (accuracy + speed + tracking) / 3
+        else:
+            overall = (accuracy + speed) / 2
+            tracking = overall if previous_tracking is None else previous_tracking
+
+        return {
+            "accuracy_score": round(accuracy, 2),
+            "speed_score": round(speed, 2),
+            "tracking_score": round(tracking, 2),
+            "overall_score": round(overall, 2),
+            "response_time": round(metrics["reaction_latency_ms"], 1),
+            "recommended_settings": self.recommend_settings(metrics, settings or {})
+        }
+
+    def recommend_settings(self, metrics, settings):
+        """تعديل الإعدادات الحالية حسب المقاييس: تجاوز كثير يعني حساسية زائدة، وبطء دون تجاوز يعني العكس"""
+        recommended = dict(settings)
+        factor = 1.0
+        if metrics["overshoot_rate"] > 0.3:
+            factor = 1 - self.SENSITIVITY_STEP
+        elif metrics["overshoot_rate"] < 0.05 and metrics["throughput"] < self.REFERENCE_THROUGHPUT * 0.6:
+            factor = 1 + self.SENSITIVITY_STEP
+
+        if factor != 1.0:
+            if "sensitivity" in recommended:
+                recommended["sensitivity"] = round(recommended["sensitivity"] * factor, 2)
+            elif "dpi" in recommended:
+                recommended["dpi"] = int(round(recommended["dpi"] * factor / 50)) * 50
+        # تصحيحات متكررة مع التسارع تعني أن المسافة غير متوقعة
+        if metrics["corrections_per_trial"] > 2 and recommended.get("acceleration"):
+            recommended["acceleration"] = False
+        return recommended
+
+
+class StreamingTrend:
+    """انحدار خطي متزايد على نافذة منزلقة من آخر القيم
+
+    يحتفظ بـ Σy و Σxy حيث x هو موضع القيمة داخل النافذة، أما Σx و Σx²
+    فتُحسبان مباشرة من عدد القيم، فيكلف كل تحديث وقتًا ثابتًا.
+    """
+    RESYNC_INTERVAL = 4096  # إعادة حساب المجاميع دوريًا لتفادي تراكم أخطاء التقريب
+
+    def __init__(self, window=5):
+        if window < 2:
+            raise ValueError("يجب أن تحتوي نافذة الاتجاه على قيمتين على الأقل")
+        self.window = window
+        self.values = collections.deque(maxlen=window)
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self._updates = 0
+
+    def update(self, value):
+        """إضافة قيمة جديدة وإزاحة النافذة إذا امتلأت"""
+        value = float(value)
+        n = len(self.values)
+        if n == self.window:
+            oldest = self.values[0]
+            # تنخفض مواضع القيم الباقية بمقدار واحد وتأخذ القيمة الجديدة الموضع الأخير
+            self.sum_xy += (n - 1) * value - (self.sum_y - oldest)
+            self.sum_y += value - oldest
+        else:
+            self.sum_xy += n * value
+            self.sum_y += value
+        self.values.append(value)
+
+        self._updates += 1
+        if self._updates % self.RESYNC_INTERVAL == 0:
+            self._resync()
+
+    def _resync(self):
+        self.sum_y = sum(self.values)
+        self.sum_xy = sum(i * v for i, v in enumerate(self.values))
+
+    def reset(self):
+        self.values.clear()
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+
+    def slope(self):
+        """ميل خط الانحدار (يطابق np.polyfit من الدرجة الأولى)"""
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self.sum_xy - sum_x * self.sum_y) / (n * sum_xx - sum_x * sum_x)
+
+
+class TrendEngine:
+    """محرك اتجاهات يحدّث ميل كل مؤشر مع كل نتيجة معايرة جديدة"""
+    METRICS = {
+        "accuracy_trend": "accuracy_score",
+        "speed_trend": "speed_score",
+        "tracking_trend": "tracking_score"
+    }
+
+    def __init__(self, window=5):
+        self.window = window
+        self.trends = {name: StreamingTrend(window) for name in self.METRICS}
+
+    def update(self, record):
+        for name, metric in self.METRICS.items():
+            self.trends[name].update(record[metric])
+
+    def prime(self, history_store):
+        """تهيئة النوافذ من آخر القيم في المخزن العمودي"""
+        for name, metric in self.METRICS.items():
+            trend = self.trends[name]
+            trend.reset()
+            for value in history_store.latest(metric, self.window):
+                trend.update(value)
+
+    def slopes(self):
+        return {name: trend.slope() for name, trend in self.trends.items()}
+
+
+class RunningStats:
+    """متوسط وتباين متراكمان بطريقة Welford مع أصغر وأكبر قيمة"""
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=float('inf'), maximum=float('-inf')):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = minimum
+        self.max = maximum
+
+    @classmethod
+    def from_array(cls, values):
+        """إنشاء الإحصائيات من مصفوفة قيم دفعة واحدة"""
+        if not len(values):
+            return cls()
+        return cls(len(values), float(np.mean(values)), float(np.var(values) * len(values)),
+                   float(np.min(values)), float(np.max(values)))
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def remove(self, value):
+        """عكس add (تُحدَّث أصغر وأكبر قيمة من قبل المستدعي)"""
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.count -= 1
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (value - self.mean)
+
+    def merge(self, other):
+        """دمج إحصائيات مجموعة أخرى (صيغة Chan المتوازية)"""
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        return max(self.m2, 0.0) / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0
+        }
+
+
+class MetricStats:
+    """إحصائيات متراكمة لكل مؤشر أداء"""
+    METRICS = {
+        "accuracy": "accuracy_score",
+        "speed": "speed_score",
+        "tracking": "tracking_score",
+        "overall": "overall_score"
+    }
+
+    def __init__(self):
+        self.stats = {name: RunningStats() for name in self.METRICS}
+
+    @property
+    def count(self):
+        return self.stats["overall"].count
+
+    def add(self, record):
+        for name, field in self.METRICS.items():
+            self.stats[name].add(record[field])
+
+    def merge(self, other):
+        for name in self.METRICS:
+            self.stats[name].merge(other.stats[name])
+
+    def summary(self):
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+    @classmethod
+    def from_history(cls, history_store, limit=None):
+        """بناء الإحصائيات من أعمدة المخزن العمودي"""
+        metric_stats = cls()
+        for name, field in cls.METRICS.items():
+            metric_stats.stats[name] = RunningStats.from_array(history_store.column(field, limit))
+        return metric_stats
+
+    @classmethod
+    def from_daily(cls, daily):
+        """استعادة الإحصائيات من مدخل في daily_stats"""
+        metric_stats = cls()
+        if not daily:
+            return metric_stats
+        count = daily.get("calibrations", 0)
+        for name in cls.METRICS:
+            mean = daily.get(f"avg_{name}", 0.0)
+            # المدخلات القديمة لا تحتوي على التباين والقيم القصوى
+            metric_stats.stats[name] = RunningStats(count, mean, daily.get(f"m2_{name}", 0.0),
+                                                    daily.get(f"min_{name}", mean),
+                                                    daily.get(f"max_{name}", mean))
+        return metric_stats
+
+    def to_daily(self):
+        """تحويل الإحصائيات إلى مدخل daily_stats (مع الحفاظ على المفاتيح القديمة)"""
+        daily = {"calibrations": self.count}
+        for name, stats in self.stats.items():
+            daily[f"avg_{name}"] = stats.mean
+        for name, stats in self.stats.items():
+            daily[f"std_{name}"] = stats.std
+            daily[f"min_{name}"] = stats.min
+            daily[f"max_{name}"] = stats.max
+            daily[f"m2_{name}"] = stats.m2
+        return daily
+
+
+class WindowedMetricStats(MetricStats):
+    """إحصائيات آخر size نتيجة معايرة (نافذة منزلقة)"""
+    def __init__(self, size=10):
+        super().__init__()
+        self.size = size
+        self.values = {name: collections.deque() for name in self.METRICS}
+
+    def add(self, record):
+        for name, field in self.METRICS.items():
+            values = self.values[name]
+            stats = self.stats[name]
+            value = record[field]
+            if len(values) == self.size:
+                stats.remove(values.popleft())
+            values.append(value)
+            stats.add(value)
+            if len(values) == self.size:
+                # النافذة صغيرة وثابتة الحجم، فحساب الحدود منها لا يعتمد على طول التاريخ
+                stats.min = min(values)
+                stats.max = max(values)
+
+    @classmethod
+    def from_history(cls, history_store, size=10):
+        window_stats = cls(size)
+        for name, field in cls.METRICS.items():
+            values = history_store.latest(field, size)
+            window_stats.values[name].extend(float(value) for value in values)
+            window_stats.stats[name] = RunningStats.from_array(values)
+        return window_stats
+
+
+def group_metric_stats(keys, columns):
+    """تجميع قيم المؤشرات حسب مفتاح (يوم، أسبوع...) بعمليات NumPy دون المرور على كل سجل
+
+    columns: قاموس من اسم المؤشر في MetricStats إلى مصفوفة قيمه
+    """
+    keys = np.asarray(keys)
+    if not len(keys):
+        return {}
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    unique_keys, starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+    inverse = np.repeat(np.arange(len(unique_keys)), counts)
+
+    per_metric = {}
+    for name in MetricStats.METRICS:
+        values = np.asarray(columns[name], dtype=np.float64)[order]
+        means = np.add.reduceat(values, starts) / counts
+        deviations = values - means[inverse]
+        m2 = np.bincount(inverse, weights=deviations * deviations, minlength=len(unique_keys))
+        per_metric[name] = (means, m2, np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts))
+
+    groups = {}
+    for i, key in enumerate(unique_keys.tolist()):
+        metric_stats = MetricStats()
+        for name, (means, m2, minimums, maximums) in per_metric.items():
+            metric_stats.stats[name] = RunningStats(int(counts[i]), float(means[i]), float(m2[i]),
+                                                    float(minimums[i]), float(maximums[i]))
+        groups[key] = metric_stats
+    return groups
+
+
+def lttb_indices(x, y, threshold):
+    """اختيار threshold نقطة تحافظ على شكل المنحنى (Largest-Triangle-Three-Buckets)"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # الحدود بين الدلاء، مع الإبقاء على النقطتين الأولى والأخيرة
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # مساحة المثلث بين النقطة المختارة سابقًا وكل نقطة في الدلو ومتوسط الدلو التالي
+        areas = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected]) -
+                       (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+class RollupIndex:
+    """تجميعات الأداء حسب اليوم والأسبوع والشهر (تُحدَّث مع كل نتيجة)"""
+    RESOLUTIONS = ("day", "week", "month")
+    EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+    def __init__(self):
+        self.groups = {resolution: {} for resolution in self.RESOLUTIONS}
+        self.built = False
+
+    def invalidate(self):
+        """إلغاء التجميعات حتى يُعاد بناؤها عند أول طلب"""
+        self.groups = {resolution: {} for resolution in self.RESOLUTIONS}
+        self.built = False
+
+    @classmethod
+    def period_keys(cls, day_ordinals, resolution):
+        """مفتاح الفترة لكل يوم: رقم اليوم، أو رقم يوم الاثنين في أسبوعه، أو عدد الأشهر منذ 1970"""
+        day_ordinals = np.asarray(day_ordinals, dtype=np.int64)
+        if resolution == "day":
+            return day_ordinals
+        if resolution == "week":
+            return day_ordinals - (day_ordinals - 1) % 7
+        days = (day_ordinals - cls.EPOCH_ORDINAL).astype('datetime64[D]')
+        return days.astype('datetime64[M]').astype(np.int64)
+
+    @classmethod
+    def period_starts(cls, keys, resolution):
+        """تاريخ بداية كل فترة كمصفوفة datetime64[D]"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if resolution == "month":
+            return keys.astype('datetime64[M]').astype('datetime64[D]')
+        return (keys - cls.EPOCH_ORDINAL).astype('datetime64[D]')
+
+    def rebuild(self, history_store):
+        """إعادة بناء كل التجميعات من المخزن العمودي دفعة واحدة"""
+        columns = {name: history_store.column(field) for name, field in MetricStats.METRICS.items()}
+        days = history_store.column("day")
+        for resolution in self.RESOLUTIONS:
+            self.groups[resolution] = group_metric_stats(self.period_keys(days, resolution), columns)
+        self.built = True
+
+    def add(self, day_ordinal, record):
+        if not self.built:
+            return
+        for resolution in self.RESOLUTIONS:
+            key = int(self.period_keys([day_ordinal], resolution)[0])
+            groups = self.groups[resolution]
+            if key not in groups:
+                groups[key] = MetricStats()
+            groups[key].add(record)
+
+    def extend(self, day_ordinals, columns):
+        """دمج دفعة من القيم في التجميعات الحالية (columns كما في group_metric_stats)"""
+        if not self.built:
+            return
+        for resolution in self.RESOLUTIONS:
+            groups = self.groups[resolution]
+            for key, batch_stats in group_metric_stats(self.period_keys(day_ordinals, resolution), columns).items():
+                if key not in groups:
+                    groups[key] = MetricStats()
+                groups[key].merge(batch_stats)
+
+    def series(self, resolution):
+        """متوسطات المؤشرات لكل فترة مرتبة زمنيًا"""
+        groups = self.groups[resolution]
+        keys = sorted(groups)
+        series = {
+            name: np.fromiter((groups[key].stats[name].mean for key in keys), dtype=np.float64, count=len(keys))
+            for name in MetricStats.METRICS
+        }
+        series["dates"] = self.period_starts(keys, resolution)
+        return series
+
+
+class PerformanceNotifier(QObject):
+    """إشارات تغير بيانات الأداء"""
+    data_changed = pyqtSignal(int)  # رقم إصدار البيانات الجديد
 
 
 class PerformanceData:
     """فئة لإدارة وتحليل بيانات الأداء"""
-    def __init__(self, settings_manager):
+    CHART_MAX_POINTS = 500  # الحد الأقصى لعدد النقاط المرسومة
+    RECENT_RECORDS = 50  # عدد السجلات الكاملة الأخيرة المحفوظة في الذاكرة
+    
+    def __init__(self, settings_manager, memory_mapped=True, storage="log", trend_window=5, stats_window=10,
+                 data_dir=None):
         self.settings_manager = settings_manager
-        self.user_data_dir = os.path.expanduser("~/.mousetuner/analytics")
+        # مجلد البيانات: ~/.mousetuner/analytics افتراضيًا، أو مجلد آخر (للقياسات مثلًا)
+        self.user_data_dir = data_dir or os.path.expanduser("~/.mousetuner/analytics")
         
         # التأكد من وجود مجلد التحليلات
         if not os.path.exists(self.user_data_dir):
             os.makedirs(self.user_data_dir)
         
-        # ملف بيانات الأداء
+        # مسارات حركة الماوس المسجلة أثناء المعايرة (ملفات MTRJ)
+        self.trajectory_dir = os.path.join(self.user_data_dir, "trajectories")
+        
+        # ملف بيانات الأداء القديم (يُرحَّل تلقائيًا إلى وحدة التخزين)
         self.data_file = os.path.join(self.user_data_dir, "performance_data.json")
         
+        # وحدة التخزين: اسم من STORAGE_BACKENDS أو كائن PerformanceStorage جاهز
+        if isinstance(storage, PerformanceStorage):
+            self.storage = storage
+        else:
+            self.storage = STORAGE_BACKENDS[storage](self.user_data_dir)
+        
+        # أحدث السجلات الكاملة (حسب الطابع الزمني) لعرضها دون انتظار كاتب الخلفية
+        self.recent_records = collections.deque(maxlen=self.RECENT_RECORDS)
+        
+        # المخزن العمودي للقيم الرقمية، ويُربط افتراضيًا بملفات على القرص فلا يُعاد بناؤه عند كل تشغيل
+        mmap_dir = self.storage.columns_dir() if memory_mapped else None
+        self.history_store = CalibrationHistoryStore(mmap_dir)
+        
+        # محرك الاتجاهات المتزايد (نافذة آخر trend_window نتيجة)
+        self.trend_engine = TrendEngine(trend_window)
+        
+        # إحصائيات متراكمة: كل التاريخ، وآخر stats_window نتيجة، وكل يوم
+        self.stats_window = stats_window
+        self.overall_stats = None  # تُحسب عند أول طلب
+        self.recent_stats = WindowedMetricStats(stats_window)
+        self._daily_aggregates = {}
+        
+        # تجميعات متعددة الدقة للرسم البياني
+        self.rollups = RollupIndex()
+        
+        # إصدار البيانات: يزداد مع كل تغيير، ولكل قسم آخر إصدار تغير فيه
+        self.data_version = 0
+        self.section_versions = {"history": 0, "trends": 0, "recommendations": 0}
+        self.notifier = PerformanceNotifier() if QT_AVAILABLE else None
+        
         # تهيئة بيانات الأداء
         self.performance_history = self.load_performance_data()
-    
-    def load_performance_data(self):
-        """تحميل بيانات الأداء المحفوظة"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"خطأ في تحميل بيانات الأداء: {e}")
         
-        # إنشاء هيكل بيانات افتراضي إذا لم يكن الملف موجودًا
+        # كل عمليات الكتابة تتم في خيط منفصل، وتُكمل عند إغلاق التطبيق
+        self.writer = BackgroundWriter(self.storage, self.history_store)
+        atexit.register(self.writer.close)
+    
+    def _empty_history(self):
+        """هيكل بيانات الأداء الافتراضي"""
         return {
-            "calibration_history": [],
             "daily_stats": {},
             "usage_patterns": {},
             "recommendations": []
         }
     
-    def save_performance_data(self):
-        """حفظ بيانات الأداء"""
+    def migrate_legacy_data(self):
+        """ترحيل ملف performance_data.json القديم إلى وحدة التخزين
+
+        الترحيل ذري في وحدة التخزين، ولا يُعاد تسمية الملف القديم إلا بعده، فيُعاد
+        الترحيل في التشغيل التالي ما دام الملف موجودًا ولم يكتمل.
+        """
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.performance_history, f, ensure_ascii=False, indent=4)
+            if not self.storage.history_imported():
+                if self.storage.exists():
+                    # سجلات أُضيفت بعد ترحيل فاشل: لا يُخلط بها تاريخ قديم، ويبقى الملف كما هو
+                    print(f"تعذر ترحيل {self.data_file}: وحدة التخزين تحتوي على سجلات أخرى")
+                    return False
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    legacy_history = json.load(f)
+                self.storage.import_history(legacy_history)
+            # الاحتفاظ بنسخة من الملف القديم بدلاً من حذفه
+            os.replace(self.data_file, self.data_file + ".migrated")
             return True
         except Exception as e:
-            print(f"خطأ في حفظ بيانات الأداء: {e}")
+            print(f"خطأ في ترحيل بيانات الأداء: {e}")
             return False
     
+    @instrumentation.timed("analytics.load_performance_data")
+    def load_performance_data(self):
+        """تحميل بيانات الأداء المحفوظة"""
+        if os.path.exists(self.data_file):
+            self.migrate_legacy_data()
+        
+        performance_history = self._empty_history()
+        self._daily_aggregates = {}
+        try:
+            state, pending_records = self.storage.load()
+            
+            # المخزن المرتبط بالذاكرة يحتوي غالبًا على كل السجلات، فيُقرأ الباقي فقط
+            if len(self.history_store) > self.storage.count():
+                self.history_store.clear()
+            self.storage.load_metrics(self.history_store, start=len(self.history_store))
+            
+            # ما تحتاجه الواجهة فورًا يعتمد على آخر القيم فقط، والباقي يُحسب عند الطلب
+            self.trend_engine.prime(self.history_store)
+            self.recent_stats = WindowedMetricStats.from_history(self.history_store, self.stats_window)
+            self.overall_stats = None
+            self.rollups.invalidate()
+            self.recent_records.clear()
+            self.recent_records.extend(self._read_records(self.history_store.chronological_positions(self.RECENT_RECORDS)))
+        except Exception as e:
+            print(f"خطأ في تحميل بيانات الأداء: {e}")
+            return performance_history
+        
+        for key in ("daily_stats", "usage_patterns", "recommendations"):
+            if key in state:
+                performance_history[key] = state[key]
+        
+        # إعادة تطبيق السجلات التي أضيفت بعد آخر نقطة حفظ
+        for record in pending_records:
+            self._update_daily_stats(performance_history["daily_stats"], record)
+        
+        return performance_history
+    
+    @instrumentation.timed("analytics.save_performance_data")
+    def save_performance_data(self):
+        """جدولة حفظ بيانات الأداء (نقطة حفظ للحالة المجمعة، فالسجلات تُكتب عند إضافتها)"""
+        # مدخلات daily_stats والأنماط والتوصيات تُستبدل ولا تُعدَّل، فتكفي نسخة سطحية كلقطة ثابتة
+        self.writer.checkpoint({
+            "daily_stats": dict(self.performance_history["daily_stats"]),
+            "usage_patterns": self.performance_history["usage_patterns"],
+            "recommendations": list(self.performance_history["recommendations"]),
+            "record_count": len(self.history_store)
+        })
+        return True
+    
+    def close(self):
+        """حفظ الحالة وإغلاق وحدة التخزين عند إنهاء التطبيق"""
+        self.save_performance_data()
+        self.writer.close()
+        # لم يعد الكاتب بحاجة إلى إغلاقه عند الخروج، فلا يبقى مرجع إليه
+        atexit.unregister(self.writer.close)
+        self.storage.close()
+    
+    @instrumentation.timed("analytics.add_calibration_result")
     def add_calibration_result(self, calibration_result):
         """إضافة نتيجة معايرة جديدة"""
         if not calibration_result:
@@ -75,53 +1920,202 @@ class PerformanceData:
             "settings": self.settings_manager.get_active_settings(),
             "recommended_settings": calibration_result['recommended_settings']
         }
+        if calibration_result.get("trajectory"):
+            calibration_record["trajectory"] = self._trajectory_reference(calibration_result["trajectory"])
         
-        # إضافة السجل إلى التاريخ
-        self.performance_history["calibration_history"].append(calibration_record)
-        
-        # تحديث إحصائيات اليوم
-        day = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
-        if day not in self.performance_history["daily_stats"]:
-            self.performance_history["daily_stats"][day] = {
-                "calibrations": 0,
-                "avg_accuracy": 0,
-                "avg_speed": 0,
-                "avg_tracking": 0,
-                "avg_overall": 0
-            }
+        # إضافة السجل إلى التاريخ وتحديث إحصائيات اليوم والاتجاهات
+        self.history_store.append(calibration_record)
+        self.trend_engine.update(calibration_record)
+        if self.overall_stats is not None:
+            self.overall_stats.add(calibration_record)
+        self.recent_stats.add(calibration_record)
+        self.rollups.add(int(self.history_store.column("day", 1)[0]), calibration_record)
+        day, daily = self._update_daily_stats(self.performance_history["daily_stats"], calibration_record)
+        self._mark_changed("history")
+        
+        self.recent_records.append(calibration_record)
         
-        daily = self.performance_history["daily_stats"][day]
-        daily["calibrations"] += 1
-        daily["avg_accuracy"] = (daily["avg_accuracy"] * (daily["calibrations"] - 1) + 
-                              calibration_result['accuracy_score']) / daily["calibrations"]
-        daily["avg_speed"] = (daily["avg_speed"] * (daily["calibrations"] - 1) + 
-                           calibration_result['speed_score']) / daily["calibrations"]
-        daily["avg_tracking"] = (daily["avg_tracking"] * (daily["calibrations"] - 1) + 
-                              calibration_result['tracking_score']) / daily["calibrations"]
-        daily["avg_overall"] = (daily["avg_overall"] * (daily["calibrations"] - 1) + 
-                             calibration_result['overall_score']) / daily["calibrations"]
+        # إلحاق السجل بوحدة التخزين في الخلفية
+        self.writer.append(calibration_record, day, daily)
         
         # تحليل نمط الاستخدام وتوليد توصيات
         self.analyze_patterns()
         
-        # حفظ البيانات
+        # حفظ الحالة المجمعة بشكل دوري فقط
+        if self.storage.needs_checkpoint():
+            self.save_performance_data()
+        
+        self._notify()
+    
+    @instrumentation.timed("analytics.add_calibration_results")
+    def add_calibration_results(self, calibration_results):
+        """إضافة دفعة من نتائج المعايرة مع تحليل الأنماط والحفظ مرة واحدة في النهاية
+
+        يمكن أن تحمل كل نتيجة timestamp و settings الخاصين بها (مثل النتائج المستوردة
+        من أجهزة أخرى)، وإلا استُخدم الوقت الحالي والإعدادات النشطة.
+        تُرتب الدفعة حسب الطابع الزمني ثم تُلحق بنهاية التاريخ، أما الاتجاهات وآخر النتائج
+        والتوصيات والرسم البياني فتتبع الطابع الزمني، فلا تصبح نتائج مستوردة أقدم من
+        الموجودة "آخر" النتائج.
+        يعيد عدد النتائج المضافة.
+        """
+        now = time.time()
+        active_settings = self.settings_manager.get_active_settings()
+        records = []
+        for calibration_result in calibration_results:
+            if not calibration_result:
+                continue
+            timestamp = calibration_result.get("timestamp", now)
+            record = {
+                "timestamp": timestamp,
+                "date": datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+                "accuracy_score": calibration_result['accuracy_score'],
+                "speed_score": calibration_result['speed_score'],
+                "tracking_score": calibration_result['tracking_score'],
+                "overall_score": calibration_result['overall_score'],
+                "response_time": calibration_result['response_time'],
+                "settings": calibration_result.get("settings", active_settings),
+                "recommended_settings": calibration_result['recommended_settings']
+            }
+            if calibration_result.get("trajectory"):
+                record["trajectory"] = self._trajectory_reference(calibration_result["trajectory"])
+            records.append(record)
+        if not records:
+            return 0
+        records.sort(key=lambda record: record["timestamp"])
+        
+        # إضافة الدفعة إلى المخزن العمودي ثم قراءة أعمدتها منه
+        count = len(records)
+        self.history_store.extend(records)
+        day_ordinals = self.history_store.column("day", count)
+        columns = {name: self.history_store.column(field, count) for name, field in MetricStats.METRICS.items()}
+        
+        # تحديث إحصائيات كل يوم بدمج تجميعات الدفعة بدلًا من المرور على كل سجل
+        daily_stats = self.performance_history["daily_stats"]
+        day_names = {}
+        for ordinal, batch_stats in group_metric_stats(day_ordinals, columns).items():
+            day = datetime.date.fromordinal(ordinal).strftime('%Y-%m-%d')
+            aggregates = self._daily_aggregates.get(day)
+            if aggregates is None:
+                aggregates = MetricStats.from_daily(daily_stats.get(day))
+                self._daily_aggregates[day] = aggregates
+            aggregates.merge(batch_stats)
+            daily_stats[day] = aggregates.to_daily()
+            day_names[ordinal] = day
+        
+        # الاتجاهات والإحصائيات الحديثة تعتمد على أحدث القيم فقط
+        self.trend_engine.prime(self.history_store)
+        self.recent_stats = WindowedMetricStats.from_history(self.history_store, self.stats_window)
+        if self.overall_stats is not None:
+            self.overall_stats.merge(MetricStats.from_history(self.history_store, count))
+        self.rollups.extend(day_ordinals, columns)
+        self._mark_changed("history")
+        
+        self.recent_records = collections.deque(
+            heapq.merge(self.recent_records, records, key=lambda record: record["timestamp"]),
+            maxlen=self.RECENT_RECORDS)
+        
+        days = [day_names[ordinal] for ordinal in day_ordinals.tolist()]
+        self.writer.append_many([(record, day, daily_stats[day]) for record, day in zip(records, days)])
+        
+        self.analyze_patterns()
         self.save_performance_data()
+        
+        self._notify()
+        return count
     
+    def create_trajectory_writer(self):
+        """ملف مسار جديد لتسجيل حركة الماوس أثناء معايرة
+
+        يُمرَّر مساره (writer.path) في نتيجة المعايرة بالمفتاح trajectory بعد إغلاقه.
+        """
+        os.makedirs(self.trajectory_dir, exist_ok=True)
+        name = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f') + ".mtrj"
+        return TrajectoryWriter(os.path.join(self.trajectory_dir, name))
+    
+    def add_trajectory_calibration(self, path, targets, tracking_path=None, origin=(0.0, 0.0)):
+        """حساب نتيجة معايرة من ملف مسار مسجل وإضافتها مع الإشارة إلى الملف
+
+        يعيد نتيجة المعايرة، أو None إذا لم تكتمل أي محاولة.
+        """
+        with TrajectoryReader(path) as reader:
+            records = reader.read()
+        previous_tracking = None
+        if len(self.history_store):
+            previous_tracking = float(self.history_store.latest("tracking_score", 1)[0])
+        calibration_result = TrajectoryAnalyzer().calibration_result(
+            records, targets, tracking_path, origin, self.settings_manager.get_active_settings(),
+            previous_tracking)
+        if calibration_result is None:
+            return None
+        calibration_result["trajectory"] = path
+        self.add_calibration_result(calibration_result)
+        return calibration_result
+    
+    def _trajectory_reference(self, path):
+        """مرجع المسار في السجل: اسم الملف إذا كان داخل مجلد المسارات، وإلا المسار الكامل"""
+        path = os.path.abspath(path)
+        if os.path.dirname(path) == os.path.abspath(self.trajectory_dir):
+            return os.path.basename(path)
+        return path
+    
+    def open_trajectory(self, record):
+        """قارئ مسار الحركة المرتبط بسجل معايرة، أو None إذا لم يكن له مسار"""
+        reference = record.get("trajectory")
+        if not reference:
+            return None
+        try:
+            return TrajectoryReader(os.path.join(self.trajectory_dir, reference))
+        except (OSError, ValueError) as e:
+            print(f"خطأ في فتح مسار الحركة: {e}")
+            return None
+    
+    def _notify(self):
+        """إرسال إشارة تغير البيانات (عند توفر Qt)"""
+        if self.notifier is not None:
+            self.notifier.data_changed.emit(self.data_version)
+    
+    def _mark_changed(self, *sections):
+        """زيادة إصدار البيانات وتسجيله للأقسام التي تغيرت"""
+        self.data_version += 1
+        for section in sections:
+            self.section_versions[section] = self.data_version
+    
+    def get_data_version(self, section=None):
+        """إصدار البيانات الحالي، أو آخر إصدار تغير فيه قسم معين"""
+        if section is None:
+            return self.data_version
+        return self.section_versions[section]
+    
+    def _update_daily_stats(self, daily_stats, record):
+        """تحديث إحصائيات اليوم الخاص بسجل معايرة"""
+        day = datetime.datetime.fromtimestamp(record["timestamp"]).strftime('%Y-%m-%d')
+        aggregates = self._daily_aggregates.get(day)
+        if aggregates is None:
+            aggregates = MetricStats.from_daily(daily_stats.get(day))
+            self._daily_aggregates[day] = aggregates
+        
+        aggregates.add(record)
+        daily = aggregates.to_daily()
+        daily_stats[day] = daily
+        
+        return day, daily
+    
+    @instrumentation.timed("analytics.analyze_patterns")
     def analyze_patterns(self):
         """تحليل أنماط الأداء وتوليد توصيات"""
-        # الحصول على آخر 5 نتائج معايرة (أو أقل)
-        calibrations = self.performance_history["calibration_history"]
-        recent_calibrations = calibrations[-5:] if len(calibrations) >= 5 else calibrations
-        
-        if not recent_calibrations:
+        if not len(self.history_store):
             return
         
-        # تحليل اتجاهات الأداء
-        accuracy_trend = self.calculate_trend([cal["accuracy_score"] for cal in recent_calibrations])
-        speed_trend = self.calculate_trend([cal["speed_score"] for cal in recent_calibrations])
-        tracking_trend = self.calculate_trend([cal["tracking_score"] for cal in recent_calibrations])
+        # اتجاهات الأداء على آخر نتائج المعايرة (تُحدَّث تدريجيًا مع كل نتيجة)
+        slopes = self.trend_engine.slopes()
+        accuracy_trend = slopes["accuracy_trend"]
+        speed_trend = slopes["speed_trend"]
+        tracking_trend = slopes["tracking_trend"]
         
-        # تخزين أنماط الاستخدام
+        # تخزين أنماط الاستخدام (ولا يتغير إصدار الاتجاهات إلا إذا تغيرت قيمها)
+        usage_patterns = self.performance_history["usage_patterns"]
+        if any(usage_patterns.get(name) != value for name, value in slopes.items()):
+            self._mark_changed("trends")
         self.performance_history["usage_patterns"] = {
             "accuracy_trend": accuracy_trend,
             "speed_trend": speed_trend,
@@ -130,6 +2124,27 @@ class PerformanceData:
         }
         
         # توليد توصيات بناءً على الأنماط
+        latest_overall = self.history_store.latest("overall_score", 1)[0]
+        recommendations = self.generate_recommendations(slopes, latest_overall)
+        
+        # إضافة التوصيات إلى التاريخ
+        if recommendations:
+            for rec in recommendations:
+                rec["timestamp"] = time.time()
+                rec["date"] = datetime.datetime.fromtimestamp(rec["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            
+            self._mark_changed("recommendations")
+            self.performance_history["recommendations"] = recommendations + self.performance_history["recommendations"]
+            # الاحتفاظ بآخر 20 توصية فقط
+            self.performance_history["recommendations"] = self.performance_history["recommendations"][:20]
+    
+    @staticmethod
+    def generate_recommendations(trends, latest_overall):
+        """توليد توصيات من اتجاهات الأداء وآخر نتيجة عامة (دون طابع زمني)"""
+        accuracy_trend = trends["accuracy_trend"]
+        speed_trend = trends["speed_trend"]
+        tracking_trend = trends["tracking_trend"]
+        
         recommendations = []
         
         # توصيات دقة التصويب
@@ -169,149 +2184,271 @@ class PerformanceData:
             })
         
         # توصيات عامة
-        latest_cal = recent_calibrations[-1]
-        if latest_cal["overall_score"] < 5:
+        if latest_overall < 5:
             recommendations.append({
                 "type": "critical",
                 "component": "overall",
                 "message": "الأداء العام منخفض. يوصى بإجراء المزيد من تدريبات المعايرة وضبط الإعدادات."
             })
-        elif latest_cal["overall_score"] > 8:
+        elif latest_overall > 8:
             recommendations.append({
                 "type": "positive",
                 "component": "overall",
                 "message": "أداء ممتاز! لديك إعدادات مثالية للماوس."
             })
         
-        # إضافة التوصيات إلى التاريخ
-        if recommendations:
-            for rec in recommendations:
-                rec["timestamp"] = time.time()
-                rec["date"] = datetime.datetime.fromtimestamp(rec["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-            
-            self.performance_history["recommendations"] = recommendations + self.performance_history["recommendations"]
-            # الاحتفاظ بآخر 20 توصية فقط
-            self.performance_history["recommendations"] = self.performance_history["recommendations"][:20]
-    
-    def calculate_trend(self, values):
-        """حساب اتجاه التغير في مجموعة قيم"""
-        if len(values) < 2:
-            return 0
-        
-        # استخدام معامل الانحدار البسيط
-        x = np.arange(len(values))
-        slope, _ = np.polyfit(x, values, 1)
-        
-        return slope
+        return recommendations
     
     def get_recommendations(self, limit=5):
         """الحصول على أحدث التوصيات"""
         return self.performance_history["recommendations"][:limit]
     
     def get_calibration_history(self, limit=10):
-        """الحصول على تاريخ المعايرة"""
-        return self.performance_history["calibration_history"][-limit:]
+        """الحصول على أحدث limit نتيجة معايرة حسب الطابع الزمني، من الأقدم إلى الأحدث"""
+        if limit <= len(self.recent_records) or len(self.recent_records) == len(self.history_store):
+            return list(self.recent_records)[-limit:]
+        
+        # طلب أقدم مما في الذاكرة: ما لم يُكتب بعد يؤخذ من طابور الكاتب دون انتظاره
+        return self._read_records(self.history_store.chronological_positions(limit),
+                                  self.writer.unwritten_records())
+    
+    def _read_records(self, positions, unwritten=()):
+        """قراءة السجلات الكاملة في مواضع المخزن العمودي (تطابق مواضعها في وحدة التخزين)
+
+        unwritten: السجلات الأخيرة التي لم يكتبها كاتب الخلفية بعد
+        """
+        written = len(self.history_store) - len(unwritten)
+        records = []
+        # قراءة كل مجموعة مواضع متتالية دفعة واحدة
+        for run in np.split(positions, np.flatnonzero(np.diff(positions) != 1) + 1):
+            if not len(run):
+                continue
+            start, stop = int(run[0]), int(run[-1]) + 1
+            if start < written:
+                records.extend(self.storage.get_records_range(start, min(stop, written)))
+            if stop > written:
+                records.extend(unwritten[max(start - written, 0):stop - written])
+        return records
     
     def get_recent_trends(self):
         """الحصول على اتجاهات الأداء الأخيرة"""
         return self.performance_history.get("usage_patterns", {})
     
-    def get_performance_chart_data(self):
-        """الحصول على بيانات الأداء لعرضها في الرسم البياني"""
-        history = self.performance_history["calibration_history"]
-        if not history:
-            return None
-        
-        # جمع البيانات للرسم البياني
-        dates = [cal["date"].split()[0] for cal in history]
-        accuracy = [cal["accuracy_score"] for cal in history]
-        speed = [cal["speed_score"] for cal in history]
-        tracking = [cal["tracking_score"] for cal in history]
-        overall = [cal["overall_score"] for cal in history]
-        
+    def get_metric_columns(self, limit=None):
+        """الحصول على أعمدة المؤشرات مرتبة زمنيًا (لأحدث limit سجل عند تحديده)
+
+        تُعاد عروض NumPy بدون نسخ ما دام التاريخ مرتبًا زمنيًا بترتيب الإضافة.
+        """
+        store = self.history_store
         return {
-            "dates": dates,
-            "accuracy": accuracy,
-            "speed": speed,
-            "tracking": tracking,
-            "overall": overall
+            "accuracy": store.latest("accuracy_score", limit),
+            "speed": store.latest("speed_score", limit),
+            "tracking": store.latest("tracking_score", limit),
+            "overall": store.latest("overall_score", limit),
+            "response_time": store.latest("response_time", limit)
         }
+    
+    def get_detailed_stats(self, window="recent"):
+        """الحصول على الإحصائيات المتراكمة لكل مؤشر
+
+        window: "recent" لآخر stats_window نتيجة، "all" لكل التاريخ، أو يوم بصيغة YYYY-MM-DD
+        """
+        if window == "recent":
+            return self.recent_stats.summary()
+        if window == "all":
+            if self.overall_stats is None:
+                self.overall_stats = MetricStats.from_history(self.history_store)
+            return self.overall_stats.summary()
+        aggregates = self._daily_aggregates.get(window)
+        if aggregates is None:
+            aggregates = MetricStats.from_daily(self.performance_history["daily_stats"].get(window))
+        return aggregates.summary()
+    
+    def get_performance_chart_data(self, resolution="all", max_points=CHART_MAX_POINTS):
+        """الحصول على بيانات الأداء لعرضها في الرسم البياني
+
+        resolution: "all" لكل النتائج، أو "day"/"week"/"month" لمتوسطات الفترات.
+        يُقلَّص عدد النقاط إلى max_points بخوارزمية LTTB مع الحفاظ على شكل المنحنى.
+        """
+        if not len(self.history_store):
+            return None
+        
+        if resolution == "all":
+            # أعمدة المخزن تُعاد مباشرة دون بناء قوائم جديدة
+            data = self.get_metric_columns()
+            data["dates"] = self.history_store.dates()
+        else:
+            if not self.rollups.built:
+                self.rollups.rebuild(self.history_store)
+            data = self.rollups.series(resolution)
+        
+        count = len(data["overall"])
+        x = np.arange(count)
+        if max_points and count > max_points:
+            # اختيار النقاط حسب المؤشر الإجمالي واستخدامها لبقية المؤشرات
+            indices = lttb_indices(x, data["overall"], max_points)
+            data = {key: values[indices] for key, values in data.items()}
+            x = indices
+        
+        data["x"] = x
+        data["resolution"] = resolution
+        return data
 
 
 class PerformanceChart(FigureCanvas):
-    """رسم بياني لعرض أداء الماوس"""
+    """رسم بياني لعرض أداء الماوس
+
+    تُنشأ عناصر الرسم مرة واحدة ثم تُحدَّث بياناتها فقط، وتُعاد رسم الخطوط فوق خلفية
+    محفوظة (blitting) ما لم يتغير محور x أو نوع المخطط.
+    """
+    LINE_SERIES = [
+        # (المؤشر، النمط، التسمية، العلامة، سماكة الخط)
+        ("accuracy", 'r-', "الدقة", 'o', 1.5),
+        ("speed", 'g-', "السرعة", 's', 1.5),
+        ("tracking", 'b-', "التتبع", '^', 1.5),
+        ("overall", 'k-', "الإجمالي", 'd', 2)
+    ]
+    BAR_SERIES = [
+        ("accuracy", "الدقة", '#ff9999'),
+        ("speed", "السرعة", '#99ff99'),
+        ("tracking", "التتبع", '#9999ff'),
+        ("overall", "الإجمالي", '#ffcc99')
+    ]
+    X_MARGIN = 0.1  # مساحة إضافية على محور x حتى لا تتطلب كل نتيجة جديدة إعادة رسم كاملة
+    
     def __init__(self, parent=None, width=5, height=4, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.axes = self.fig.add_subplot(111)
         super().__init__(self.fig)
         self.setParent(parent)
+        
+        self.chart_type = None
+        self.lines = {}
+        self.bars = None
+        self._background = None
+        self._x_limit = None
+        self._resolution = None
+        
+        # حفظ الخلفية بعد كل رسم كامل (بما في ذلك تغيير الحجم)
+        self.mpl_connect('draw_event', self._on_draw)
+    
+    def _on_draw(self, event):
+        """حفظ خلفية المحاور ورسم العناصر المتحركة فوقها"""
+        self._background = self.copy_from_bbox(self.axes.bbox)
+        self._draw_animated()
+    
+    def _draw_animated(self):
+        for line in self.lines.values():
+            self.axes.draw_artist(line)
+    
+    def _build(self, chart_type):
+        """إنشاء عناصر الرسم لنوع المخطط (مرة واحدة عند تغيير النوع)"""
+        self.axes.clear()
+        self.lines = {}
+        self.bars = None
+        self._x_limit = None
+        self._resolution = None
+        
+        if chart_type == "line":
+            for key, style, label, marker, linewidth in self.LINE_SERIES:
+                line, = self.axes.plot([], [], style, label=label, marker=marker,
+                                       linewidth=linewidth, animated=True)
+                self.lines[key] = line
+            self.axes.set_title("تطور الأداء عبر الزمن")
+        elif chart_type == "bar":
+            self.bars = self.axes.bar([label for _, label, _ in self.BAR_SERIES], [0] * len(self.BAR_SERIES),
+                                      color=[color for _, _, color in self.BAR_SERIES])
+        
+        self.axes.set_ylim(0, 10.5)
+        self.axes.set_ylabel("الدرجة (من 10)")
+        self.axes.grid(True, linestyle='--', alpha=0.7)
+        if self.lines:
+            self.axes.legend(loc='upper left')
+        
+        self.chart_type = chart_type
+    
+    def _update_x_axis(self, x, dates):
+        """تحديث حدود محور x وتسمياته (يتطلب رسمًا كاملًا)"""
+        x_max = int(x[-1]) if len(x) else 0
+        self._x_limit = x_max * (1 + self.X_MARGIN) + 1
+        self.axes.set_xlim(-0.5, self._x_limit)
+        
+        # تبسيط التواريخ إذا كانت كثيرة
+        tick_count = min(len(x), 10)
+        x_ticks = np.unique(np.linspace(0, x_max, tick_count).astype(np.int64)) if tick_count else []
+        # تسمية كل علامة بتاريخ أقرب نقطة مرسومة
+        nearest = np.minimum(np.searchsorted(x, x_ticks), len(x) - 1)
+        self.axes.set_xticks(x_ticks)
+        self.axes.set_xticklabels([str(dates[i]) for i in nearest], rotation=45)
+        self.fig.tight_layout()
     
+    @instrumentation.timed("chart.update_chart")
     def update_chart(self, data, chart_type="line"):
         """تحديث الرسم البياني بالبيانات الجديدة"""
         if not data:
             return
         
-        # مسح الرسم البياني السابق
-        self.axes.clear()
+        if chart_type != self.chart_type:
+            self._build(chart_type)
         
         dates = data["dates"]
         
-        # تبسيط التواريخ إذا كانت كثيرة
-        if len(dates) > 10:
-            step = len(dates) // 10
-            x_ticks = range(0, len(dates), step)
-            x_labels = [dates[i] for i in x_ticks]
-        else:
-            x_ticks = range(len(dates))
-            x_labels = dates
-        
         if chart_type == "line":
-            # رسم خطوط منفصلة لكل مؤشر
-            self.axes.plot(data["accuracy"], 'r-', label="الدقة", marker='o')
-            self.axes.plot(data["speed"], 'g-', label="السرعة", marker='s')
-            self.axes.plot(data["tracking"], 'b-', label="التتبع", marker='^')
-            self.axes.plot(data["overall"], 'k-', label="الإجمالي", marker='d', linewidth=2)
+            x = data.get("x", np.arange(len(dates)))
+            for key, line in self.lines.items():
+                line.set_data(x, data[key])
             
-            self.axes.set_xticks(x_ticks)
-            self.axes.set_xticklabels(x_labels, rotation=45)
-            self.axes.set_ylim(0, 10.5)
-            self.axes.set_ylabel("الدرجة (من 10)")
-            self.axes.set_title("تطور الأداء عبر الزمن")
+            # إعادة الرسم الكامل فقط عند تجاوز حدود المحور أو تغير الدقة الزمنية
+            x_max = x[-1]
+            resolution = data.get("resolution")
+            if (self._x_limit is None or resolution != self._resolution or x_max > self._x_limit or
+                    x_max < self._x_limit / (1 + 2 * self.X_MARGIN) - 1):
+                self._resolution = resolution
+                self._update_x_axis(x, dates)
+                self.draw()
+                instrumentation.count("chart.full_redraws")
+            elif self._background is None:
+                self.draw()
+                instrumentation.count("chart.full_redraws")
+            else:
+                # رسم جزئي: استعادة الخلفية المحفوظة ثم رسم الخطوط فقط
+                self.restore_region(self._background)
+                self._draw_animated()
+                self.blit(self.axes.bbox)
+                instrumentation.count("chart.blits")
             
         elif chart_type == "bar":
-            # رسم مخطط شريطي لآخر نتيجة
+            # مخطط شريطي لآخر نتيجة
             last_idx = len(dates) - 1
-            categories = ["الدقة", "السرعة", "التتبع", "الإجمالي"]
-            values = [data["accuracy"][last_idx], data["speed"][last_idx], 
-                    data["tracking"][last_idx], data["overall"][last_idx]]
-            colors = ['#ff9999', '#99ff99', '#9999ff', '#ffcc99']
-            
-            self.axes.bar(categories, values, color=colors)
-            self.axes.set_ylim(0, 10.5)
-            self.axes.set_ylabel("الدرجة (من 10)")
-            self.axes.set_title(f"نتائج آخر معايرة ({dates[last_idx]})")
-        
-        self.axes.grid(True, linestyle='--', alpha=0.7)
-        self.axes.legend(loc='upper left')
-        
-        self.fig.tight_layout()
-        self.draw()
+            for bar, (key, _, _) in zip(self.bars, self.BAR_SERIES):
+                bar.set_height(data[key][last_idx])
+            self.axes.set_title(f"نتائج آخر معايرة ({str(dates[last_idx])})")
+            self.draw_idle()
+            instrumentation.count("chart.full_redraws")
 
 
 class AnalyticsWidget(QWidget):
     """واجهة المستخدم لعرض التحليلات المتقدمة"""
+    CHART_RESOLUTIONS = [
+        ("كل النتائج", "all"),
+        ("يومي", "day"),
+        ("أسبوعي", "week"),
+        ("شهري", "month")
+    ]
+    
     def __init__(self, performance_data, parent=None):
         super().__init__(parent)
         self.performance_data = performance_data
+        # آخر إصدار بيانات عُرض في كل قسم
+        self.rendered_versions = {}
         self.init_ui()
         
         # تحديث البيانات عند التشغيل
-        self.update_data()
+        self.update_data(force=True)
         
-        # إعداد مؤقت للتحديث التلقائي
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_data)
-        self.timer.start(60000)  # تحديث كل دقيقة
+        # التحديث عند إضافة نتيجة جديدة بدلاً من التحديث الدوري
+        if self.performance_data.notifier is not None:
+            self.performance_data.notifier.data_changed.connect(self.on_data_changed)
     
     def init_ui(self):
         """إعداد واجهة المستخدم"""
@@ -347,8 +2484,15 @@ class AnalyticsWidget(QWidget):
         chart_controls.addWidget(QLabel("نوع المخطط:"))
         chart_controls.addWidget(self.chart_type_combo)
         
+        self.resolution_combo = QComboBox()
+        for label, resolution in self.CHART_RESOLUTIONS:
+            self.resolution_combo.addItem(label, resolution)
+        self.resolution_combo.currentIndexChanged.connect(self.update_chart)
+        chart_controls.addWidget(QLabel("الدقة الزمنية:"))
+        chart_controls.addWidget(self.resolution_combo)
+        
         refresh_btn = QPushButton("تحديث")
-        refresh_btn.clicked.connect(self.update_data)
+        refresh_btn.clicked.connect(lambda: self.update_data(force=True))
         chart_controls.addWidget(refresh_btn)
         
         chart_layout.addLayout(chart_controls)
@@ -420,27 +2564,36 @@ class AnalyticsWidget(QWidget):
         
         return tab
     
-    def update_data(self):
-        """تحديث جميع البيانات"""
-        # تحديث الرسم البياني
-        self.update_chart()
-        
-        # تحديث ملخص الأداء
-        self.update_summary()
-        
-        # تحديث الإحصائيات المفصلة
-        self.update_detailed_stats()
-        
-        # تحديث التوصيات
-        self.update_recommendations()
+    def on_data_changed(self, version):
+        """معالجة إشارة تغير بيانات الأداء"""
+        self.update_data()
+    
+    def update_data(self, force=False):
+        """تحديث الأقسام التي تغيرت بياناتها منذ آخر عرض (أو جميعها عند force)"""
+        sections = [
+            # (القسم، أقسام البيانات التي يعتمد عليها، دالة التحديث)
+            ("chart", ("history",), self.update_chart),
+            ("summary", ("history",), self.update_summary),
+            ("detailed_stats", ("history", "trends"), self.update_detailed_stats),
+            ("recommendations", ("recommendations",), self.update_recommendations)
+        ]
+        
+        for section, dependencies, update in sections:
+            version = max(self.performance_data.get_data_version(dependency) for dependency in dependencies)
+            if force or self.rendered_versions.get(section) != version:
+                update()
+                self.rendered_versions[section] = version
     
     def update_chart(self):
         """تحديث الرسم البياني"""
-        chart_data = self.performance_data.get_performance_chart_data()
+        chart_type = "line" if self.chart_type_combo.currentIndex() == 0 else "bar"
+        # المخطط الشريطي يعرض آخر معايرة فعلية وليس متوسط فترة
+        resolution = self.resolution_combo.currentData() if chart_type == "line" else "all"
+        
+        chart_data = self.performance_data.get_performance_chart_data(resolution)
         if not chart_data:
             return
         
-        chart_type = "line" if self.chart_type_combo.currentIndex() == 0 else "bar"
         self.main_chart.update_chart(chart_data, chart_type)
     
     def update_summary(self):
@@ -465,53 +2618,53 @@ class AnalyticsWidget(QWidget):
     
     def update_detailed_stats(self):
         """تحديث الإحصائيات المفصلة"""
-        history = self.performance_data.get_calibration_history()
-        if not history:
+        # الإحصائيات محسوبة مسبقًا عند إضافة كل نتيجة
+        stats = self.performance_data.get_detailed_stats("recent")
+        if not stats["overall"]["count"]:
             self.detailed_stats_label.setText("لا توجد بيانات كافية للتحليل.")
             return
         
-        # حساب المتوسطات والقيم القصوى
-        accuracy_values = [cal["accuracy_score"] for cal in history]
-        speed_values = [cal["speed_score"] for cal in history]
-        tracking_values = [cal["tracking_score"] for cal in history]
-        overall_values = [cal["overall_score"] for cal in history]
+        accuracy_stats = stats["accuracy"]
+        speed_stats = stats["speed"]
+        tracking_stats = stats["tracking"]
+        overall_stats = stats["overall"]
         
         stats_text = "<b>تحليل أداء المعايرة:</b><br><br>"
         
         # إحصائيات الدقة
         stats_text += (
             f"<b>دقة التصويب:</b><br>"
-            f"• المتوسط: {np.mean(accuracy_values):.2f}/10<br>"
-            f"• أعلى قيمة: {np.max(accuracy_values):.2f}/10<br>"
-            f"• أدنى قيمة: {np.min(accuracy_values):.2f}/10<br>"
-            f"• الانحراف المعياري: {np.std(accuracy_values):.2f}<br><br>"
+            f"• المتوسط: {accuracy_stats['mean']:.2f}/10<br>"
+            f"• أعلى قيمة: {accuracy_stats['max']:.2f}/10<br>"
+            f"• أدنى قيمة: {accuracy_stats['min']:.2f}/10<br>"
+            f"• الانحراف المعياري: {accuracy_stats['std']:.2f}<br><br>"
         )
         
         # إحصائيات السرعة
         stats_text += (
             f"<b>سرعة الاستجابة:</b><br>"
-            f"• المتوسط: {np.mean(speed_values):.2f}/10<br>"
-            f"• أعلى قيمة: {np.max(speed_values):.2f}/10<br>"
-            f"• أدنى قيمة: {np.min(speed_values):.2f}/10<br>"
-            f"• الانحراف المعياري: {np.std(speed_values):.2f}<br><br>"
+            f"• المتوسط: {speed_stats['mean']:.2f}/10<br>"
+            f"• أعلى قيمة: {speed_stats['max']:.2f}/10<br>"
+            f"• أدنى قيمة: {speed_stats['min']:.2f}/10<br>"
+            f"• الانحراف المعياري: {speed_stats['std']:.2f}<br><br>"
         )
         
         # إحصائيات التتبع
         stats_text += (
             f"<b>تتبع الأهداف:</b><br>"
-            f"• المتوسط: {np.mean(tracking_values):.2f}/10<br>"
-            f"• أعلى قيمة: {np.max(tracking_values):.2f}/10<br>"
-            f"• أدنى قيمة: {np.min(tracking_values):.2f}/10<br>"
-            f"• الانحراف المعياري: {np.std(tracking_values):.2f}<br><br>"
+            f"• المتوسط: {tracking_stats['mean']:.2f}/10<br>"
+            f"• أعلى قيمة: {tracking_stats['max']:.2f}/10<br>"
+            f"• أدنى قيمة: {tracking_stats['min']:.2f}/10<br>"
+            f"• الانحراف المعياري: {tracking_stats['std']:.2f}<br><br>"
         )
         
         # إحصائيات المؤشر الإجمالي
         stats_text += (
             f"<b>المؤشر الإجمالي:</b><br>"
-            f"• المتوسط: {np.mean(overall_values):.2f}/10<br>"
-            f"• أعلى قيمة: {np.max(overall_values):.2f}/10<br>"
-            f"• أدنى قيمة: {np.min(overall_values):.2f}/10<br>"
-            f"• الانحراف المعياري: {np.std(overall_values):.2f}<br>"
+            f"• المتوسط: {overall_stats['mean']:.2f}/10<br>"
+            f"• أعلى قيمة: {overall_stats['max']:.2f}/10<br>"
+            f"• أدنى قيمة: {overall_stats['min']:.2f}/10<br>"
+            f"• الانحراف المعياري: {overall_stats['std']:.2f}<br>"
         )
         
         self.detailed_stats_label.setText(stats_text)
@@ -586,3 +2739,184 @@ class AnalyticsWidget(QWidget):
                 recommendations_text += "<br>"
         
         self.recommendations_label.setText(recommendations_text)
+
+
+# ملف بيانات الأداء الذي يُجمع من كل جهاز
+FLEET_DATA_FILE = "performance_data.json"
+SCORE_BINS = np.linspace(0, 10, 11)  # فئات توزيع النتيجة العامة
+
+
+def detect_storage_backend(user_dir, filename=FLEET_DATA_FILE):
+    """نوع بيانات الأداء في مجلد مستخدم: اسم من STORAGE_BACKENDS، أو "json" للملف القديم، أو None"""
+    log_dir = os.path.join(user_dir, LOG_DIR_NAME)
+    if os.path.isdir(log_dir):
+        if os.path.exists(os.path.join(log_dir, "index.json")) or os.path.exists(os.path.join(log_dir, "checkpoint.json")):
+            return "log"
+        if any(CalibrationLog.SEGMENT_PATTERN.match(name) for name in os.listdir(log_dir)):
+            return "log"
+    if os.path.exists(os.path.join(user_dir, SQLITE_FILE_NAME)):
+        return "sqlite"
+    # الملف القديم الذي لم يُرحَّل بعد (بعد الترحيل تكون بياناته في وحدة التخزين)
+    if os.path.exists(os.path.join(user_dir, filename)):
+        return "json"
+    return None
+
+
+def find_performance_files(root, filename=FLEET_DATA_FILE):
+    """البحث عن مجلدات بيانات الأداء في شجرة مجلدات (مولّد فلا تُجمع كل المسارات مسبقًا)
+
+    يعيد (مجلد المستخدم، نوع بياناته) لكل مستخدم حسب detect_storage_backend.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        backend = detect_storage_backend(dirpath, filename)
+        if backend is not None:
+            # مجلدات المستخدم الفرعية (أجزاء السجل والمسارات) ليست مستخدمين آخرين
+            dirnames[:] = []
+            yield dirpath, backend
+
+
+def load_user_history(user_dir, backend, filename=FLEET_DATA_FILE):
+    """تحميل القيم الرقمية لتاريخ مستخدم واحد في مخزن عمودي في الذاكرة دون تعديل بياناته"""
+    if backend == "json":
+        with open(os.path.join(user_dir, filename), 'r', encoding='utf-8') as f:
+            history = json.load(f).get("calibration_history", [])
+        store = CalibrationHistoryStore(capacity=max(len(history), 1))
+        store.extend(history)
+        return store
+    
+    # فتح وحدة التخزين للقراءة فقط: لا ترقية لمخطط القاعدة ولا إعادة كتابة لفهرس السجل
+    storage = STORAGE_BACKENDS[backend](user_dir, read_only=True)
+    try:
+        storage.load()
+        store = CalibrationHistoryStore(capacity=max(storage.count(), 1))
+        storage.load_metrics(store)
+    finally:
+        storage.close()
+    return store
+
+
+def analyze_performance_file(user_dir, backend, trend_window=5, filename=FLEET_DATA_FILE):
+    """تحليل بيانات أداء مستخدم واحد
+
+    يعيد (ملخص المستخدم، إحصائيات المؤشرات، توزيع النتيجة العامة) ليُدمج في تقرير المجموعة.
+    """
+    store = load_user_history(user_dir, backend, filename)
+    
+    trend_engine = TrendEngine(trend_window)
+    trend_engine.prime(store)
+    slopes = trend_engine.slopes()
+    metric_stats = MetricStats.from_history(store)
+    histogram = np.histogram(store.column("overall_score"), bins=SCORE_BINS)[0]
+    
+    recommendations = collections.Counter()
+    if len(store):
+        latest_overall = store.latest("overall_score", 1)[0]
+        for rec in PerformanceData.generate_recommendations(slopes, latest_overall):
+            recommendations[f"{rec['component']}:{rec['type']}"] += 1
+    
+    user_report = {
+        "calibrations": len(store),
+        "stats": metric_stats.summary(),
+        "score_histogram": histogram.tolist(),
+        "trends": slopes,
+        "recommendations": dict(recommendations)
+    }
+    return user_report, metric_stats, histogram
+
+
+def _analyze_fleet_file(entry, root, trend_window, filename=FLEET_DATA_FILE):
+    """مهمة عملية التحليل: لا تُرفع الأخطاء حتى لا يتوقف التقرير بسبب ملف تالف"""
+    path, backend = entry
+    user = os.path.relpath(path, root)
+    try:
+        user_report, metric_stats, histogram = analyze_performance_file(path, backend, trend_window, filename)
+    except Exception as e:
+        return {"user": user, "path": path, "storage": backend, "error": str(e)}, None, None
+    user_report = dict(user=user, path=path, storage=backend, **user_report)
+    return user_report, metric_stats, histogram
+
+
+class FleetReport:
+    """تجميع ملخصات المستخدمين تدريجيًا في تقرير للمجموعة كلها"""
+    def __init__(self):
+        self.users = 0
+        self.failed = 0
+        self.stats = MetricStats()
+        self.histogram = np.zeros(len(SCORE_BINS) - 1, dtype=np.int64)
+        self.trends = {name: RunningStats() for name in TrendEngine.METRICS}
+        self.recommendations = collections.Counter()
+
+    def add(self, user_report, metric_stats, histogram):
+        if "error" in user_report:
+            self.failed += 1
+            return
+        self.users += 1
+        self.stats.merge(metric_stats)
+        self.histogram += histogram
+        if user_report["calibrations"]:
+            for name, slope in user_report["trends"].items():
+                self.trends[name].add(slope)
+        self.recommendations.update(user_report["recommendations"])
+
+    def summary(self):
+        return {
+            "users": self.users,
+            "failed": self.failed,
+            "calibrations": self.stats.count,
+            "stats": self.stats.summary(),
+            "score_bins": SCORE_BINS.tolist(),
+            "score_histogram": self.histogram.tolist(),
+            "trends": {name: stats.summary() for name, stats in self.trends.items()},
+            "recommendations": dict(self.recommendations)
+        }
+
+
+def run_fleet_analysis(root, output, workers=None, trend_window=5, filename=FLEET_DATA_FILE, chunksize=4):
+    """تحليل بيانات كل المستخدمين تحت root على كل الأنوية وكتابة التقرير كسطور JSON
+
+    يُكتب ملخص كل مستخدم فور وصوله ثم يُهمل، فلا يزداد استهلاك الذاكرة مع عدد المستخدمين،
+    ويُكتب ملخص المجموعة في السطر الأخير.
+    """
+    report = FleetReport()
+    task = functools.partial(_analyze_fleet_file, root=root, trend_window=trend_window, filename=filename)
+    with multiprocessing.Pool(workers) as pool:
+        for user_report, metric_stats, histogram in pool.imap_unordered(
+                task, find_performance_files(root, filename), chunksize):
+            if "error" in user_report:
+                print(f"خطأ في تحليل {user_report['path']}: {user_report['error']}", file=sys.stderr)
+            output.write(json.dumps(dict(type="user", **user_report), ensure_ascii=False) + "\n")
+            report.add(user_report, metric_stats, histogram)
+    
+    fleet = report.summary()
+    output.write(json.dumps(dict(type="fleet", **fleet), ensure_ascii=False) + "\n")
+    output.flush()
+    return fleet
+
+
+def main(argv=None):
+    """نقطة الدخول من سطر الأوامر لتحليل بيانات مجموعة من المستخدمين (لا تحتاج Qt)"""
+    parser = argparse.ArgumentParser(description="تحليل بيانات الأداء المجمعة من عدة أجهزة")
+    parser.add_argument("root", help="المجلد الذي يحتوي على ملفات بيانات المستخدمين")
+    parser.add_argument("-o", "--output", help="ملف التقرير (سطور JSON)، والافتراضي هو المخرج القياسي")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="عدد العمليات المتوازية (الافتراضي عدد الأنوية)")
+    parser.add_argument("--trend-window", type=int, default=5, help="عدد آخر النتائج المستخدمة في حساب الاتجاه")
+    parser.add_argument("--filename", default=FLEET_DATA_FILE,
+                        help="اسم ملف بيانات الأداء القديم (JSON) للمستخدمين الذين لم تُرحَّل بياناتهم")
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.root):
+        print(f"خطأ: المجلد غير موجود: {args.root}", file=sys.stderr)
+        return 1
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            run_fleet_analysis(args.root, output, args.workers, args.trend_window, args.filename)
+    else:
+        run_fleet_analysis(args.root, sys.stdout, args.workers, args.trend_window, args.filename)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""قياس زمن العمليات الحرجة وعدّادات الأحداث داخل التطبيق
+
+القياس معطل افتراضيًا، وعندها لا يكلف كل استدعاء مقيس إلا فحص علم واحد.
+يُفعَّل بمتغير البيئة MOUSETUNER_INSTRUMENTATION=1 أو باستدعاء instrumentation.enable().
+"""
+import os
+import json
+import time
+import atexit
+import datetime
+import threading
+import functools
+import collections
+
+
+class _NullSpan:
+    """نطاق فارغ يُعاد عند تعطيل القياس (كائن واحد مشترك دون أي تخصيص)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """نطاق زمني يُسجَّل عند الخروج منه"""
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class SpanStats:
+    """إحصائيات متراكمة لنطاق واحد مع توزيع الأزمنة على حدود ثابتة"""
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)  # بالثواني
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(self.BUCKETS) + 1)  # العنصر الأخير لما يتجاوز آخر حد
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = max(self.max, duration)
+        for i, bound in enumerate(self.BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "min_ms": (self.min or 0.0) * 1000,
+            "max_ms": self.max * 1000
+        }
+
+
+class Instrumentation:
+    """سجل النطاقات الزمنية والعدادات
+
+    تُحفظ آخر ring_size نطاق في حلقة محدودة، إضافة إلى إحصائيات متراكمة لكل اسم.
+    """
+    RING_SIZE = 4096
+
+    def __init__(self, enabled=False, ring_size=RING_SIZE, log_dir=None):
+        self.enabled = enabled
+        self.log_dir = log_dir or os.path.expanduser("~/.mousetuner/logs")
+        self._lock = threading.Lock()
+        self.ring = collections.deque(maxlen=ring_size)
+        self.spans = {}
+        self.counters = collections.Counter()
+        self.started = time.time()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """مسح كل القياسات المسجلة"""
+        with self._lock:
+            self.ring.clear()
+            self.spans = {}
+            self.counters = collections.Counter()
+            self.started = time.time()
+
+    def span(self, name):
+        """نطاق زمني للاستخدام مع with"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """مزخرف يقيس زمن كل استدعاء للدالة باسم name"""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        """زيادة عداد أحداث"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+    def record(self, name, duration):
+        """تسجيل نطاق منتهٍ مدته duration ثانية"""
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(duration)
+            self.ring.append((time.time(), name, duration, threading.current_thread().name))
+
+    def snapshot(self):
+        """نسخة من القياسات الحالية كقاموس قابل للتحويل إلى JSON"""
+        with self._lock:
+            return {
+                "started": self.started,
+                "captured": time.time(),
+                "spans": {name: stats.to_dict() for name, stats in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "recent": [
+                    {"time": timestamp, "name": name, "duration_ms": duration * 1000, "thread": thread}
+                    for timestamp, name, duration, thread in self.ring
+                ]
+            }
+
+    def dump(self, path=None):
+        """حفظ القياسات في ملف JSON داخل مجلد السجلات ويعيد مساره"""
+        if path is None:
+            stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(self.log_dir, f"instrumentation-{stamp}.json")
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"خطأ في حفظ بيانات القياس: {e}")
+            return None
+        return path
+
+    def export_prometheus(self, path=None):
+        """تصدير القياسات بتنسيق Prometheus النصي، مع حفظها في path إن حُدد"""
+        with self._lock:
+            spans = {name: (stats.count, stats.total, list(stats.buckets)) for name, stats in self.spans.items()}
+            counters = dict(self.counters)
+
+        lines = [
+            "# HELP mousetuner_span_seconds Duration of instrumented operations.",
+            "# TYPE mousetuner_span_seconds histogram"
+        ]
+        for name in sorted(spans):
+            count, total, buckets = spans[name]
+            label = _label_value(name)
+            cumulative = 0
+            for bound, bucket in zip(SpanStats.BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'mousetuner_span_seconds_bucket{{span="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'mousetuner_span_seconds_bucket{{span="{label}",le="+Inf"}} {count}')
+            lines.append(f'mousetuner_span_seconds_sum{{span="{label}"}} {total}')
+            lines.append(f'mousetuner_span_seconds_count{{span="{label}"}} {count}')
+
+        lines.append("# HELP mousetuner_events_total Count of instrumented events.")
+        lines.append("# TYPE mousetuner_events_total counter")
+        for name in sorted(counters):
+            lines.append(f'mousetuner_events_total{{event="{_label_value(name)}"}} {counters[name]}')
+        text = "\n".join(lines) + "\n"
+
+        if path is not None:
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                # كتابة ذرية حتى لا يقرأ جامع المقاييس ملفًا ناقصًا
+                with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(path + ".tmp", path)
+            except Exception as e:
+                print(f"خطأ في تصدير بيانات القياس: {e}")
+        return text
+
+
+def _label_value(value):
+    """تهريب قيمة التسمية حسب تنسيق Prometheus"""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# الكائن المشترك الذي تستخدمه وحدات التطبيق
+instrumentation = Instrumentation(enabled=os.environ.get("MOUSETUNER_INSTRUMENTATION", "") not in ("", "0"))
+if instrumentation.enabled:
+    # عند التفعيل من البيئة تُحفظ القياسات تلقائيًا عند إنهاء التطبيق
+    atexit.register(instrumentation.dump)
@@ -0,0 +1,99 @@
+"""أدوات مشتركة للاختبارات: تحميل وحدات التطبيق من مساراتها وبيئة معزولة لكل اختبار"""
+import os
+import sys
+import datetime
+import importlib.util
+
+import pytest
+
+# الاختبارات تعمل دون شاشة
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALYTICS_MODULE = os.path.join(ROOT_DIR, "home", "peter", "tempo-api", "projects",
+                                "915e5519-c647-44f3-80ba-255399fcbf8e", "analytics-module.py")
+DEVICES_MODULE = os.path.join(ROOT_DIR, "devices-module.py")
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# شجرتا ملفات لأجهزة إدخال Linux: مع procfs، ومع sysfs وحده
+PROCFS_ROOT = os.path.join(FIXTURES_DIR, "linux_input", "procfs")
+SYSFS_ROOT = os.path.join(FIXTURES_DIR, "linux_input", "sysfs")
+
+# وحدات الجذر تُستورد بأسمائها كما عند تشغيل التطبيق من مجلده
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def load_module(path, name):
+    """تحميل وحدة من مسار ملف (أسماء ملفات الوحدات تحتوي على شرطات)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeSettingsManager:
+    """مدير إعدادات ثابت بدلًا من مدير إعدادات التطبيق"""
+    def get_active_settings(self):
+        return {"dpi": 800, "sensitivity": 1.0, "polling_rate": 1000, "acceleration": False}
+
+
+@pytest.fixture(scope="session")
+def analytics():
+    return load_module(ANALYTICS_MODULE, "analytics_module")
+
+
+@pytest.fixture(scope="session")
+def devices():
+    return load_module(DEVICES_MODULE, "devices_module")
+
+
+@pytest.fixture(scope="session")
+def qt_app():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+@pytest.fixture
+def home_dir(tmp_path, monkeypatch):
+    """مجلد منزل مؤقت حتى تكتب PerformanceData في ~/.mousetuner معزول"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def make_performance_data(analytics, home_dir):
+    """إنشاء PerformanceData مع إغلاقها في نهاية الاختبار"""
+    created = []
+
+    def make(**kwargs):
+        performance_data = analytics.PerformanceData(FakeSettingsManager(), **kwargs)
+        created.append(performance_data)
+        return performance_data
+
+    yield make
+    for performance_data in created:
+        performance_data.close()
+
+
+def calibration_result(timestamp, score=5.0):
+    """نتيجة معايرة بقيم مشتقة من score"""
+    return {
+        "timestamp": timestamp,
+        "accuracy_score": score,
+        "speed_score": score + 1,
+        "tracking_score": score + 2,
+        "overall_score": score + 0.5,
+        "response_time": 200 + score,
+        "recommended_settings": {}
+    }
+
+
+def make_record(timestamp, score=5.0):
+    """سجل معايرة كامل كما تحفظه وحدات التخزين"""
+    record = calibration_result(timestamp, score)
+    record["date"] = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+    record["settings"] = {"dpi": 800}
+    return record
@@ -0,0 +1,51 @@
+from conftest import calibration_result
+
+SECTIONS = ("update_chart", "update_summary", "update_detailed_stats", "update_recommendations")
+
+
+def count_updates(widget, monkeypatch):
+    calls = {name: 0 for name in SECTIONS}
+    for name in SECTIONS:
+        update = getattr(widget, name)
+
+        def counted(update=update, name=name):
+            calls[name] += 1
+            update()
+        monkeypatch.setattr(widget, name, counted)
+    return calls
+
+
+def test_widget_refreshes_only_changed_sections(analytics, make_performance_data, qt_app, monkeypatch):
+    performance_data = make_performance_data()
+    performance_data.add_calibration_result(calibration_result(1700000000, 5))
+    widget = analytics.AnalyticsWidget(performance_data)
+    calls = count_updates(widget, monkeypatch)
+
+    # لا شيء تغير منذ العرض الأول
+    widget.update_data()
+    assert sum(calls.values()) == 0
+
+    # نتيجة جديدة: التاريخ والاتجاهات تغيرت
+    performance_data.add_calibration_result(calibration_result(1700000060, 7))
+    qt_app.processEvents()
+    assert calls["update_chart"] == calls["update_summary"] == calls["update_detailed_stats"] == 1
+
+    # إعادة التحليل دون بيانات جديدة لا تغير إصدار الاتجاهات
+    version = performance_data.get_data_version("trends")
+    performance_data.analyze_patterns()
+    assert performance_data.get_data_version("trends") == version
+    widget.update_data()
+    assert calls["update_detailed_stats"] == 1
+    widget.deleteLater()
+    qt_app.processEvents()
+
+
+def test_widget_without_notifier(analytics, make_performance_data, qt_app):
+    performance_data = make_performance_data()
+    performance_data.notifier = None
+    widget = analytics.AnalyticsWidget(performance_data)
+    performance_data.add_calibration_result(calibration_result(1700000000, 5))
+    widget.update_data()
+    assert widget.rendered_versions["summary"] == performance_data.get_data_version("history")
+    widget.deleteLater()
+    qt_app.processEvents()
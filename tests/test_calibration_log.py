@@ -0,0 +1,164 @@
+import os
+import json
+
+from conftest import make_record
+
+BASE = 1700000000
+
+
+def small_log(analytics, path, segment_size=10):
+    log = analytics.CalibrationLog(str(path))
+    log.SEGMENT_SIZE = segment_size
+    return log
+
+
+def append(log, records):
+    log.append_many([(record, None, None) for record in records])
+
+
+def timestamps(records):
+    return [record["timestamp"] for record in records]
+
+
+def test_segments_roll_over_and_reload(analytics, tmp_path):
+    log = small_log(analytics, tmp_path / "log")
+    records = [make_record(BASE + i) for i in range(25)]
+    append(log, records[:12])
+    append(log, records[12:])
+    log.close()
+
+    assert log._segment_indexes() == [1, 2, 3]
+    with open(log.index_file, 'r', encoding='utf-8') as f:
+        assert json.load(f)["segments"] == {"1": 10, "2": 10}
+
+    reloaded = small_log(analytics, tmp_path / "log")
+    state, pending = reloaded.load()
+    assert state == {}
+    assert reloaded.count() == 25
+    assert timestamps(pending) == [BASE + i for i in range(25)]
+    assert timestamps(reloaded.get_records_range(8, 13)) == [BASE + i for i in range(8, 13)]
+    assert timestamps(reloaded.get_records(3)) == [BASE + 22, BASE + 23, BASE + 24]
+
+    # الإضافة بعد إعادة الفتح تكمل الجزء النشط
+    append(reloaded, [make_record(BASE + 25)])
+    reloaded.close()
+    assert reloaded._segment_indexes() == [1, 2, 3]
+    assert small_log(analytics, tmp_path / "log").load()[1][-1]["timestamp"] == BASE + 25
+
+
+def test_truncated_last_line_is_skipped(analytics, tmp_path):
+    log = small_log(analytics, tmp_path / "log")
+    append(log, [make_record(BASE + i) for i in range(3)])
+    log.close()
+    # انقطاع أثناء كتابة سجل: سطر أخير غير مكتمل
+    with open(log._segment_path(1), 'a', encoding='utf-8') as f:
+        f.write('{"timestamp": 17000')
+
+    recovered = small_log(analytics, tmp_path / "log")
+    _, pending = recovered.load()
+    assert timestamps(pending) == [BASE, BASE + 1, BASE + 2]
+
+    # السجل التالي يبدأ في سطر جديد ولا يندمج مع السطر المقطوع
+    append(recovered, [make_record(BASE + 3)])
+    recovered.close()
+    _, pending = small_log(analytics, tmp_path / "log").load()
+    assert timestamps(pending) == [BASE, BASE + 1, BASE + 2, BASE + 3]
+
+
+def test_checkpoint_limits_pending_records(analytics, tmp_path):
+    log = small_log(analytics, tmp_path / "log")
+    append(log, [make_record(BASE + i) for i in range(15)])
+    log.write_checkpoint({"2023-11-14": {"calibrations": 15}}, {"accuracy_trend": 0.5}, [], record_count=12)
+    append(log, [make_record(BASE + 15)])
+    log.close()
+
+    reloaded = small_log(analytics, tmp_path / "log")
+    state, pending = reloaded.load()
+    assert state["daily_stats"] == {"2023-11-14": {"calibrations": 15}}
+    assert state["usage_patterns"] == {"accuracy_trend": 0.5}
+    # السجلات بعد نقطة الحفظ فقط تُعاد لتحديث الإحصائيات
+    assert timestamps(pending) == [BASE + 12, BASE + 13, BASE + 14, BASE + 15]
+    assert reloaded.appends_since_checkpoint == 4
+
+
+def test_missing_index_is_rebuilt(analytics, tmp_path):
+    log = small_log(analytics, tmp_path / "log")
+    append(log, [make_record(BASE + i) for i in range(25)])
+    log.close()
+    os.remove(log.index_file)
+
+    reloaded = small_log(analytics, tmp_path / "log")
+    reloaded.load()
+    assert reloaded.count() == 25
+    with open(reloaded.index_file, 'r', encoding='utf-8') as f:
+        assert json.load(f)["segments"] == {"1": 10, "2": 10}
+
+
+def legacy_file(home_dir, count):
+    data_dir = home_dir / ".mousetuner" / "analytics"
+    data_dir.mkdir(parents=True)
+    history = {"calibration_history": [make_record(BASE + i * 60) for i in range(count)],
+               "daily_stats": {}, "usage_patterns": {"accuracy_trend": 1.0}, "recommendations": []}
+    (data_dir / "performance_data.json").write_text(json.dumps(history), encoding="utf-8")
+    return data_dir
+
+
+def test_legacy_data_is_migrated(analytics, make_performance_data, home_dir):
+    data_dir = legacy_file(home_dir, 30)
+    performance_data = make_performance_data()
+
+    assert not (data_dir / "performance_data.json").exists()
+    assert (data_dir / "performance_data.json.migrated").exists()
+    assert performance_data.storage.count() == 30
+    assert performance_data.performance_history["usage_patterns"] == {"accuracy_trend": 1.0}
+    assert timestamps(performance_data.get_calibration_history(2)) == [BASE + 28 * 60, BASE + 29 * 60]
+
+
+def test_failed_migration_is_retried(analytics, make_performance_data, home_dir, monkeypatch):
+    data_dir = legacy_file(home_dir, 30)
+
+    def fail(self, *args, **kwargs):
+        raise OSError("القرص ممتلئ")
+    # الفشل بعد كتابة السجلات وقبل نقطة الحفظ
+    with monkeypatch.context() as patch:
+        patch.setattr(analytics.CalibrationLog, "write_checkpoint", fail)
+        performance_data = make_performance_data()
+    assert performance_data.storage.count() == 0
+    assert not performance_data.storage.exists()
+    assert (data_dir / "performance_data.json").exists()
+    performance_data.close()
+
+    performance_data = make_performance_data()
+    assert performance_data.storage.count() == 30
+    assert not (data_dir / "performance_data.json").exists()
+
+
+def test_committed_import_is_completed_on_open(analytics, tmp_path, monkeypatch):
+    log = analytics.CalibrationLog(str(tmp_path / "log"))
+    history = {"calibration_history": [make_record(BASE + i) for i in range(5)],
+               "daily_stats": {}, "usage_patterns": {}, "recommendations": []}
+    # انقطاع بعد الالتزام وقبل نقل الملفات إلى السجل
+    with monkeypatch.context() as patch:
+        patch.setattr(analytics.CalibrationLog, "_publish_import", lambda self, ready_dir: None)
+        log.import_history(history)
+    assert not log.exists()
+
+    reopened = analytics.CalibrationLog(str(tmp_path / "log"))
+    assert reopened.exists()
+    assert reopened.history_imported()
+    reopened.load()
+    assert reopened.count() == 5
+    assert not os.path.exists(os.path.join(reopened.log_dir, reopened.READY_IMPORT_DIR))
+
+
+def test_imported_history_is_not_imported_twice(analytics, make_performance_data, home_dir):
+    data_dir = legacy_file(home_dir, 30)
+    # انقطاع بعد اكتمال الترحيل وقبل إعادة تسمية الملف القديم
+    log = analytics.CalibrationLog(str(data_dir / "calibration_log"))
+    with open(data_dir / "performance_data.json", 'r', encoding='utf-8') as f:
+        log.import_history(json.load(f))
+    log.close()
+
+    performance_data = make_performance_data()
+    assert performance_data.storage.count() == 30
+    assert (data_dir / "performance_data.json.migrated").exists()
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+EV_SYN, EV_KEY, EV_REL = 0x00, 0x01, 0x02
+SYN_REPORT, SYN_DROPPED = 0x00, 0x03
+REL_X, REL_Y, REL_WHEEL = 0x00, 0x01, 0x08
+BTN_LEFT, BTN_RIGHT = 0x110, 0x111
+
+
+def write_events(devices, path, events):
+    """كتابة أحداث (الزمن بالميكروثانية، النوع، الرمز، القيمة) بصيغة input_event الخام"""
+    data = np.zeros(len(events), dtype=devices.INPUT_EVENT)
+    for i, (timestamp, kind, code, value) in enumerate(events):
+        data[i] = (timestamp // 1000000, timestamp % 1000000, kind, code, value)
+    data.tofile(str(path))
+    return str(path)
+
+
+def report(timestamp, dx=0, dy=0, keys=()):
+    """أحداث تقرير واحد منتهية بـ SYN_REPORT"""
+    events = [(timestamp, EV_KEY, code, value) for code, value in keys]
+    if dx:
+        events.append((timestamp, EV_REL, REL_X, dx))
+    if dy:
+        events.append((timestamp, EV_REL, REL_Y, dy))
+    events.append((timestamp, EV_SYN, SYN_REPORT, 0))
+    return events
+
+
+def replay(devices, tmp_path, events, engine_class=None, capacity=1000):
+    path = write_events(devices, tmp_path / "capture.evdev", events)
+    engine_class = engine_class or devices.InputCaptureEngine
+    engine = engine_class(devices.ReplaySource(path), devices.MotionRingBuffer(capacity))
+    reports = engine.replay()
+    return engine, reports
+
+
+def test_events_are_grouped_by_syn_report(devices, tmp_path):
+    events = (report(1000000, dx=3, dy=-2) +
+              # عدة أحداث للمحور نفسه في تقرير واحد تُجمع، والعجلة لا تؤثر على الإزاحة
+              [(1000125, EV_REL, REL_X, 1), (1000125, EV_REL, REL_X, 4), (1000125, EV_REL, REL_WHEEL, 1),
+               (1000125, EV_SYN, SYN_REPORT, 0)] +
+              report(1000250, dy=7) +
+              # تقرير ناقص في نهاية التسجيل لا يُضاف
+              [(1000375, EV_REL, REL_X, 9)])
+    engine, reports = replay(devices, tmp_path, events)
+    assert reports == 3
+    data = engine.buffer.latest()
+    assert data["timestamp"].tolist() == [1000000, 1000125, 1000250]
+    assert data["dx"].tolist() == [3, 5, 0]
+    assert data["dy"].tolist() == [-2, 0, 7]
+    assert engine.dropped_reports == 0
+
+
+def test_report_after_syn_dropped_is_discarded(devices, tmp_path):
+    events = (report(1000, dx=1) +
+              [(1125, EV_SYN, SYN_DROPPED, 0),
+               (1250, EV_REL, REL_X, 100), (1250, EV_KEY, BTN_LEFT, 1), (1250, EV_SYN, SYN_REPORT, 0)] +
+              report(1375, dx=2, dy=2))
+    engine, reports = replay(devices, tmp_path, events)
+    assert reports == 2
+    data = engine.buffer.latest()
+    assert data["timestamp"].tolist() == [1000, 1375]
+    assert data["dx"].tolist() == [1, 2]
+    assert data["buttons"].tolist() == [0, 0]
+    assert engine.dropped_reports == 1
+
+
+def test_syn_dropped_discard_spans_batches(devices, tmp_path):
+    class SmallBatchEngine(devices.InputCaptureEngine):
+        BATCH_EVENTS = 4
+
+    events = (report(1000, dx=1) +
+              [(1125, EV_SYN, SYN_DROPPED, 0)] +
+              [(1250, EV_REL, REL_X, 50)] * 6 +
+              [(1250, EV_SYN, SYN_REPORT, 0)] +
+              report(1375, dx=2))
+    engine, reports = replay(devices, tmp_path, events, SmallBatchEngine)
+    assert engine.buffer.latest()["dx"].tolist() == [1, 2]
+    assert reports == 2
+    assert engine.dropped_reports == 1
+
+
+def test_button_state_carries_across_batches(devices, tmp_path):
+    class SmallBatchEngine(devices.InputCaptureEngine):
+        BATCH_EVENTS = 8
+
+    events = (report(1000, dx=1, keys=[(BTN_LEFT, 1)]) +
+              [event for i in range(10) for event in report(1125 + i * 125, dx=1, dy=1)] +
+              report(3000, keys=[(BTN_RIGHT, 1)]) +
+              report(3125, dx=-1, keys=[(BTN_LEFT, 0)]) +
+              report(3250, dy=-1) +
+              report(3375, keys=[(BTN_RIGHT, 0)]))
+    engine, reports = replay(devices, tmp_path, events, SmallBatchEngine)
+    assert reports == 15
+    buttons = engine.buffer.latest()["buttons"].tolist()
+    assert buttons == [0b01] * 11 + [0b11, 0b10, 0b10, 0b00]
+    assert engine.button_state == 0
+    assert engine.buffer.latest()["dx"].sum() == 10
+
+
+def test_ring_buffer_wraps_and_counts_overwritten_reports(devices):
+    buffer = devices.MotionRingBuffer(5)
+
+    def append(start, count):
+        index = np.arange(start, start + count)
+        buffer.append(index * 125, index, -index, np.zeros(count, dtype=np.uint16))
+
+    append(0, 3)
+    assert len(buffer) == 3
+    data, position = buffer.since(0)
+    assert (data["dx"].tolist(), position) == ([0, 1, 2], 3)
+
+    # الكتابة تلتف حول نهاية الحلقة وتستبدل أقدم التقارير
+    append(3, 4)
+    assert buffer.total == 7
+    assert len(buffer) == 5
+    assert buffer.latest()["dx"].tolist() == [2, 3, 4, 5, 6]
+    assert buffer.latest(2)["dy"].tolist() == [-5, -6]
+
+    # قارئ متأخر يحصل على المحفوظ فقط، وعدد ما فاته هو الفرق بين الموضعين
+    data, new_position = buffer.since(position)
+    assert data["dx"].tolist() == [3, 4, 5, 6]
+    data, new_position = buffer.since(0)
+    assert data["dx"].tolist() == [2, 3, 4, 5, 6]
+    assert new_position - 0 - len(data) == 2
+
+    # دفعة أكبر من الحلقة تحتفظ بآخرها فقط
+    append(7, 12)
+    assert buffer.total == 19
+    assert buffer.latest()["dx"].tolist() == [14, 15, 16, 17, 18]
+    assert np.all(np.diff(buffer.latest()["timestamp"]) == 125)
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.latest().size == 0
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def chart_data(count, offset=0.0):
+    x = np.arange(count)
+    data = {name: np.full(count, 5.0) + offset + np.sin(x + i) for i, name in
+            enumerate(("accuracy", "speed", "tracking", "overall"))}
+    data["dates"] = np.arange(count).astype('datetime64[D]')
+    data["x"] = x
+    data["resolution"] = "all"
+    return data
+
+
+def test_line_updates_blit_without_full_redraw(analytics, qt_app, monkeypatch):
+    chart = analytics.PerformanceChart(width=6, height=3)
+    chart.resize(600, 300)
+    chart.update_chart(chart_data(20))
+    qt_app.processEvents()
+    assert chart._background is not None
+    lines = dict(chart.lines)
+
+    calls = {"draw": 0, "blit": 0}
+    draw, blit = chart.draw, chart.blit
+
+    def counted(name, function):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return function(*args, **kwargs)
+        return wrapper
+    monkeypatch.setattr(chart, "draw", counted("draw", draw))
+    monkeypatch.setattr(chart, "blit", counted("blit", blit))
+
+    # نقطة إضافية ضمن هامش المحور: رسم جزئي فقط على العناصر نفسها
+    data = chart_data(21, offset=1.0)
+    chart.update_chart(data)
+    assert calls == {"draw": 0, "blit": 1}
+    assert chart.lines == lines
+    assert chart.lines["overall"].get_xdata().tolist() == data["x"].tolist()
+    assert np.allclose(chart.lines["overall"].get_ydata(), data["overall"])
+
+    # تجاوز حدود المحور يتطلب رسمًا كاملًا
+    chart.update_chart(chart_data(40))
+    assert calls["draw"] == 1
+    assert chart.axes.get_xlim()[1] >= 39
+    chart.deleteLater()
+    qt_app.processEvents()
+
+
+def test_chart_type_switch_rebuilds_artists(analytics, qt_app):
+    chart = analytics.PerformanceChart()
+    chart.update_chart(chart_data(5))
+    chart.update_chart(chart_data(5), "bar")
+    assert chart.lines == {}
+    assert [bar.get_height() for bar in chart.bars] == [chart_data(5)[name][-1] for name in
+                                                        ("accuracy", "speed", "tracking", "overall")]
+    chart.update_chart(chart_data(5))
+    assert set(chart.lines) == {"accuracy", "speed", "tracking", "overall"}
+    chart.deleteLater()
+    qt_app.processEvents()
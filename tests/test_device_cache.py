@@ -0,0 +1,72 @@
+import shutil
+
+import pytest
+
+from conftest import PROCFS_ROOT
+
+
+@pytest.fixture
+def input_tree(tmp_path):
+    root = tmp_path / "root"
+    shutil.copytree(PROCFS_ROOT, root)
+    return root
+
+
+def edit_devices(root, old, new):
+    devices_file = root / "proc" / "bus" / "input" / "devices"
+    content = devices_file.read_text()
+    assert old in content
+    devices_file.write_text(content.replace(old, new))
+
+
+@pytest.fixture
+def detector(devices, qt_app, input_tree, monkeypatch):
+    detector = devices.DeviceDetector(input_root=str(input_tree))
+    detector.os_type = "Linux"
+    detector.field_changes = []
+    detector.device_fields_changed.connect(
+        lambda mouse_info, fields: detector.field_changes.append((mouse_info.device_id, fields)))
+    detector.refresh_devices()
+    assert detector.apply_settings("event3", {"dpi": 1200, "polling_rate": 500})
+    detector.field_changes.clear()
+    return detector
+
+
+def test_settings_survive_descriptor_change(detector, input_tree):
+    old_device = detector.devices["event3"]
+    # تحديث البرنامج الثابت يغير بيانات الجهاز الخام فيُعاد إنشاؤه
+    edit_devices(input_tree, "Product=C539 Version=0111", "Product=C539 Version=0112")
+    detector.refresh_devices()
+
+    device = detector.devices["event3"]
+    assert device is not old_device
+    assert (device.current_dpi, device.current_polling_rate) == (1200, 500)
+    assert not any("current_dpi" in fields or "current_polling_rate" in fields
+                   for _, fields in detector.field_changes)
+
+
+def test_settings_survive_replug_into_another_port(detector, input_tree):
+    devices_file = input_tree / "proc" / "bus" / "input" / "devices"
+    original = devices_file.read_text()
+    blocks = original.split("\n\n")
+    devices_file.write_text("\n\n".join(block for block in blocks if "G Pro" not in block))
+    detector.refresh_devices()
+    assert "event3" not in detector.devices
+
+    devices_file.write_text(original.replace("usb-0000:00:14.0-2/input1", "usb-0000:00:14.0-5/input1")
+                                    .replace("mouse0 event3", "mouse2 event9"))
+    detector.refresh_devices()
+    device = detector.devices["event9"]
+    assert (device.current_dpi, device.current_polling_rate) == (1200, 500)
+
+
+def test_other_device_on_same_node_starts_from_defaults(detector, input_tree):
+    default_dpi = detector.devices["event7"].current_dpi
+    edit_devices(input_tree, "mouse0 event3", "mouse0 event5")
+    edit_devices(input_tree, "mouse1 event7", "mouse1 event3")
+    detector.refresh_devices()
+
+    # MX Master 3 أخذ عقدة event3 لكنه ليس الجهاز الذي طُبقت عليه الإعدادات
+    assert detector.devices["event3"].name == "MX Master 3"
+    assert detector.devices["event3"].current_dpi == default_dpi
+    assert detector.devices["event5"].current_dpi == 1200
@@ -0,0 +1,102 @@
+import time
+import threading
+import subprocess
+
+import pytest
+
+from conftest import PROCFS_ROOT
+
+
+def wait_until(qt_app, predicate, timeout=2.0):
+    """معالجة أحداث Qt حتى يتحقق الشرط أو تنتهي المهلة"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        qt_app.processEvents()
+        time.sleep(0.005)
+    return True
+
+
+def settle(qt_app, seconds=0.1):
+    wait_until(qt_app, lambda: False, seconds)
+
+
+@pytest.fixture
+def detector(devices, qt_app, tmp_path):
+    detector = devices.DeviceDetector(input_root=str(tmp_path))
+
+    # اكتشاف وهمي يعد مرات التشغيل ويمكن حجزه لمحاكاة اكتشاف بطيء
+    detector.refresh_calls = 0
+    detector.gate = threading.Event()
+    detector.gate.set()
+    detector.running = threading.Event()
+
+    def refresh_devices():
+        detector.refresh_calls += 1
+        detector.running.set()
+        detector.gate.wait(5)
+    detector.refresh_devices = refresh_devices
+
+    yield detector
+    detector.gate.set()
+    detector.stop_detection()
+
+
+def idle(detector):
+    return not detector._refresh_in_progress
+
+
+def test_requests_during_refresh_are_dropped(qt_app, detector):
+    detector.start_detection()
+    assert wait_until(qt_app, lambda: detector.refresh_calls == 1 and idle(detector))
+
+    detector.gate.clear()
+    detector.running.clear()
+    assert detector.request_refresh()
+    assert wait_until(qt_app, detector.running.is_set)
+    # طلبات التحديث الدوري أثناء تحديث جارٍ لا تُؤجل ولا تتراكم
+    for _ in range(3):
+        assert not detector.request_refresh()
+    assert not detector._refresh_again
+
+    detector.gate.set()
+    assert wait_until(qt_app, lambda: idle(detector))
+    settle(qt_app, 0.1)
+    assert detector.refresh_calls == 2
+
+
+def test_stop_does_not_wait_for_stuck_refresh(qt_app, detector):
+    detector.STOP_TIMEOUT = 50
+    detector.gate.clear()
+    detector.start_detection()
+    assert wait_until(qt_app, detector.running.is_set)
+
+    started = time.monotonic()
+    detector.stop_detection()
+    assert time.monotonic() - started < 1
+    assert len(detector._stopping_workers) == 1
+    assert idle(detector)
+
+    # يُحرر الخيط بعد انتهاء تحديثه
+    detector.gate.set()
+    assert wait_until(qt_app, lambda: not detector._stopping_workers)
+    assert detector.refresh_calls == 1
+
+
+def test_probe_timeout_keeps_devices(devices, qt_app, monkeypatch):
+    detector = devices.DeviceDetector(input_root=PROCFS_ROOT)
+    detector.os_type = "Linux"
+    detector.refresh_devices()
+    current = dict(detector.devices)
+    assert current
+
+    removed = []
+    detector.device_removed.connect(removed.append)
+
+    def timeout():
+        raise subprocess.TimeoutExpired("xinput", detector.PROBE_TIMEOUT)
+    monkeypatch.setattr(detector, "_detect_connected_devices", timeout)
+    detector.refresh_devices()
+    assert detector.devices == current
+    assert removed == []
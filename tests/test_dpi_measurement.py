@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from conftest import PROCFS_ROOT
+
+MS = 1000  # ميكروثانية
+INCH = 25.4  # تمريرة بطول بوصة: عدد العدّات هو DPI
+
+
+def passes(devices, counts, reports_per_pass=50, pause=300 * MS, direction=(1, 0)):
+    """تقارير التقاط لتمريرات متتالية، كل تمريرة بعدد عدّات معطى ويفصل بينها توقف"""
+    chunks = []
+    time = 0
+    for total in counts:
+        chunk = np.zeros(reports_per_pass, dtype=devices.MotionRingBuffer.DTYPE)
+        chunk["timestamp"] = time + MS * np.arange(reports_per_pass)
+        # توزيع العدّات على التقارير بحيث يكون مجموعها في كل محور مضاعف الاتجاه بالضبط
+        for axis, share in zip(("dx", "dy"), direction):
+            chunk[axis] = np.diff(np.rint(np.linspace(0, total * share, reports_per_pass + 1)))
+        chunks.append(chunk)
+        time = int(chunk["timestamp"][-1]) + pause
+    return np.concatenate(chunks)
+
+
+def test_reports_are_split_at_pauses(devices):
+    measurement = devices.DpiMeasurement(INCH)
+    reports = passes(devices, [800, 1600, 400])
+    assert measurement.split_passes(reports).tolist() == [800, 1600, 400]
+
+    # توقف أقصر من PAUSE لا يفصل التمريرة
+    reports = passes(devices, [800, 800], pause=measurement.PAUSE // 2)
+    assert measurement.split_passes(reports).tolist() == [1600]
+
+    # التمريرات القصيرة (ضغطات أو لمسات عرضية) تُستبعد
+    short = passes(devices, [30], reports_per_pass=measurement.MIN_PASS_REPORTS - 1)
+    short["timestamp"] += reports["timestamp"][-1] + measurement.PAUSE * 2
+    assert measurement.split_passes(np.concatenate((reports, short))).tolist() == [1600]
+
+
+def test_diagonal_passes_use_distance(devices):
+    reports = passes(devices, [1000, 1000, 1000], direction=(0.6, -0.8))
+    assert devices.DpiMeasurement(INCH).split_passes(reports).tolist() == [1000, 1000, 1000]
+
+
+def test_outliers_are_rejected(devices):
+    result = devices.DpiMeasurement(INCH).measure(passes(devices, [798, 802, 800, 801, 799, 1600, 400]))
+    assert result["passes"] == 5
+    assert result["rejected_passes"] == 2
+    assert result["dpi"] == pytest.approx(800)
+    assert result["nominal_dpi"] == 800
+    assert result["pass_dpi"] == [798, 802, 800, 801, 799, 1600, 400]
+
+
+def test_identical_passes(devices):
+    # الانحراف المطلق الوسيط صفر: تُقبل التمريرات المساوية للوسيط فقط
+    result = devices.DpiMeasurement(INCH).measure(passes(devices, [1200, 1200, 1200, 1200, 1210]))
+    assert result["passes"] == 4
+    assert result["rejected_passes"] == 1
+    assert result["dpi"] == 1200
+    assert result["ci_low"] == result["ci_high"] == 1200
+    assert result["nominal_dpi"] == 1200
+
+
+def test_confidence_interval(devices):
+    counts = [1590, 1600, 1610, 1595, 1605, 1598, 1602, 1600, 1593, 1607, 1601, 1599]
+    result = devices.DpiMeasurement(INCH).measure(passes(devices, counts))
+    values = np.array(counts, dtype=float)
+    # 12 تمريرة: 11 درجة حرية
+    margin = 2.201 * values.std(ddof=1) / np.sqrt(values.size)
+    assert result["passes"] == 12
+    assert result["dpi"] == pytest.approx(values.mean())
+    assert result["ci_low"] == pytest.approx(values.mean() - margin)
+    assert result["ci_high"] == pytest.approx(values.mean() + margin)
+    assert result["nominal_dpi"] == 1600
+
+
+def test_measured_value_outside_interval_is_not_snapped(devices):
+    result = devices.DpiMeasurement(INCH).measure(passes(devices, [1620, 1621, 1619, 1620]))
+    assert result["nominal_dpi"] == 1620
+    result = devices.DpiMeasurement(INCH).measure(passes(devices, [1612, 1613, 1612, 1613]))
+    assert result["nominal_dpi"] == 1612
+
+
+@pytest.mark.parametrize("degrees, value", [(1, 12.706), (10, 2.228), (11, 2.201), (14, 2.145),
+                                            (35, 2.042), (60, 2.000), (1000, 1.980)])
+def test_t_value_uses_nearest_smaller_degrees(devices, degrees, value):
+    assert devices.DpiMeasurement.t_value(degrees) == value
+
+
+def test_too_few_passes(devices):
+    measurement = devices.DpiMeasurement(INCH)
+    assert measurement.measure(passes(devices, [800, 800])) is None
+    assert measurement.measure(np.zeros(0, dtype=devices.MotionRingBuffer.DTYPE)) is None
+    # بعد استبعاد الشاذ لا يبقى عدد كافٍ
+    assert measurement.measure(passes(devices, [800, 801, 4000])) is None
+
+
+def test_measured_dpi_updates_device(devices, qt_app):
+    detector = devices.DeviceDetector()
+    mouse_info = devices.MouseInfo()
+    mouse_info.device_id = "event3"
+    detector.devices = {"event3": mouse_info}
+    changes = []
+    detector.device_fields_changed.connect(lambda device, fields: changes.append(fields))
+
+    assert detector.update_dpi("event3", passes(devices, [1600, 1601, 1599]), INCH)["nominal_dpi"] == 1600
+    assert mouse_info.current_dpi == 1600
+    assert changes == [["current_dpi"]]
+
+
+def test_detected_devices_have_no_measured_dpi(devices, qt_app):
+    detector = devices.DeviceDetector(input_root=PROCFS_ROOT)
+    detector.os_type = "Linux"
+    detector.refresh_devices()
+    assert detector.devices
+    assert all(mouse_info.current_dpi == 0 for mouse_info in detector.devices.values())
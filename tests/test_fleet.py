@@ -0,0 +1,111 @@
+import io
+import os
+import json
+
+import pytest
+
+from conftest import FakeSettingsManager, calibration_result, make_record
+
+BASE = 1700000000
+
+
+def legacy_history(count, start=BASE):
+    return {"calibration_history": [make_record(start + i * 60, 5 + i % 3) for i in range(count)],
+            "daily_stats": {}, "usage_patterns": {}, "recommendations": []}
+
+
+def make_seat(analytics, monkeypatch, home, storage, legacy=0, added=0):
+    """جهاز مستخدم بعد تشغيل التطبيق: ترحيل الملف القديم ثم إضافة نتائج جديدة"""
+    monkeypatch.setenv("HOME", str(home))
+    data_dir = home / ".mousetuner" / "analytics"
+    data_dir.mkdir(parents=True)
+    if legacy:
+        (data_dir / "performance_data.json").write_text(json.dumps(legacy_history(legacy)), encoding="utf-8")
+    performance_data = analytics.PerformanceData(FakeSettingsManager(), storage=storage)
+    performance_data.add_calibration_results([calibration_result(BASE + 86400 + i * 60, 8) for i in range(added)])
+    performance_data.close()
+    return data_dir
+
+
+def user_reports(output):
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    return {line["user"]: line for line in lines if line["type"] == "user"}, lines[-1]
+
+
+@pytest.mark.parametrize("storage", ["log", "sqlite"])
+def test_fleet_reads_migrated_seat(analytics, monkeypatch, tmp_path, storage):
+    data_dir = make_seat(analytics, monkeypatch, tmp_path / "seat", storage, legacy=30, added=5)
+    assert not os.path.exists(data_dir / "performance_data.json")
+    assert os.path.exists(data_dir / "performance_data.json.migrated")
+
+    assert list(analytics.find_performance_files(str(tmp_path))) == [(str(data_dir), storage)]
+
+    output = io.StringIO()
+    fleet = analytics.run_fleet_analysis(str(tmp_path), output, workers=1)
+    reports, _ = user_reports(output)
+    report = reports[os.path.relpath(data_dir, tmp_path)]
+    assert report["storage"] == storage
+    assert report["calibrations"] == 35
+    assert fleet["users"] == 1
+    assert fleet["failed"] == 0
+    assert fleet["calibrations"] == 35
+
+
+def test_fleet_mixes_backends(analytics, monkeypatch, tmp_path):
+    make_seat(analytics, monkeypatch, tmp_path / "a", "log", added=12)
+    make_seat(analytics, monkeypatch, tmp_path / "b", "sqlite", legacy=4)
+    legacy_dir = tmp_path / "c"
+    legacy_dir.mkdir()
+    (legacy_dir / "performance_data.json").write_text(json.dumps(legacy_history(7)), encoding="utf-8")
+    (tmp_path / "empty").mkdir()
+
+    found = dict(analytics.find_performance_files(str(tmp_path)))
+    assert sorted(found.values()) == ["json", "log", "sqlite"]
+
+    output = io.StringIO()
+    fleet = analytics.run_fleet_analysis(str(tmp_path), output, workers=2)
+    reports, last = user_reports(output)
+    assert last["type"] == "fleet"
+    assert sorted(report["calibrations"] for report in reports.values()) == [4, 7, 12]
+    assert fleet["users"] == 3
+    assert fleet["calibrations"] == 23
+    assert sum(fleet["score_histogram"]) == 23
+
+
+def tree_snapshot(root):
+    """محتوى كل ملف في شجرة مع وقت تعديله"""
+    snapshot = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as f:
+                snapshot[path] = (os.stat(path).st_mtime_ns, f.read())
+    return snapshot
+
+
+@pytest.mark.parametrize("storage", ["log", "sqlite"])
+def test_fleet_scan_does_not_modify_seats(analytics, monkeypatch, tmp_path, storage):
+    data_dir = make_seat(analytics, monkeypatch, tmp_path / "seat", storage, legacy=30, added=5)
+    if storage == "log":
+        # فهرس قديم ينقصه عدد جزء مغلق: القراءة تعده دون إعادة كتابة الفهرس
+        log = analytics.CalibrationLog(str(data_dir / analytics.LOG_DIR_NAME))
+        log.SEGMENT_SIZE = 10
+        log.load()
+        log.append_many([(make_record(BASE + 7 * 86400 + i * 60), None, None) for i in range(25)])
+        log.close()
+        os.remove(log.index_file)
+    else:
+        # قاعدة من إصدار سابق دون عمود مسار الحركة: لا تُرقّى عند القراءة
+        import sqlite3
+        connection = sqlite3.connect(str(data_dir / analytics.SQLITE_FILE_NAME))
+        connection.execute("ALTER TABLE calibrations DROP COLUMN trajectory")
+        connection.commit()
+        connection.close()
+    before = tree_snapshot(tmp_path)
+
+    output = io.StringIO()
+    fleet = analytics.run_fleet_analysis(str(tmp_path), output, workers=1)
+
+    assert fleet["failed"] == 0
+    assert fleet["calibrations"] == (60 if storage == "log" else 35)
+    assert tree_snapshot(tmp_path) == before
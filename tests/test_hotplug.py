@@ -0,0 +1,125 @@
+import time
+import threading
+
+import pytest
+
+
+def wait_until(qt_app, predicate, timeout=2.0):
+    """معالجة أحداث Qt حتى يتحقق الشرط أو تنتهي المهلة"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        qt_app.processEvents()
+        time.sleep(0.005)
+    return True
+
+
+def settle(qt_app, seconds=0.1):
+    wait_until(qt_app, lambda: False, seconds)
+
+
+@pytest.fixture
+def detector_with_source(devices, qt_app, tmp_path):
+    class FakeHotplugSource(devices.HotplugSource):
+        """مصدر أحداث وهمي يُستدعى notify فيه يدويًا"""
+        SETTLE_DELAY = 20
+
+        def __init__(self):
+            super().__init__()
+            self.started = False
+
+        def start(self):
+            self.started = True
+            return True
+
+        def stop(self):
+            super().stop()
+            self.started = False
+
+    source = FakeHotplugSource()
+    detector = devices.DeviceDetector(hotplug_source=source, input_root=str(tmp_path))
+
+    # اكتشاف وهمي يعد مرات التشغيل ويمكن حجزه لمحاكاة اكتشاف بطيء
+    detector.refresh_calls = 0
+    detector.gate = threading.Event()
+    detector.gate.set()
+    detector.running = threading.Event()
+
+    def refresh_devices():
+        detector.refresh_calls += 1
+        detector.running.set()
+        detector.gate.wait(5)
+    detector.refresh_devices = refresh_devices
+
+    yield detector, source
+    detector.gate.set()
+    detector.stop_detection()
+
+
+def idle(detector):
+    return not detector._refresh_in_progress
+
+
+def test_refresh_runs_only_on_events(qt_app, detector_with_source):
+    detector, source = detector_with_source
+    detector.start_detection()
+    assert source.started
+    assert not detector.update_timer.isActive()
+    assert wait_until(qt_app, lambda: detector.refresh_calls == 1 and idle(detector))
+
+    # لا تحديث دوري دون أحداث
+    settle(qt_app, 0.2)
+    assert detector.refresh_calls == 1
+
+    # دفعة أحداث متتالية من جهاز واحد تُجمع في تحديث واحد
+    for _ in range(5):
+        source.notify()
+    assert wait_until(qt_app, lambda: detector.refresh_calls == 2 and idle(detector))
+    settle(qt_app, 0.1)
+    assert detector.refresh_calls == 2
+
+    detector.stop_detection()
+    assert not source.started
+    source.notify()
+    settle(qt_app, 0.1)
+    assert detector.refresh_calls == 2
+
+
+def test_events_during_refresh_coalesce_into_one_follow_up(qt_app, detector_with_source):
+    detector, source = detector_with_source
+    detector.start_detection()
+    assert wait_until(qt_app, lambda: detector.refresh_calls == 1 and idle(detector))
+
+    # تحديث بطيء جارٍ، وتصل أثناءه عدة أحداث منفصلة
+    detector.gate.clear()
+    detector.running.clear()
+    source.notify()
+    assert wait_until(qt_app, detector.running.is_set)
+    for _ in range(3):
+        source.notify()
+        settle(qt_app, 0.05)
+    assert detector._refresh_again
+    assert detector.refresh_calls == 2
+
+    # بعد انتهاء التحديث الجاري يُنفذ تحديث واحد فقط للأحداث المتراكمة
+    detector.gate.set()
+    assert wait_until(qt_app, lambda: detector.refresh_calls == 3 and idle(detector))
+    settle(qt_app, 0.1)
+    assert detector.refresh_calls == 3
+    assert not detector.update_timer.isActive()
+
+
+def test_polling_fallback_without_source(devices, qt_app, tmp_path):
+    class UnavailableSource(devices.HotplugSource):
+        def start(self):
+            return False
+
+    detector = devices.DeviceDetector(hotplug_source=UnavailableSource(), input_root=str(tmp_path))
+    detector.refresh_devices = lambda: None
+    detector.start_detection()
+    try:
+        assert detector.update_timer.isActive()
+        assert detector.update_timer.interval() == detector.UPDATE_INTERVAL
+    finally:
+        detector.stop_detection()
@@ -0,0 +1,34 @@
+import os
+import sys
+import subprocess
+
+from conftest import ANALYTICS_MODULE, DEVICES_MODULE
+
+LOAD_MODULE = (
+    "import importlib.util, sys\n"
+    "spec = importlib.util.spec_from_file_location('module', sys.argv[1])\n"
+    "module = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(module)\n"
+    "import instrumentation\n"
+    "print(module.instrumentation is instrumentation.instrumentation, instrumentation.__file__)\n"
+)
+
+
+def test_modules_share_instrumentation(analytics, devices):
+    import instrumentation
+    assert analytics.instrumentation is instrumentation.instrumentation
+    assert devices.instrumentation is instrumentation.instrumentation
+
+
+def test_instrumentation_comes_from_project_root(tmp_path):
+    # ملف بالاسم نفسه في مجلد التشغيل لا يُحمَّل بدلًا من ملف المشروع
+    (tmp_path / "instrumentation.py").write_text("raise RuntimeError('instrumentation.py غير متوقع')\n")
+    project_root = os.path.dirname(DEVICES_MODULE)
+    for path in (ANALYTICS_MODULE, DEVICES_MODULE):
+        result = subprocess.run([sys.executable, "-c", LOAD_MODULE, path], cwd=str(tmp_path),
+                                env=dict(os.environ, MOUSETUNER_INSTRUMENTATION="0"),
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        shared, location = result.stdout.split()
+        assert shared == "True"
+        assert os.path.dirname(location) == project_root
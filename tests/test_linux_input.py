@@ -0,0 +1,74 @@
+import shutil
+
+import pytest
+
+from conftest import PROCFS_ROOT, SYSFS_ROOT
+
+
+@pytest.fixture(autouse=True)
+def require_64bit_longs(devices):
+    # خرائط البتات في الشجرة منسوخة من نظام بكلمات 64 بت
+    if devices.LinuxInputProbe.LONG_BITS != 64:
+        pytest.skip("خرائط البتات في الشجرة لنظام 64 بت")
+
+
+@pytest.mark.parametrize("root", [PROCFS_ROOT, SYSFS_ROOT], ids=["procfs", "sysfs"])
+def test_enumerates_mice_only(devices, root):
+    mice = {mouse["name"]: mouse for mouse in devices.LinuxInputProbe(root).enumerate_mice()}
+    # زر الطاقة ولوحة المفاتيح (حتى مع عجلة وسائط) ليست أجهزة ماوس
+    assert sorted(mice) == ["Logitech G Pro Wireless", "MX Master 3"]
+
+    wired = mice["Logitech G Pro Wireless"]
+    assert wired["device_id"] == "event3"
+    assert wired["device_path"] == "/dev/input/event3"
+    assert (wired["vendor_id"], wired["product_id"]) == ("046d", "c539")
+    assert wired["bus_type"] == "usb"
+    assert wired["buttons"] == 5
+    assert wired["capabilities"] == ["REL_X", "REL_Y", "REL_WHEEL", "REL_WHEEL_HI_RES",
+                                     "BTN_LEFT", "BTN_RIGHT", "BTN_MIDDLE", "BTN_SIDE", "BTN_EXTRA"]
+
+    bluetooth = mice["MX Master 3"]
+    assert bluetooth["device_id"] == "event7"
+    assert (bluetooth["vendor_id"], bluetooth["product_id"]) == ("046d", "b023")
+    assert bluetooth["bus_type"] == "bluetooth"
+    assert bluetooth["buttons"] == 8
+    assert "REL_HWHEEL_HI_RES" in bluetooth["capabilities"]
+
+
+def test_procfs_and_sysfs_agree(devices):
+    def describe(root):
+        return [{key: value for key, value in mouse.items() if key != "fingerprint"}
+                for mouse in devices.LinuxInputProbe(root).enumerate_mice()]
+    assert describe(PROCFS_ROOT) == describe(SYSFS_ROOT)
+
+
+def test_missing_tree_returns_none(devices, tmp_path):
+    assert devices.LinuxInputProbe(str(tmp_path)).enumerate_mice() is None
+    assert devices.LinuxInputProbe(str(tmp_path)).read_battery("MX Master 3") is None
+
+
+def test_unchanged_procfs_is_not_parsed_again(devices, tmp_path):
+    root = tmp_path / "root"
+    shutil.copytree(PROCFS_ROOT, root)
+    probe = devices.LinuxInputProbe(str(root))
+    first = probe.enumerate_mice()
+    assert probe.enumerate_mice() is first
+
+    # إزالة الماوس اللاسلكي تغير محتوى الملف فيُعاد التحليل، وبصمة الجهاز الباقي لا تتغير
+    devices_file = root / "proc" / "bus" / "input" / "devices"
+    blocks = devices_file.read_text().split("\n\n")
+    devices_file.write_text("\n\n".join(block for block in blocks if "MX Master 3" not in block))
+    second = probe.enumerate_mice()
+    assert [mouse["name"] for mouse in second] == ["Logitech G Pro Wireless"]
+    assert second[0]["fingerprint"] == first[0]["fingerprint"]
+
+
+def test_read_battery(devices):
+    probe = devices.LinuxInputProbe(PROCFS_ROOT)
+    assert probe.read_battery("MX Master 3") == 85
+    # اسم الجهاز كما تعرضه النواة قد يحتوي على اسم النموذج مع إضافات
+    assert probe.read_battery("Logitech MX Master 3 Mouse") == 85
+    assert probe.read_battery("MX Keys") == 40
+    # بطارية الحاسوب (نطاق System) لا تُنسب إلى أي جهاز
+    assert probe.read_battery("5B10W13930") is None
+    assert probe.read_battery("Logitech G Pro Wireless") is None
@@ -0,0 +1,61 @@
+def model(name, usb_ids=(), dpi_max=16000):
+    return {"name": name, "vendor": name.split()[0], "usb_ids": list(usb_ids), "dpi_range": [100, dpi_max],
+            "polling_rates": [125, 1000], "buttons": 6, "supported_features": ["DPI adjustment"]}
+
+
+def test_usb_id_comes_before_name(devices):
+    database = devices.MouseDatabase([model("Logitech G Pro"), model("Razer Viper", usb_ids=["1532:0078"])])
+    # الاسم يطابق نموذجًا والمعرف يطابق آخر: المعرف أدق
+    assert database.lookup("Logitech G Pro", "1532", "0078")["name"] == "Razer Viper"
+    assert database.lookup("Logitech G Pro", "1532", "0079")["name"] == "Logitech G Pro"
+    assert database.lookup("Logitech G Pro", "1532", "0078".upper())["name"] == "Razer Viper"
+
+
+def test_name_matches_whole_words(devices):
+    database = devices.MouseDatabase([model("G Pro")])
+    assert database.lookup("Logitech G Pro Wireless Gaming Mouse")["name"] == "G Pro"
+    assert database.lookup("logitech g-pro")["name"] == "G Pro"
+    assert database.lookup("Logitech G Proteus Spectrum") is None
+    assert database.lookup("Logitech MG Pro") is None
+
+
+def test_longest_name_is_preferred(devices):
+    database = devices.MouseDatabase([model("G Pro"), model("G Pro X Superlight"), model("Superlight")])
+    assert database.lookup("Logitech G Pro X Superlight")["name"] == "G Pro X Superlight"
+    assert database.lookup("Logitech G Pro X")["name"] == "G Pro"
+    assert database.lookup("Generic Superlight")["name"] == "Superlight"
+
+
+def test_missing_or_invalid_file_gives_empty_database(devices, tmp_path):
+    assert len(devices.MouseDatabase.load(str(tmp_path / "missing.json"))) == 0
+    invalid = tmp_path / "invalid.json"
+    invalid.write_text('{"models": [', encoding="utf-8")
+    database = devices.MouseDatabase.load(str(invalid))
+    assert len(database) == 0
+    assert database.lookup("Logitech G Pro", "046d", "c08b") is None
+
+
+def test_cache_is_cleared_when_full(devices, monkeypatch):
+    database = devices.MouseDatabase([model("G Pro")])
+    monkeypatch.setattr(database, "CACHE_SIZE", 3)
+    for index in range(3):
+        database.lookup(f"Mouse {index}")
+    assert len(database._cache) == 3
+    assert database.lookup("Logitech G Pro")["name"] == "G Pro"
+    assert list(database._cache) == [("Logitech G Pro", "", "")]
+    # النتيجة المحفوظة تُعاد كما هي
+    assert database.lookup("Logitech G Pro") is database.lookup("Logitech G Pro")
+
+
+def test_known_info_lists_are_copied(devices, qt_app):
+    detector = devices.DeviceDetector()
+    detector.mouse_database = devices.MouseDatabase([model("G Pro")])
+    first, second = devices.MouseInfo(), devices.MouseInfo()
+    for mouse_info in (first, second):
+        mouse_info.name = "Logitech G Pro"
+        detector._apply_known_info(mouse_info)
+    first.dpi_range[1] = 800
+    first.supported_features.append("RGB lighting")
+    assert second.dpi_range == [100, 16000]
+    assert second.supported_features == ["DPI adjustment"]
+    assert detector.mouse_database.models[0]["dpi_range"] == [100, 16000]
@@ -0,0 +1,43 @@
+def test_defaults_are_not_shared(devices):
+    first, second = devices.MouseInfo(), devices.MouseInfo()
+    first.dpi_range.append(800)
+    assert second.dpi_range == []
+    assert not hasattr(first, "__dict__")
+
+
+def test_methods_cover_all_fields(devices):
+    fields = dict(devices.MouseInfo.FIELDS)
+    assert devices.MouseInfo().to_dict() == fields
+    assert devices.MouseInfo.from_dict({}).to_dict() == fields
+
+
+def test_dict_round_trip(devices):
+    mouse_info = devices.MouseInfo()
+    mouse_info.device_id = "event3"
+    mouse_info.name = "Logitech G Pro Wireless"
+    mouse_info.dpi_range = [100, 25600]
+    mouse_info.current_dpi = 1600
+    data = mouse_info.to_dict()
+    assert list(data) == [field for field, _ in devices.MouseInfo.FIELDS]
+
+    restored = devices.MouseInfo.from_dict(data)
+    assert restored.to_dict() == data
+    assert restored.diff(mouse_info) == []
+
+
+def test_from_dict_fills_defaults_and_interns(devices):
+    vendor = "".join(["Logi", "tech"])
+    mouse_info = devices.MouseInfo.from_dict({"name": "G305", "vendor": vendor, "vendor_id": "046d"})
+    assert mouse_info.name == "G305"
+    assert mouse_info.battery_level == -1
+    assert mouse_info.supported_features == []
+    assert mouse_info.vendor is devices.MouseInfo.from_dict({"vendor": "Logitech"}).vendor
+
+
+def test_diff_lists_changed_fields_in_order(devices):
+    old = devices.MouseInfo()
+    new = devices.MouseInfo()
+    new.current_polling_rate = 4000
+    new.battery_level = 55
+    new.capabilities = ["REL_X"]
+    assert old.diff(new) == ["battery_level", "current_polling_rate", "capabilities"]
@@ -0,0 +1,76 @@
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+from conftest import FakeSettingsManager, calibration_result
+
+
+@pytest.mark.parametrize("storage", ["log", "sqlite"])
+def test_history_does_not_wait_for_writer(make_performance_data, storage):
+    performance_data = make_performance_data(storage=storage)
+    base = 1700000000
+    performance_data.add_calibration_results([calibration_result(base + i, i) for i in range(40)])
+    performance_data.writer.flush()
+
+    # كاتب بطيء: الدفعة الثانية تبقى في الطابور طوال الاختبار
+    performance_data.writer.COALESCE_DELAY = 60
+
+    def fail():
+        raise AssertionError("get_calibration_history انتظر كاتب الخلفية")
+    performance_data.writer.flush = fail
+    performance_data.add_calibration_results([calibration_result(base + 40 + i, 40 + i) for i in range(40)])
+    assert len(performance_data.writer.unwritten_records()) == 40
+
+    history = performance_data.get_calibration_history(70)
+    assert [record["timestamp"] for record in history] == [base + i for i in range(10, 80)]
+
+    history = performance_data.get_calibration_history(200)
+    assert [record["timestamp"] for record in history] == [base + i for i in range(80)]
+
+
+@pytest.mark.parametrize("storage", ["log", "sqlite"])
+def test_importing_older_results_keeps_latest_state(analytics, make_performance_data, storage):
+    performance_data = make_performance_data(storage=storage)
+    base = 1700000000
+    performance_data.add_calibration_results([calibration_result(base + 1000 + i, 5 + i * 0.1) for i in range(20)])
+    latest = performance_data.get_calibration_history(1)[0]
+    slopes = performance_data.trend_engine.slopes()
+
+    # دفعة مستوردة غير مرتبة وكلها أقدم من التاريخ الموجود
+    imported = [calibration_result(base - 86400 * i, 9 - i * 0.5) for i in (3, 0, 2, 1, 4)]
+    assert performance_data.add_calibration_results(imported) == 5
+
+    assert performance_data.get_calibration_history(1)[0]["timestamp"] == latest["timestamp"]
+    assert performance_data.trend_engine.slopes() == pytest.approx(slopes)
+    assert performance_data.history_store.latest("overall_score", 1)[0] == latest["overall_score"]
+
+    # الإحصائيات الكلية واليومية تشمل الدفعة المستوردة
+    assert performance_data.get_detailed_stats("all")["accuracy"]["count"] == 25
+
+    chart = performance_data.get_performance_chart_data("all", max_points=None)
+    assert np.all(np.diff(chart["dates"].astype(np.int64)) >= 0)
+    assert chart["overall"][-1] == latest["overall_score"]
+
+    timestamps = [record["timestamp"] for record in performance_data.get_calibration_history(25)]
+    assert timestamps == sorted(timestamps)
+    assert timestamps[:5] == [base - 86400 * i for i in (4, 3, 2, 1, 0)]
+
+    # إعادة التحميل من وحدة التخزين تعطي الحالة نفسها
+    performance_data.writer.flush()
+    reloaded = make_performance_data(storage=storage)
+    assert reloaded.get_calibration_history(1)[0]["timestamp"] == latest["timestamp"]
+    assert reloaded.trend_engine.slopes() == pytest.approx(slopes)
+
+
+def test_closed_data_is_released(analytics, home_dir):
+    performance_data = analytics.PerformanceData(FakeSettingsManager())
+    performance_data.add_calibration_result(calibration_result(1700000000))
+    performance_data.close()
+    writer = weakref.ref(performance_data.writer)
+    storage = weakref.ref(performance_data.storage)
+    del performance_data
+    gc.collect()
+    assert writer() is None
+    assert storage() is None
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from conftest import PROCFS_ROOT
+
+
+def reports(rate, seconds, start=0):
+    """أزمنة تقارير منتظمة بالميكروثانية"""
+    interval = 1000000 // rate
+    return start + interval * np.arange(rate * seconds, dtype=np.int64)
+
+
+@pytest.mark.parametrize("rate, measured", [(1000, 1000), (500, 520), (8000, 7400), (125, 119)])
+def test_rate_snaps_to_nominal(devices, rate, measured):
+    interval = 1000000 / measured
+    timestamps = np.rint(interval * np.arange(2000)).astype(np.int64)
+    analysis = devices.PollingRateAnalyzer().analyze(timestamps)
+    assert analysis["nominal_rate"] == rate
+    assert analysis["measured_rate"] == pytest.approx(measured, rel=0.01)
+
+
+def test_rate_far_from_standard_is_kept(devices):
+    assert devices.PollingRateAnalyzer().nominal_rate(700.4) == 700
+
+
+def test_idle_gaps_are_excluded(devices):
+    # ثانيتان من الحركة يفصل بينهما توقف ثلاث ثوانٍ
+    timestamps = np.concatenate((reports(1000, 2), reports(1000, 2, start=5000000)))
+    analysis = devices.PollingRateAnalyzer().analyze(timestamps)
+    assert analysis["nominal_rate"] == 1000
+    assert analysis["active_time"] == pytest.approx(3.998)
+    assert analysis["late_reports"] == analysis["dropped_reports"] == 0
+    assert analysis["jitter_max_us"] == 0
+
+
+def test_late_and_dropped_reports(devices):
+    timestamps = reports(1000, 2)
+    # تقرير مفقود في موضعين، وثلاثة تقارير متتالية في موضع ثالث
+    timestamps = np.delete(timestamps, [100, 500, 1200, 1201, 1202])
+    analysis = devices.PollingRateAnalyzer().analyze(timestamps)
+    assert analysis["late_reports"] == 3
+    assert analysis["dropped_reports"] == 5
+
+
+def test_jitter_percentiles(devices):
+    rng = np.random.default_rng(3)
+    # انحراف كل فترة عن 1000 ميكروثانية معروف: 2% منها 300، و5% منها 100، والباقي 0
+    deviation = np.zeros(10000, dtype=np.int64)
+    deviation[:200] = 300
+    deviation[200:700] = 100
+    intervals = 1000 + rng.permutation(deviation) * rng.choice((-1, 1), size=deviation.size)
+    timestamps = np.concatenate(([0], np.cumsum(intervals)))
+
+    analysis = devices.PollingRateAnalyzer().analyze(timestamps)
+    assert analysis["nominal_rate"] == 1000
+    assert analysis["jitter_p50_us"] == 0
+    assert analysis["jitter_p95_us"] == pytest.approx(100)
+    assert analysis["jitter_p99_us"] == pytest.approx(300)
+    assert analysis["jitter_max_us"] == 300
+
+
+def test_too_few_reports(devices):
+    analyzer = devices.PollingRateAnalyzer()
+    assert analyzer.analyze(reports(1000, 1)[:100]) is None
+    # تقارير كثيرة لكن معظمها بعد توقفات
+    assert analyzer.analyze(np.arange(300, dtype=np.int64) * 100000) is None
+
+
+def test_measured_rate_updates_device(devices, qt_app):
+    detector = devices.DeviceDetector()
+    mouse_info = devices.MouseInfo()
+    mouse_info.device_id = "event3"
+    detector.devices = {"event3": mouse_info}
+    changes = []
+    detector.device_fields_changed.connect(lambda device, fields: changes.append(fields))
+
+    assert detector.update_polling_rate("event3", reports(500, 1))["nominal_rate"] == 500
+    assert mouse_info.current_polling_rate == 500
+    assert changes == [["current_polling_rate"]]
+    # القياس نفسه مرة أخرى لا يُعد تغييرًا
+    detector.update_polling_rate("event3", reports(500, 1))
+    assert changes == [["current_polling_rate"]]
+
+
+def test_detected_devices_have_no_measured_rate(devices, qt_app):
+    detector = devices.DeviceDetector(input_root=PROCFS_ROOT)
+    detector.os_type = "Linux"
+    detector.refresh_devices()
+    assert detector.devices
+    assert all(mouse_info.current_polling_rate == 0 for mouse_info in detector.devices.values())
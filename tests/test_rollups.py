@@ -0,0 +1,127 @@
+import datetime
+import collections
+
+import numpy as np
+import pytest
+
+from conftest import calibration_result
+
+METRICS = ("accuracy", "speed", "tracking", "overall")
+
+
+def reference_lttb(x, y, threshold):
+    """تنفيذ LTTB المرجعي نقطة بنقطة كما في ورقة Steinarsson"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = 0
+    indices = [0]
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[selected] - avg_x) * (y[j] - y[selected]) - (x[selected] - x[j]) * (avg_y - y[selected]))
+            if area > best_area:
+                best, best_area = j, area
+        indices.append(best)
+        selected = best
+    indices.append(n - 1)
+    return indices
+
+
+@pytest.mark.parametrize("count, threshold", [(1000, 100), (5003, 500), (50, 7)])
+def test_lttb_matches_reference(analytics, count, threshold):
+    rng = np.random.default_rng(count)
+    x = np.arange(count, dtype=np.float64)
+    y = np.cumsum(rng.normal(0, 1, count))
+    indices = analytics.lttb_indices(x, y, threshold)
+
+    assert len(indices) == threshold
+    assert indices[0] == 0
+    assert indices[-1] == count - 1
+    assert np.all(np.diff(indices) > 0)
+    # الدلاء نفسها تقريبًا، فتختار الخوارزميتان النقاط نفسها في معظم الدلاء
+    reference = reference_lttb(x.tolist(), y.tolist(), threshold)
+    assert np.mean(np.asarray(reference) == indices) > 0.9
+    # القمة والقاع لا يضيعان في التقليص
+    assert y[indices].max() == pytest.approx(y.max(), abs=np.ptp(y) * 0.02)
+    assert y[indices].min() == pytest.approx(y.min(), abs=np.ptp(y) * 0.02)
+
+
+def test_lttb_keeps_short_series(analytics):
+    assert analytics.lttb_indices(np.arange(10), np.arange(10), 20).tolist() == list(range(10))
+
+
+def history(analytics, count, seed=5):
+    rng = np.random.default_rng(seed)
+    base = datetime.datetime(2024, 1, 1, 12).timestamp()
+    timestamps = base + np.sort(rng.uniform(0, 120 * 86400, count))
+    records = [{"timestamp": float(t), "accuracy_score": rng.uniform(0, 10), "speed_score": rng.uniform(0, 10),
+                "tracking_score": rng.uniform(0, 10), "overall_score": rng.uniform(0, 10), "response_time": 200.0}
+               for t in timestamps]
+    store = analytics.CalibrationHistoryStore()
+    store.extend(records)
+    return store, records
+
+
+def period_start(timestamp, resolution):
+    day = datetime.date.fromtimestamp(timestamp)
+    if resolution == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if resolution == "month":
+        return day.replace(day=1)
+    return day
+
+
+@pytest.mark.parametrize("resolution", ["day", "week", "month"])
+def test_rollup_totals(analytics, resolution):
+    store, records = history(analytics, 600)
+    rollups = analytics.RollupIndex()
+    rollups.rebuild(store)
+
+    expected = collections.defaultdict(list)
+    for record in records:
+        expected[period_start(record["timestamp"], resolution)].append(record)
+    groups = rollups.groups[resolution]
+    assert sum(metric_stats.count for metric_stats in groups.values()) == len(records)
+
+    series = rollups.series(resolution)
+    periods = sorted(expected)
+    assert series["dates"].astype(datetime.date).tolist() == periods
+    for name in METRICS:
+        means = [np.mean([r[f"{name}_score"] for r in expected[period]]) for period in periods]
+        assert series[name] == pytest.approx(means)
+
+
+def test_incremental_rollups_match_rebuild(analytics):
+    store, records = history(analytics, 300)
+    incremental = analytics.RollupIndex()
+    first = analytics.CalibrationHistoryStore()
+    first.extend(records[:100])
+    incremental.rebuild(first)
+    for record in records[100:150]:
+        incremental.add(datetime.date.fromtimestamp(record["timestamp"]).toordinal(), record)
+    rest = records[150:]
+    incremental.extend([datetime.date.fromtimestamp(r["timestamp"]).toordinal() for r in rest],
+                       {name: np.array([r[f"{name}_score"] for r in rest]) for name in METRICS})
+
+    rebuilt = analytics.RollupIndex()
+    rebuilt.rebuild(store)
+    for resolution in analytics.RollupIndex.RESOLUTIONS:
+        expected, actual = rebuilt.series(resolution), incremental.series(resolution)
+        assert actual["dates"].tolist() == expected["dates"].tolist()
+        for name in METRICS:
+            assert actual[name] == pytest.approx(expected[name])
+
+
+def test_chart_data_is_downsampled(make_performance_data):
+    performance_data = make_performance_data()
+    for i in range(240):
+        performance_data.add_calibration_result(calibration_result(1700000000 + i * 3600, i % 10))
+    data = performance_data.get_performance_chart_data("all", max_points=50)
+    assert len(data["overall"]) == len(data["dates"]) == len(data["x"]) == 50
+    assert data["x"][0] == 0 and data["x"][-1] == 239
@@ -0,0 +1,110 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from conftest import calibration_result
+
+METRICS = ("accuracy", "speed", "tracking", "overall")
+
+
+def record(rng):
+    return {"accuracy_score": rng.uniform(0, 10), "speed_score": rng.uniform(0, 10),
+            "tracking_score": rng.uniform(0, 10), "overall_score": rng.uniform(0, 10)}
+
+
+def assert_matches(stats, values):
+    values = np.asarray(values)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std(), abs=1e-9)
+    assert stats.min == values.min()
+    assert stats.max == values.max()
+
+
+def test_running_stats_add_remove_and_merge(analytics):
+    values = np.random.default_rng(1).normal(5, 2, 200)
+    stats = analytics.RunningStats()
+    for value in values:
+        stats.add(value)
+    assert_matches(stats, values)
+
+    merged = analytics.RunningStats.from_array(values[:70])
+    merged.merge(analytics.RunningStats.from_array(values[70:]))
+    assert_matches(merged, values)
+
+    for value in values[:150]:
+        stats.remove(value)
+    assert stats.count == 50
+    assert stats.mean == pytest.approx(values[150:].mean())
+    assert stats.std == pytest.approx(values[150:].std())
+
+
+@pytest.mark.parametrize("size", [1, 4, 10])
+def test_sliding_window_matches_numpy(analytics, size):
+    rng = np.random.default_rng(size)
+    window = analytics.WindowedMetricStats(size)
+    records = []
+    for _ in range(40):
+        records.append(record(rng))
+        window.add(records[-1])
+        for name in METRICS:
+            assert_matches(window.stats[name], [r[f"{name}_score"] for r in records[-size:]])
+
+
+def test_window_from_history_continues_sliding(analytics):
+    rng = np.random.default_rng(7)
+    store = analytics.CalibrationHistoryStore()
+    records = [dict(record(rng), timestamp=1700000000 + i, response_time=200) for i in range(30)]
+    store.extend(records)
+    window = analytics.WindowedMetricStats.from_history(store, 10)
+    for name in METRICS:
+        assert_matches(window.stats[name], [r[f"{name}_score"] for r in records[-10:]])
+
+    records.append(dict(record(rng), timestamp=1700000030, response_time=200))
+    window.add(records[-1])
+    for name in METRICS:
+        assert_matches(window.stats[name], [r[f"{name}_score"] for r in records[-10:]])
+
+
+def test_daily_stats_match_per_day_numpy(analytics, make_performance_data):
+    performance_data = make_performance_data()
+    rng = np.random.default_rng(3)
+    timestamps = 1700000000 + rng.integers(0, 10 * 86400, 500)
+    records = [dict(record(rng), timestamp=int(timestamp)) for timestamp in timestamps]
+    daily_stats = {}
+    for calibration_record in records:
+        performance_data._update_daily_stats(daily_stats, calibration_record)
+
+    days = np.array([datetime.datetime.fromtimestamp(t).strftime('%Y-%m-%d') for t in timestamps])
+    assert sorted(daily_stats) == sorted(set(days))
+    for day, daily in daily_stats.items():
+        metric_stats = analytics.MetricStats.from_daily(daily)
+        for name in METRICS:
+            assert_matches(metric_stats.stats[name],
+                           [r[f"{name}_score"] for r, record_day in zip(records, days) if record_day == day])
+
+
+def test_group_stats_match_per_day_numpy(analytics):
+    rng = np.random.default_rng(3)
+    days = rng.integers(738000, 738010, 500)
+    columns = {name: rng.normal(6, 1.5, 500) for name in METRICS}
+    groups = analytics.group_metric_stats(days, columns)
+
+    assert sorted(groups) == sorted(np.unique(days).tolist())
+    for day, metric_stats in groups.items():
+        for name in METRICS:
+            assert_matches(metric_stats.stats[name], columns[name][days == day])
+
+
+def test_daily_stats_round_trip(analytics, make_performance_data):
+    performance_data = make_performance_data()
+    base = 1700000000
+    scores = [4.0, 6.5, 5.0, 9.0]
+    for i, score in enumerate(scores):
+        performance_data.add_calibration_result(calibration_result(base + i * 60, score))
+    day = next(iter(performance_data.performance_history["daily_stats"]))
+    daily = performance_data.performance_history["daily_stats"][day]
+    restored = analytics.MetricStats.from_daily(daily)
+    assert_matches(restored.stats["accuracy"], scores)
+    assert performance_data.get_detailed_stats("all")["accuracy"]["std"] == pytest.approx(np.std(scores))
@@ -0,0 +1,63 @@
+import pytest
+
+from conftest import make_record
+
+
+def append(storage, records):
+    storage.append_many([(record, "2024-01-01", {"calibrations": 1}) for record in records])
+
+
+def test_sqlite_reads_follow_insertion_order(analytics, tmp_path):
+    storage = analytics.SQLiteStorage(str(tmp_path / "performance.db"))
+    # نتائج مستوردة أقدم من الموجودة تُضاف بعدها
+    base = 1700000000
+    append(storage, [make_record(base + 300, 1), make_record(base + 100, 2), make_record(base + 200, 3)])
+
+    store = analytics.CalibrationHistoryStore()
+    storage.load_metrics(store)
+    assert store.column("timestamp").tolist() == [base + 300, base + 100, base + 200]
+    assert [r["timestamp"] for r in storage.get_records(3)] == [base + 300, base + 100, base + 200]
+    assert [r["accuracy_score"] for r in storage.get_records_range(1, 3)] == [2, 3]
+
+    # التحميل التزايدي يكمل من حيث توقف المخزن دون تكرار أو تخطي
+    append(storage, [make_record(base + 50, 4)])
+    storage.load_metrics(store, start=len(store))
+    assert store.column("timestamp").tolist() == [base + 300, base + 100, base + 200, base + 50]
+    assert store.column("accuracy_score").tolist() == [1, 2, 3, 4]
+    storage.close()
+
+
+def test_log_and_sqlite_agree_on_order(analytics, tmp_path):
+    base = 1700000000
+    records = [make_record(base + offset, score) for score, offset in enumerate((500, 10, 300, 20))]
+    log = analytics.CalibrationLog(str(tmp_path / "log"))
+    sqlite = analytics.SQLiteStorage(str(tmp_path / "performance.db"))
+    for storage in (log, sqlite):
+        append(storage, records)
+    assert [r["timestamp"] for r in log.get_records(4)] == [r["timestamp"] for r in sqlite.get_records(4)]
+    log.close()
+    sqlite.close()
+
+
+def test_sqlite_import_is_one_transaction(analytics, tmp_path, monkeypatch):
+    history = {"calibration_history": [make_record(1700000000 + i) for i in range(5)],
+               "daily_stats": {"2023-11-14": {"calibrations": 5}},
+               "usage_patterns": {"accuracy_trend": 1.0}, "recommendations": []}
+    storage = analytics.SQLiteStorage(str(tmp_path / "performance.db"))
+
+    def fail(self, day, daily):
+        raise OSError("القرص ممتلئ")
+    with monkeypatch.context() as patch:
+        patch.setattr(analytics.SQLiteStorage, "_write_daily", fail)
+        with pytest.raises(OSError):
+            storage.import_history(history)
+    # لا يبقى شيء من الترحيل الفاشل
+    assert not storage.exists()
+    assert not storage.history_imported()
+    assert storage.get_records(10) == []
+
+    storage.import_history(history)
+    assert storage.exists()
+    assert storage.history_imported()
+    assert len(storage.get_records(10)) == 5
+    storage.close()
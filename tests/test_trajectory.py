@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+
+def make_trajectory(analytics, tmp_path, count=1000, chunk_size=128):
+    rng = np.random.default_rng(7)
+    records = np.zeros(count, dtype=analytics.TRAJECTORY_DTYPE)
+    records["timestamp"] = 1000000 + np.cumsum(rng.integers(100, 150, count))
+    records["dx"] = rng.integers(-40, 40, count)
+    records["dy"] = rng.integers(-40, 40, count)
+    records["buttons"] = rng.integers(0, 2, count)
+    path = str(tmp_path / "session.mtrj")
+    with analytics.TrajectoryWriter(path, chunk_size=chunk_size) as writer:
+        writer.append(records)
+    return path, records
+
+
+def test_round_trip(analytics, tmp_path):
+    path, records = make_trajectory(analytics, tmp_path)
+    with analytics.TrajectoryReader(path) as reader:
+        assert len(reader) == len(records)
+        assert np.array_equal(reader.read(), records)
+        assert np.array_equal(reader.read(100, 300), records[100:300])
+        start, end = int(records["timestamp"][200]), int(records["timestamp"][700])
+        assert np.array_equal(reader.read_time(start, end), records[200:700])
+
+
+def test_cached_chunks_cannot_be_corrupted_by_callers(analytics, tmp_path):
+    path, records = make_trajectory(analytics, tmp_path)
+    with analytics.TrajectoryReader(path) as reader:
+        chunk = reader.chunk(1)
+        assert reader.chunk(1) is chunk
+        with pytest.raises(ValueError):
+            chunk["dx"][0] = 12345
+
+        # قراءة من جزء واحد تعيد عرضًا على الجزء المحفوظ، فهي للقراءة فقط أيضًا
+        part = reader.read(130, 140)
+        with pytest.raises(ValueError):
+            part["dy"] += 1
+
+        # النسخة قابلة للتعديل ولا تؤثر على القراءات التالية
+        copy = reader.read(130, 140).copy()
+        copy["dy"] += 1
+        assert np.array_equal(reader.read(130, 140), records[130:140])
+        assert np.array_equal(reader.chunk(1), records[128:256])
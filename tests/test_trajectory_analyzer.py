@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+
+from conftest import FakeSettingsManager
+
+MS = 1000  # ميكروثانية
+
+
+class Recording:
+    """مسار حركة اصطناعي بعينة كل مللي ثانية"""
+    def __init__(self):
+        self.samples = []
+        self.time = 0
+
+    def wait(self, ms):
+        for _ in range(ms):
+            self.move(0, 0)
+
+    def move(self, dx, dy, steps=1, buttons=0):
+        for _ in range(steps):
+            self.time += MS
+            self.samples.append((self.time, dx, dy, buttons))
+
+    def click(self):
+        self.move(0, 0, buttons=1)
+        self.move(0, 0)
+
+    def records(self, analytics):
+        records = np.zeros(len(self.samples), dtype=analytics.TRAJECTORY_DTYPE)
+        for name, values in zip(("timestamp", "dx", "dy", "buttons"), zip(*self.samples)):
+            records[name] = values
+        return records
+
+
+def targets(analytics, *entries):
+    return np.array(list(entries), dtype=analytics.TrajectoryAnalyzer.TARGET_DTYPE)
+
+
+def test_direct_hit(analytics):
+    recording = Recording()
+    recording.wait(150)  # زمن رد الفعل
+    recording.move(5, 0, steps=20)  # 100 وحدة في 20 مللي ثانية
+    recording.click()
+    metrics = analytics.TrajectoryAnalyzer().analyze(recording.records(analytics),
+                                                     targets(analytics, (0, 100.0, 0.0, 20.0)))
+
+    assert metrics["trials"] == metrics["hits"] == 1
+    assert metrics["path_efficiency"] == pytest.approx(1.0)
+    assert metrics["overshoots"] == metrics["corrections"] == 0
+    assert metrics["reaction_latency_ms"] == pytest.approx(151)
+    assert metrics["movement_time_ms"] == pytest.approx(171)
+    # محاولة واحدة: العرض الفعلي هو عرض الهدف، والمسافة الفعلية 100
+    assert metrics["effective_width"] == pytest.approx(20.0)
+    assert metrics["throughput"] == pytest.approx(np.log2(100 / 20 + 1) / 0.171)
+
+
+def test_overshoot_correction_and_miss(analytics):
+    recording = Recording()
+    # الهدف الأول: تجاوز الحافة البعيدة ثم العودة إليه (الانعكاس على حد خطوة قياس المسار)
+    recording.wait(99)
+    recording.move(5, 0, steps=28)  # إلى 140 والهدف عند 100 بعرض 20
+    recording.move(-5, 0, steps=8)  # عودة إلى 100
+    recording.click()
+    # الهدف الثاني (يظهر بعد الضغط) عند 200: الضغط قبل الوصول إليه
+    second = recording.time
+    recording.wait(100)
+    recording.move(5, 0, steps=10)
+    recording.click()
+    # الهدف الثالث لا يُضغط عليه
+    third = recording.time + 10 * MS
+    recording.wait(50)
+
+    metrics = analytics.TrajectoryAnalyzer().analyze(
+        recording.records(analytics),
+        targets(analytics, (0, 100.0, 0.0, 20.0), (second, 200.0, 0.0, 20.0), (third, 0.0, 0.0, 20.0)))
+
+    assert metrics["targets"] == 3
+    assert metrics["trials"] == 2
+    assert metrics["hits"] == 1
+    assert metrics["hit_rate"] == pytest.approx(1 / 3)
+    assert metrics["overshoots"] == 1
+    assert metrics["corrections"] == 1
+    # المسار الأول 180 وحدة لإزاحة 100، والثاني مستقيم
+    assert metrics["path_efficiency"] == pytest.approx((100 / 180 + 1) / 2)
+
+
+def test_small_jitter_is_not_a_correction(analytics):
+    recording = Recording()
+    recording.move(5, 0, steps=10)
+    recording.move(-1, 0, steps=2)  # أقصر من CORRECTION_MIN
+    recording.move(5, 0, steps=10)
+    recording.click()
+    metrics = analytics.TrajectoryAnalyzer().analyze(recording.records(analytics),
+                                                     targets(analytics, (0, 98.0, 0.0, 20.0)))
+    assert metrics["corrections"] == 0
+
+
+def test_tracking_error_against_target_path(analytics):
+    recording = Recording()
+    recording.move(2, 0, steps=500)
+    path = np.zeros(3, dtype=analytics.TrajectoryAnalyzer.TRACKING_DTYPE)
+    path["timestamp"] = [0, 250 * MS, 500 * MS]
+    path["x"] = [0.0, 500.0, 1000.0]
+    path["y"] = [3.0, 3.0, 3.0]
+
+    metrics = analytics.TrajectoryAnalyzer().analyze(recording.records(analytics), tracking_path=path)
+    assert metrics["tracking_samples"] == 500
+    assert metrics["tracking_error_mean"] == pytest.approx(3.0)
+    assert metrics["tracking_error_rms"] == pytest.approx(3.0)
+    assert metrics["tracking_error_p95"] == pytest.approx(3.0)
+
+
+def click_task(analytics):
+    recording = Recording()
+    recording.wait(150)
+    recording.move(5, 0, steps=20)
+    recording.click()
+    return recording.records(analytics), targets(analytics, (0, 100.0, 0.0, 20.0))
+
+
+def test_click_task_does_not_score_tracking(analytics):
+    records, task = click_task(analytics)
+    result = analytics.TrajectoryAnalyzer().calibration_result(records, task)
+
+    assert set(result) == {"accuracy_score", "speed_score", "tracking_score", "overall_score",
+                           "response_time", "recommended_settings"}
+    assert result["accuracy_score"] == 10.0
+    # التتبع غير مقيس: لا يدخل في النتيجة العامة ولا يأخذ درجة كاملة من كفاءة المسار
+    assert result["overall_score"] == pytest.approx((result["accuracy_score"] + result["speed_score"]) / 2, abs=0.01)
+    assert result["tracking_score"] == result["overall_score"]
+
+    carried = analytics.TrajectoryAnalyzer().calibration_result(records, task, previous_tracking=4.2)
+    assert carried["tracking_score"] == 4.2
+    assert carried["overall_score"] == result["overall_score"]
+
+
+def test_tracking_task_is_scored(analytics):
+    records, task = click_task(analytics)
+    path = np.zeros(2, dtype=analytics.TrajectoryAnalyzer.TRACKING_DTYPE)
+    path["timestamp"] = [0, 200 * MS]
+    path["x"] = [10.0, 10.0]
+    result = analytics.TrajectoryAnalyzer().calibration_result(records, task, tracking_path=path)
+    assert 0 < result["tracking_score"] < 10
+    expected = (result["accuracy_score"] + result["speed_score"] + result["tracking_score"]) / 3
+    assert result["overall_score"] == pytest.approx(expected, abs=0.01)
+
+
+def test_trajectory_calibration_is_added(analytics, make_performance_data):
+    performance_data = make_performance_data()
+    records, task = click_task(analytics)
+    with performance_data.create_trajectory_writer() as writer:
+        writer.append(records)
+    result = performance_data.add_trajectory_calibration(writer.path, task)
+
+    latest = performance_data.get_calibration_history(1)[0]
+    assert latest["accuracy_score"] == result["accuracy_score"]
+    assert latest["settings"] == FakeSettingsManager().get_active_settings()
+    assert performance_data.open_trajectory(latest) is not None
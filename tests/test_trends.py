@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+
+def polyfit_slope(values):
+    """الميل المرجعي: انحدار خطي كامل على القيم"""
+    if len(values) < 2:
+        return 0.0
+    return float(np.polyfit(np.arange(len(values)), values, 1)[0])
+
+
+@pytest.mark.parametrize("window", [2, 5, 17])
+def test_streaming_slope_matches_polyfit(analytics, window):
+    rng = np.random.default_rng(window)
+    values = np.cumsum(rng.normal(0, 1, 300)) + rng.uniform(0, 10, 300)
+    trend = analytics.StreamingTrend(window)
+    for i, value in enumerate(values):
+        trend.update(value)
+        expected = polyfit_slope(values[max(0, i + 1 - window):i + 1])
+        assert trend.slope() == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_streaming_slope_stays_accurate_after_resync(analytics):
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1e6, 1e6 + 10, analytics.StreamingTrend.RESYNC_INTERVAL * 2 + 3)
+    trend = analytics.StreamingTrend(5)
+    for value in values:
+        trend.update(value)
+    assert trend.slope() == pytest.approx(polyfit_slope(values[-5:]), abs=1e-6)
+
+
+def test_trend_engine_prime_matches_updates(analytics):
+    rng = np.random.default_rng(1)
+    records = [{"timestamp": 1700000000 + i, "accuracy_score": a, "speed_score": b, "tracking_score": c,
+                "overall_score": 0.0, "response_time": 0.0}
+               for i, (a, b, c) in enumerate(rng.uniform(0, 10, (40, 3)))]
+    store = analytics.CalibrationHistoryStore()
+    store.extend(records)
+    primed = analytics.TrendEngine(5)
+    primed.prime(store)
+    for name, metric in analytics.TrendEngine.METRICS.items():
+        expected = polyfit_slope([record[metric] for record in records[-5:]])
+        assert primed.slopes()[name] == pytest.approx(expected, abs=1e-9)